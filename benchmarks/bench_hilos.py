@@ -0,0 +1,74 @@
+"""
+Compara la desagregación en serie, en hilos y en procesos sobre datos sintéticos.
+
+Uso:
+    python benchmarks/bench_hilos.py --filas 200000 --chunk 20000 --trabajadores 4
+
+Con un build free-threaded (python3.14t) el modo hilos debería escalar con los
+núcleos; con GIL `procesar_en_hilos` procesa en serie y su tiempo es el de la
+ejecución en serie.
+"""
+
+import argparse
+import platform
+import sys
+import time
+
+from datos_sinteticos import generar_chunks
+
+from desagregacion_dsg_upc import (
+    gil_activo,
+    procesar_en_hilos,
+    procesar_en_procesos,
+)
+from desagregacion_dsg_upc.pipeline import iterar_chunk
+from desagregacion_dsg_upc.rules import MotorReglas
+
+
+def serie(chunks, motor, _trabajadores):
+    for chunk in chunks:
+        yield len(chunk), iterar_chunk(chunk, motor)
+
+
+def medir(modo, chunks, trabajadores) -> tuple[float, int]:
+    motor = MotorReglas.desde_configuracion()
+    inicio = time.perf_counter()
+    filas = sum(
+        len(parte)
+        for _, partes in modo(chunks, motor, trabajadores)
+        for parte in partes
+    )
+    return time.perf_counter() - inicio, filas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=20_000)
+    parser.add_argument("--trabajadores", type=int, default=4)
+    args = parser.parse_args()
+
+    chunks = list(generar_chunks(args.filas, args.chunk))
+    print(
+        f"Python {platform.python_version()} ({sys.implementation.name}), "
+        f"GIL {'activo' if gil_activo() else 'desactivado'}, "
+        f"{args.filas} filas en chunks de {args.chunk}, "
+        f"{args.trabajadores} trabajadores"
+    )
+
+    base = None
+    for nombre, modo in [
+        ("serie", serie),
+        ("hilos", procesar_en_hilos),
+        ("procesos", procesar_en_procesos),
+    ]:
+        segundos, filas = medir(modo, chunks, args.trabajadores)
+        base = base or segundos
+        print(
+            f"{nombre:>9}: {segundos:7.3f} s  {filas / segundos:12,.0f} filas/s  "
+            f"x{base / segundos:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
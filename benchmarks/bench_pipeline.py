@@ -0,0 +1,315 @@
+"""
+Mide el pipeline completo contra una base de datos local que reemplaza a Oracle.
+
+Uso:
+    python benchmarks/bench_pipeline.py --filas 1000000 --chunk 50000
+    python benchmarks/bench_pipeline.py --filas 1000000 --trabajadores 4 --formato parquet
+    python benchmarks/bench_pipeline.py --url duckdb:///datos.duckdb  # con duckdb-engine
+
+Los datos sintéticos (`datos_sinteticos.generar_chunks`) se cargan en una tabla de
+la base indicada por `--url` (por defecto un archivo SQLite temporal) y el engine
+compartido de `utils_db` se apunta a ella, de modo que se ejecuta el camino real:
+`get_db_connection`, `fetch_data_in_chunks` (vía `extraer_chunks`), las reglas y
+el escritor de salida.
+
+Las etapas son acumulativas y cada una corre en un proceso nuevo, para que el pico
+de memoria residente (RSS) de una no contamine el de la siguiente:
+
+- extraccion: conexión y lectura de todos los chunks;
+- reglas: extracción y desagregación (en paralelo si `--trabajadores` > 1);
+- salida: el pipeline completo con `ejecutar_pipeline`.
+
+Para cada etapa se reporta el tiempo, las filas de origen por segundo, el costo
+marginal respecto a la etapa anterior, el RSS al iniciar (intérprete y módulos),
+el pico de RSS del proceso y el pico de la suma con sus procesos descendientes
+(los trabajadores del pool, con `--trabajadores` > 1 en modo procesos).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Self
+
+from datos_sinteticos import generar_chunks
+from loguru import logger
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    dispose_engine,
+    ejecutar_pipeline,
+    extraer_chunks,
+    procesar_en_hilos,
+    procesar_en_procesos,
+    settings,
+    utils_db,
+)
+from desagregacion_dsg_upc.instrumentacion import rss_pico_mb
+from desagregacion_dsg_upc.pipeline import iterar_chunk
+from desagregacion_dsg_upc.rules import MotorReglas
+
+ETAPAS = ["extraccion", "reglas", "salida"]
+TABLA = "datos_sinteticos"
+
+
+def _estado_mb(pid: int | str, campo: str) -> float:
+    # /proc/<pid>/status reporta la memoria en kB (Linux).
+    with open(f"/proc/{pid}/status") as archivo:
+        for linea in archivo:
+            if linea.startswith(f"{campo}:"):
+                return int(linea.split()[1]) / 2**10
+    return 0.0
+
+
+def _descendientes(pid: int) -> list[int]:
+    hijos: dict[int, list[int]] = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            campos = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        hijos.setdefault(int(campos[1]), []).append(int(stat.parent.name))
+
+    resultado, pendientes = [], [pid]
+    while pendientes:
+        for hijo in hijos.get(pendientes.pop(), []):
+            resultado.append(hijo)
+            pendientes.append(hijo)
+    return resultado
+
+
+class MuestreoRSS:
+    """
+    Pico de la suma de RSS del proceso y sus descendientes (ej. el servidor
+    forkserver y los trabajadores del pool), muestreado en un hilo de fondo.
+
+    Los trabajadores no son hijos directos del proceso, por lo que no aparecen en
+    `RUSAGE_CHILDREN`. Solo en Linux; en otros sistemas el pico queda en 0.
+    """
+
+    def __init__(self, intervalo: float = 0.05):
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def __enter__(self) -> Self:
+        if Path("/proc/self/status").exists():
+            self._hilo.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._detener.set()
+        if self._hilo.is_alive():
+            self._hilo.join()
+
+    def _muestrear(self) -> None:
+        pid = os.getpid()
+        while not self._detener.wait(self.intervalo):
+            total = 0.0
+            for proceso in [pid, *_descendientes(pid)]:
+                try:
+                    total += _estado_mb(proceso, "VmRSS")
+                except OSError:  # El proceso terminó entre el listado y la lectura.
+                    continue
+            self.pico_mb = max(self.pico_mb, total)
+
+
+def cargar(url: str, filas: int, semilla: int) -> float:
+    """Crea la tabla de datos sintéticos en la base; devuelve los segundos."""
+    engine = create_engine(url)
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        for numero, chunk in enumerate(generar_chunks(filas, 100_000, semilla)):
+            # `id_fila_origen` lo agrega la extracción.
+            chunk.drop(columns="id_fila_origen").to_sql(
+                TABLA,
+                conn,
+                index=False,
+                if_exists="replace" if numero == 0 else "append",
+            )
+    engine.dispose()
+    return time.perf_counter() - inicio
+
+
+def ejecutar_etapa(etapa: str, args: argparse.Namespace) -> dict[str, Any]:
+    """Ejecuta una etapa en el proceso actual y devuelve sus mediciones."""
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    processing = settings.processing.model_copy(
+        update={
+            "query_input": f"SELECT * FROM {TABLA}",
+            "chunk_size": args.chunk,
+            "output_file": str(args.salida),
+            "output_format": args.formato,
+            "output_compression": args.compresion,
+            "trabajadores": args.trabajadores,
+            "modo_paralelo": args.modo_paralelo,
+            "modo_extraccion": "pandas",
+            "particiones": 1,
+            "profundidad_prefetch": args.prefetch,
+            "cache_extraccion_dir": None,
+            "columns_passthrough": None,
+        }
+    )
+    # Las reglas y la extracción leen la configuración global.
+    settings.processing = processing
+    # El engine compartido apunta a la base local en lugar de Oracle.
+    utils_db._engine = create_engine(args.url)
+    motor = MotorReglas.desde_configuracion()
+
+    rss_inicial = rss_pico_mb()
+    with MuestreoRSS() as muestreo:
+        inicio = time.perf_counter()
+        filas_entrada, filas_salida = _ejecutar(etapa, processing, motor, args)
+        segundos = time.perf_counter() - inicio
+
+    dispose_engine()
+    return {
+        "etapa": etapa,
+        "segundos": segundos,
+        "filas_entrada": filas_entrada,
+        "filas_salida": filas_salida,
+        "rss_inicial_mb": rss_inicial,
+        "rss_pico_mb": rss_pico_mb(),
+        "rss_pico_total_mb": max(muestreo.pico_mb, rss_pico_mb()),
+    }
+
+
+def _ejecutar(
+    etapa: str, processing: Any, motor: MotorReglas, args: argparse.Namespace
+) -> tuple[int, int]:
+    filas_entrada = filas_salida = 0
+    chunks = extraer_chunks(processing)
+    if etapa == "extraccion":
+        for chunk in chunks:
+            filas_entrada += len(chunk)
+    elif etapa == "reglas":
+        if args.trabajadores > 1:
+            procesar = (
+                procesar_en_hilos
+                if args.modo_paralelo == "hilos"
+                else procesar_en_procesos
+            )
+            resultados = procesar(chunks, motor, args.trabajadores)
+        else:
+            resultados = ((len(c), iterar_chunk(c, motor)) for c in chunks)
+        for filas, partes in resultados:
+            filas_entrada += filas
+            filas_salida += sum(len(parte) for parte in partes)
+    else:
+        filas_salida = ejecutar_pipeline(
+            chunks,
+            processing.output_file,
+            motor=motor,
+            output_format=processing.output_format,
+            output_compression=processing.output_compression,
+            trabajadores=processing.trabajadores,
+            modo_paralelo=processing.modo_paralelo,
+        )
+        filas_entrada = args.filas
+    return filas_entrada, filas_salida
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=50_000)
+    parser.add_argument("--trabajadores", type=int, default=1)
+    parser.add_argument(
+        "--modo-paralelo", choices=["procesos", "hilos"], default="procesos"
+    )
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--compresion", default=None)
+    parser.add_argument("--prefetch", type=int, default=0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument(
+        "--url", help="URL SQLAlchemy de la base local (por defecto, SQLite temporal)."
+    )
+    parser.add_argument(
+        "--sin-carga",
+        action="store_true",
+        help="Reutiliza la tabla ya cargada en --url.",
+    )
+    parser.add_argument("--etapa", choices=ETAPAS, help=argparse.SUPPRESS)
+    parser.add_argument("--salida", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--json", type=Path, help="Guarda los resultados en este archivo JSON."
+    )
+    args = parser.parse_args()
+
+    if args.etapa is not None:
+        # Proceso hijo: ejecuta una etapa e informa sus mediciones por stdout.
+        print(json.dumps(ejecutar_etapa(args.etapa, args)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as directorio:
+        url = args.url or f"sqlite:///{Path(directorio) / 'fuente.db'}"
+        salida = Path(directorio) / f"salida.{args.formato}"
+
+        if not args.sin_carga:
+            segundos = cargar(url, args.filas, args.semilla)
+            print(f"Carga de {args.filas:,} filas en {url}: {segundos:.1f} s")
+
+        print(
+            f"chunk {args.chunk:,}, {args.trabajadores} trabajadores "
+            f"({args.modo_paralelo}), salida {args.formato}"
+            f"{f' ({args.compresion})' if args.compresion else ''}\n"
+        )
+        print(
+            f"{'etapa':<11}{'segundos':>10}{'marginal':>10}{'filas/s':>14}"
+            f"{'RSS inicial':>13}{'RSS pico':>10}{'RSS total':>11}"
+        )
+
+        resultados = []
+        anterior = 0.0
+        for etapa in ETAPAS:
+            comando = [
+                sys.executable,
+                __file__,
+                *sys.argv[1:],
+                "--etapa",
+                etapa,
+                "--salida",
+                str(salida),
+                "--url",
+                url,
+            ]
+            proceso = subprocess.run(
+                comando, capture_output=True, text=True, check=False
+            )
+            if proceso.returncode != 0:
+                sys.exit(f"La etapa {etapa} falló:\n{proceso.stderr}")
+
+            medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+            resultados.append(medicion)
+            print(
+                f"{etapa:<11}{medicion['segundos']:>10.2f}"
+                f"{medicion['segundos'] - anterior:>10.2f}"
+                f"{args.filas / medicion['segundos']:>14,.0f}"
+                f"{medicion['rss_inicial_mb']:>10.0f} MB"
+                f"{medicion['rss_pico_mb']:>7.0f} MB"
+                f"{medicion['rss_pico_total_mb']:>8.0f} MB"
+            )
+            anterior = medicion["segundos"]
+
+        if salida.exists():
+            print(
+                f"\n{resultados[-1]['filas_salida']:,} filas escritas, "
+                f"{salida.stat().st_size / 2**20:.1f} MB en disco."
+            )
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps({"parametros": vars(args), "etapas": resultados}, default=str)
+        )
+
+
+if __name__ == "__main__":
+    main()
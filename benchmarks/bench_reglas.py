@@ -0,0 +1,257 @@
+"""
+Mide el tiempo y la memoria de cada regla y del motor completo a varias escalas.
+
+Uso:
+    python benchmarks/bench_reglas.py --escalas 1e4 1e5 1e6
+    python benchmarks/bench_reglas.py --escalas 1e4 1e5 1e6 1e7 --guardar
+
+Para cada escala se generan datos sintéticos (`datos_sinteticos.generar`) y se mide:
+
+- por regla, `identificar` sobre todas las filas y `expandir` (parámetros y
+  `_desagregar`) sobre las filas que identifica;
+- el motor completo (`MotorReglas.iterar`), con la precedencia y el presupuesto
+  de memoria configurados.
+
+El tiempo es el mínimo de `--repeticiones` ejecuciones sin instrumentar; el pico de
+memoria se mide aparte, en una ejecución con tracemalloc (que cuenta también los
+arreglos de NumPy y pandas).
+
+Los resultados se comparan con la línea base JSON (`--linea-base`). Un caso cuyo
+tiempo o pico de memoria supera el de la línea base en más de la tolerancia, o
+cuyo número de filas de salida cambia, se reporta como regresión y el proceso
+termina con código 1. Con `--guardar` los resultados reemplazan la línea base.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from datos_sinteticos import generar
+from loguru import logger
+
+from desagregacion_dsg_upc.rules import REGLAS_POR_DEFECTO, MotorReglas
+
+LINEA_BASE = Path(__file__).parent / "lineas_base" / "reglas.json"
+
+
+def medir(funcion: Callable[[], int], repeticiones: int) -> dict[str, float | int]:
+    """
+    Tiempo mínimo y mediano de `funcion`, y su pico de memoria con tracemalloc.
+
+    Args:
+        funcion (Callable[[], int]): Caso a medir; devuelve las filas de salida.
+        repeticiones (int): Ejecuciones cronometradas.
+
+    Returns:
+        dict[str, float | int]: segundos (mínimo), mediana, pico_mb y filas_salida.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        filas = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "segundos": min(tiempos),
+        "mediana": float(np.median(tiempos)),
+        "pico_mb": pico / 2**20,
+        "filas_salida": filas,
+    }
+
+
+def casos(df: pd.DataFrame) -> Iterator[tuple[str, Callable[[], int]]]:
+    """Casos a medir sobre un DataFrame: cada regla por fase y el motor completo."""
+    for clase in REGLAS_POR_DEFECTO:
+        regla = clase()
+        yield (
+            f"{clase.__name__}.identificar",
+            lambda regla=regla: int(regla.identificar(df).sum()),
+        )
+
+        # Las filas de la regla se seleccionan fuera de la medición de `expandir`
+        # y se liberan al pasar a la siguiente regla.
+        filas_regla = df[regla.identificar(df).to_numpy(dtype=bool, na_value=False)]
+        yield (
+            f"{clase.__name__}.expandir",
+            lambda regla=regla, filas=filas_regla: len(regla.expandir(filas)),
+        )
+
+    motor = MotorReglas.desde_configuracion()
+    yield "MotorReglas.iterar", lambda: sum(len(parte) for parte in motor.iterar(df))
+
+
+def comparar(
+    actual: dict[str, dict[str, Any]],
+    base: dict[str, dict[str, Any]],
+    tolerancia: float,
+    tolerancia_memoria: float,
+    minimo_segundos: float = 0.002,
+    comparar_tiempos: bool = True,
+) -> list[str]:
+    """
+    Casos de `actual` que empeoran respecto a la línea base.
+
+    Las diferencias de tiempo menores que `minimo_segundos` no se reportan: en los
+    casos de pocos milisegundos son del orden del ruido de medición. Con
+    `comparar_tiempos` en False (línea base de otra máquina o versión) solo se
+    comparan las filas de salida y el pico de memoria.
+
+    Returns:
+        list[str]: Una descripción por regresión encontrada.
+    """
+    regresiones = []
+    for escala, resultados in actual.items():
+        for caso, medicion in resultados.items():
+            anterior = base.get(escala, {}).get(caso)
+            if anterior is None:
+                continue
+            if medicion["filas_salida"] != anterior["filas_salida"]:
+                regresiones.append(
+                    f"{escala} {caso}: {medicion['filas_salida']} filas de salida, "
+                    f"la línea base tiene {anterior['filas_salida']}"
+                )
+            if (
+                comparar_tiempos
+                and medicion["segundos"] > anterior["segundos"] * (1 + tolerancia)
+                and medicion["segundos"] - anterior["segundos"] > minimo_segundos
+            ):
+                regresiones.append(
+                    f"{escala} {caso}: {medicion['segundos']:.4f} s, "
+                    f"línea base {anterior['segundos']:.4f} s"
+                )
+            if medicion["pico_mb"] > anterior["pico_mb"] * (1 + tolerancia_memoria):
+                regresiones.append(
+                    f"{escala} {caso}: {medicion['pico_mb']:.1f} MB, "
+                    f"línea base {anterior['pico_mb']:.1f} MB"
+                )
+    return regresiones
+
+
+def entorno() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementacion": sys.implementation.name,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--escalas", type=float, nargs="+", default=[1e4, 1e5, 1e6])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--linea-base", type=Path, default=LINEA_BASE)
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=0.25,
+        help="Aumento de tiempo admitido antes de reportar una regresión (0.25 = 25 %%).",
+    )
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.10)
+    parser.add_argument(
+        "--minimo-ms",
+        type=float,
+        default=2.0,
+        help="Diferencia de tiempo mínima para reportar una regresión.",
+    )
+    parser.add_argument(
+        "--guardar", action="store_true", help="Reemplaza la línea base."
+    )
+    args = parser.parse_args()
+    # El motor registra en DEBUG la expansión de cada regla en cada ejecución.
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    base = None
+    if args.linea_base.exists():
+        base = json.loads(args.linea_base.read_text(encoding="utf-8"))
+        if base["entorno"] != entorno():
+            print(
+                "Aviso: la línea base se generó en otro entorno "
+                f"({base['entorno']}); solo se comparan filas de salida y memoria."
+            )
+
+    resultados: dict[str, dict[str, Any]] = {}
+    for escala in args.escalas:
+        filas = int(escala)
+        df = generar(filas, args.semilla)
+        print(f"\n{filas:,} filas")
+        resultados[str(filas)] = {}
+        for nombre, funcion in casos(df):
+            medicion = medir(funcion, args.repeticiones)
+            resultados[str(filas)][nombre] = medicion
+            anterior = (base or {}).get("resultados", {}).get(str(filas), {})
+            cambio = ""
+            if nombre in anterior:
+                cambio = (
+                    f"  {medicion['segundos'] / anterior[nombre]['segundos']:5.2f}x"
+                )
+            print(
+                f"  {nombre:<55} {medicion['segundos']:9.4f} s "
+                f"{filas / medicion['segundos']:14,.0f} filas/s "
+                f"{medicion['pico_mb']:9.1f} MB{cambio}"
+            )
+        del df
+
+    if args.guardar:
+        args.linea_base.parent.mkdir(parents=True, exist_ok=True)
+        if base is not None:
+            # Se conservan las escalas que esta ejecución no midió.
+            resultados = {**base["resultados"], **resultados}
+        contenido = {
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "semilla": args.semilla,
+            "entorno": entorno(),
+            "resultados": resultados,
+        }
+        args.linea_base.write_text(
+            json.dumps(contenido, indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"\nLínea base guardada en {args.linea_base}.")
+        return 0
+
+    if base is None:
+        print(f"\nSin línea base en {args.linea_base}; use --guardar para crearla.")
+        return 0
+
+    if base.get("semilla") != args.semilla:
+        print("Aviso: la línea base usa otra semilla; las filas de salida difieren.")
+    regresiones = comparar(
+        resultados,
+        base["resultados"],
+        args.tolerancia,
+        args.tolerancia_memoria,
+        args.minimo_ms / 1000,
+        comparar_tiempos=base["entorno"] == entorno(),
+    )
+    for regresion in regresiones:
+        print(f"REGRESIÓN {regresion}")
+    if not regresiones:
+        print("\nSin regresiones respecto a la línea base.")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Generador de datos sintéticos con la forma de una extracción DSG/UPC.
+
+Las distribuciones imitan las de la consulta real:
+
+- `DESCRIPCION_CUP`: unos cientos de descripciones distintas con frecuencias tipo
+  Zipf (pocas descripciones concentran la mayoría de las filas), con variantes de
+  mayúsculas, tildes y sufijos; una fracción pequeña es nula.
+- `CANTIDAD_PROCEDIMIENTO`: mayoritariamente 1, con una cola larga; las consultas
+  de psicología tienen más probabilidad de superar 15 sesiones.
+- Columnas de dinero: precio unitario log-normal por descripción, multiplicado
+  por la cantidad.
+- `FECHA_INICIO_TRATAMIENTO`: días uniformes en un año.
+- `CODIGO_OSI`: un código por descripción y algunos de los códigos de terapia.
+
+Los nombres de columna y los tipos se toman de la configuración (igual que
+`construir_esquema`), y la misma semilla produce siempre los mismos datos.
+"""
+
+from collections.abc import Iterator
+from functools import cache
+
+import numpy as np
+import pandas as pd
+
+from desagregacion_dsg_upc import construir_esquema, number_rows, settings
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+
+# (plantilla, peso relativo, precio unitario mediano). Las plantillas cubren
+# todas las reglas y procedimientos que ninguna regla identifica.
+PLANTILLAS = [
+    ("CONSULTA DE PRIMERA VEZ POR MEDICINA GENERAL", 30.0, 35_000),
+    ("CONSULTA DE CONTROL O DE SEGUIMIENTO POR MEDICINA GENERAL", 25.0, 30_000),
+    ("CONSULTA DE PRIMERA VEZ POR PSICOLOGIA", 6.0, 45_000),
+    ("CONSULTA DE CONTROL O DE SEGUIMIENTO POR PSICOLOGÍA", 8.0, 40_000),
+    ("CONSULTA DE PRIMERA VEZ POR ESPECIALISTA EN PEDIATRIA", 5.0, 60_000),
+    ("CONSULTA DE URGENCIAS POR MEDICINA ESPECIALIZADA", 4.0, 80_000),
+    ("TERAPIA FISICA INTEGRAL", 10.0, 25_000),
+    ("TERAPIA RESPIRATORIA INTEGRAL", 4.0, 25_000),
+    ("TERAPIA OCUPACIONAL INTEGRAL", 3.0, 28_000),
+    ("TERAPIA FONOAUDIOLOGICA INTEGRAL", 3.0, 28_000),
+    ("CURACION DE LESION EN PIEL O TEJIDO CELULAR SUBCUTANEO", 4.0, 20_000),
+    ("CURACIÓN DE HERIDA QUIRURGICA", 2.0, 22_000),
+    ("ATENCION (VISITA) DOMICILIARIA POR MEDICINA GENERAL", 3.0, 70_000),
+    ("ATENCION DOMICILIARIA POR ENFERMERIA", 3.0, 50_000),
+    ("HEMOGRAMA IV (HEMOGLOBINA HEMATOCRITO RECUENTO DE ERITROCITOS)", 12.0, 15_000),
+    ("GLUCOSA EN SUERO U OTRO FLUIDO DIFERENTE A ORINA", 10.0, 8_000),
+    ("RADIOGRAFIA DE TORAX (P.A. O A.P. Y LATERAL)", 5.0, 40_000),
+    ("ECOGRAFIA DE ABDOMEN TOTAL", 3.0, 90_000),
+    (
+        "INTERNACION EN SERVICIO DE COMPLEJIDAD MEDIANA HABITACION BIPERSONAL",
+        2.0,
+        250_000,
+    ),
+    ("SUMINISTRO DE MEDICAMENTOS", 8.0, 12_000),
+]
+
+SUFIJOS = ["", " SOD", " NCOC", " (INCLUYE INSUMOS)", " EN IPS", " - CONTRATO"]
+
+FECHA_INICIAL = pd.Timestamp("2025-01-01")
+FRACCION_NULOS = 0.001
+
+
+@cache
+def catalogo() -> pd.DataFrame:
+    """
+    Descripciones distintas con su probabilidad, precio mediano y código OSI.
+
+    Cada plantilla genera variantes (sufijos, minúsculas, mayúsculas iniciales) para
+    que el número de descripciones distintas sea parecido al de la consulta real.
+    Las probabilidades siguen una ley de Zipf dentro de cada plantilla. El catálogo
+    no depende de la semilla de los datos: los códigos OSI son los mismos en todos
+    los chunks.
+    """
+    rng = np.random.default_rng(0)
+    filas = []
+    for plantilla, peso, precio in PLANTILLAS:
+        variantes = [plantilla + sufijo for sufijo in SUFIJOS]
+        variantes += [v.lower() for v in variantes[:2]]
+        variantes += [v.title() for v in variantes[:2]]
+        zipf = 1.0 / np.arange(1, len(variantes) + 1) ** 1.2
+        for variante, frecuencia in zip(variantes, zipf / zipf.sum()):
+            filas.append((variante, peso * frecuencia, precio))
+
+    df = pd.DataFrame(filas, columns=["descripcion", "probabilidad", "precio"])
+    df["probabilidad"] /= df["probabilidad"].sum()
+    df["codigo"] = rng.choice(np.arange(100_000, 2_000_000), len(df), replace=False)
+    # Algunas terapias se facturan con los códigos OSI de terapia.
+    terapia = df.index[df["descripcion"].str.upper().str.startswith("TERAPIA")]
+    codigos_terapia = settings.processing.codigos_osi_terapia
+    df.loc[terapia[: len(codigos_terapia)], "codigo"] = codigos_terapia
+    return df
+
+
+def generar(
+    filas: int, semilla: int = 0, processing: ProcessingConfig | None = None
+) -> pd.DataFrame:
+    """
+    Genera un DataFrame sintético tipado como la extracción.
+
+    Args:
+        filas (int): Número de filas.
+        semilla (int): Semilla del generador; la misma semilla da los mismos datos.
+        processing (ProcessingConfig | None): Configuración de la que se toman los
+            nombres de columna y los tipos. Por defecto, `settings.processing`.
+
+    Returns:
+        pd.DataFrame: Datos con las columnas de las reglas, tipados con
+        `construir_esquema`.
+    """
+    processing = processing or settings.processing
+    rng = np.random.default_rng(semilla)
+    procedimientos = catalogo()
+
+    indice = rng.choice(len(procedimientos), filas, p=procedimientos["probabilidad"])
+    descripciones = procedimientos["descripcion"].to_numpy(dtype=object)[indice]
+    descripciones[rng.random(filas) < FRACCION_NULOS] = None
+
+    # Cantidad: 1 en la mayoría de filas y una cola geométrica; las consultas de
+    # psicología suelen facturar paquetes de sesiones.
+    psicologia = (
+        procedimientos["descripcion"]
+        .str.upper()
+        .str.contains("PSICOLOG")
+        .to_numpy()[indice]
+    )
+    cantidad = np.where(
+        rng.random(filas) < 0.7, 1, np.minimum(rng.geometric(0.15, filas), 90)
+    )
+    cantidad = np.where(
+        psicologia & (rng.random(filas) < 0.3), rng.integers(10, 40, filas), cantidad
+    )
+
+    precio = procedimientos["precio"].to_numpy()[indice] * rng.lognormal(0, 0.25, filas)
+    valor = np.round(precio * cantidad, 0)
+
+    df = pd.DataFrame(
+        {
+            processing.column_descripcion_cups: descripciones,
+            processing.column_codigo_osi: procedimientos["codigo"].to_numpy()[indice],
+            processing.column_desagregacion: cantidad,
+            processing.column_fecha: FECHA_INICIAL
+            + pd.to_timedelta(rng.integers(0, 365, filas), unit="D"),
+        }
+    )
+    for columna in dict.fromkeys(
+        [*processing.columns_dinero, processing.column_valor_liquidado]
+    ):
+        # El valor liquidado y el neto difieren por descuentos de hasta 10 %.
+        df[columna] = np.round(valor * rng.uniform(0.9, 1.0, filas), 0)
+
+    return df.astype(construir_esquema(processing))
+
+
+def generar_chunks(
+    filas: int,
+    chunk: int,
+    semilla: int = 0,
+    processing: ProcessingConfig | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Genera los datos por chunks, numerados con `id_fila_origen` como la extracción.
+
+    Cada chunk usa una semilla derivada de `semilla` y de su posición, de modo que
+    la memoria queda acotada por `chunk` incluso para 1e7 filas.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn((filas + chunk - 1) // chunk)
+    tamanos = (min(chunk, filas - inicio) for inicio in range(0, filas, chunk))
+    yield from number_rows(
+        generar(tamano, int(s.generate_state(1)[0]), processing)
+        for tamano, s in zip(tamanos, semillas)
+    )
@@ -1,44 +1,153 @@
-import pandas as pd
+import argparse
+from contextlib import nullcontext
+from pathlib import Path
+
 from loguru import logger
 
-from config.settings import settings
 from desagregacion_dsg_upc import (
     DatabaseError,
-    fetch_data_in_chunks,
-    get_db_connection,
+    EstadoIncremental,
+    ExportadorPrometheus,
+    Instrumentacion,
+    Perfilador,
+    Reanudacion,
+    SeguimientoMarca,
+    columna_marca,
+    dispose_engine,
+    ejecutar_pipeline,
+    extraer_chunks,
+    obtener_catalogo,
+    settings,
     setup_logging,
 )
+from desagregacion_dsg_upc.rules import MotorReglas
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Argumentos de línea de comandos; la configuración se toma de config.yaml."""
+    parser = argparse.ArgumentParser(
+        description="Desagregación de procedimientos DSG/UPC."
+    )
+    perfilado = parser.add_argument_group(
+        "perfilado",
+        "Perfila cada etapa y regla de los chunks seleccionados (en serie) y "
+        "escribe un archivo por chunk, etapa y regla.",
+    )
+    perfilado.add_argument(
+        "--profile",
+        nargs="?",
+        const="cprofile",
+        choices=["cprofile", "muestreo"],
+        help="cprofile escribe .pstats; muestreo, pilas colapsadas (.collapsed) "
+        "para flamegraphs. Por defecto, cprofile.",
+    )
+    perfilado.add_argument("--profile-dir", type=Path, default=Path("perfiles"))
+    perfilado.add_argument(
+        "--profile-chunks",
+        type=int,
+        nargs="+",
+        metavar="N",
+        help="Números de chunk (desde 1) a perfilar.",
+    )
+    perfilado.add_argument(
+        "--profile-fraccion",
+        type=float,
+        metavar="F",
+        help="Fracción de chunks, elegidos al azar, a perfilar (ej. 0.05).",
+    )
+    perfilado.add_argument(
+        "--profile-intervalo-ms",
+        type=float,
+        default=5.0,
+        help="Intervalo entre muestras en modo muestreo.",
+    )
+    perfilado.add_argument("--profile-semilla", type=int)
 
+    args = parser.parse_args(argv)
+    if args.profile_fraccion is not None and not 0 < args.profile_fraccion <= 1:
+        parser.error("--profile-fraccion debe estar en (0, 1].")
+    return args
 
-def main():
+
+def main(argv: list[str] | None = None):
     """
     Punto de entrada principal de la aplicación.
     """
+    args = parse_args(argv)
     setup_logging()
 
     logger.info("Iniciando la aplicación.")
-    dfs_chunk = []
 
     try:
-        # Probar la conexión a la base de datos
-        with get_db_connection() as connection:
-            logger.success("¡Conexión a la base de datos exitosa!")
-            # Puedes ejecutar una consulta simple aquí si lo deseas
-            # result = connection.execute(text("SELECT 1 FROM DUAL"))
-            # logger.info(f"Resultado de la consulta de prueba: {result.scalar_one()}")
-            for chunk in fetch_data_in_chunks(
-                connection, settings.processing.query_input
-            ):
-                dfs_chunk.append(chunk)
-        df_desagregacion_db = pd.concat(dfs_chunk)
-
-        # Procesar el DataFrame completo aquí
-        logger.info(f"Procesando DataFrame de tamaño {len(df_desagregacion_db)}")
+        # Cada chunk se desagrega y se escribe antes de leer el siguiente,
+        # por lo que la memoria queda acotada por el tamaño del chunk.
+        processing = settings.processing
+        # Sin archivo_prometheus no se exportan métricas.
+        exportador = ExportadorPrometheus.desde_configuracion(processing)
+        with exportador or nullcontext():
+            catalogo = obtener_catalogo(processing)
+            motor = MotorReglas.desde_configuracion(catalogo=catalogo)
+
+            marca = seguimiento = reanudacion = None
+            if processing.modo_incremental:
+                estado = EstadoIncremental(processing.archivo_estado)
+                marca = estado.leer(processing.output_file)
+                seguimiento = SeguimientoMarca(columna_marca(processing))
+
+            if processing.modo_reanudable:
+                # Continúa desde el último punto de control, si la anterior falló.
+                reanudacion = Reanudacion.desde_configuracion(
+                    processing, marca, seguimiento
+                )
+
+            perfilador = None
+            if args.profile is not None:
+                perfilador = Perfilador(
+                    args.profile_dir,
+                    args.profile,
+                    set(args.profile_chunks) if args.profile_chunks else None,
+                    args.profile_fraccion,
+                    args.profile_intervalo_ms / 1000,
+                    args.profile_semilla,
+                )
+            instrumentacion = Instrumentacion.desde_configuracion(
+                processing, perfilador
+            )
+
+            chunks = extraer_chunks(processing, marca, reanudacion)
+            if processing.modo_incremental:
+                chunks = seguimiento.observar(chunks)
+
+            ejecutar_pipeline(
+                chunks,
+                processing.output_file,
+                motor=motor,
+                output_format=processing.output_format,
+                output_compression=processing.output_compression,
+                trabajadores=processing.trabajadores,
+                modo_paralelo=processing.modo_paralelo,
+                # Sin marca previa la salida se genera completa.
+                anexar=marca is not None,
+                reanudacion=reanudacion,
+                instrumentacion=instrumentacion,
+            )
+
+            # La marca avanza solo después de publicar la salida.
+            if processing.modo_incremental and seguimiento.maximo is not None:
+                estado.guardar(
+                    processing.output_file, seguimiento.columna, seguimiento.maximo
+                )
+
+            if catalogo is not None and catalogo.nuevos:
+                # Pares vistos durante la ejecución que no estaban en el catálogo.
+                catalogo.guardar(processing.ruta_catalogo)
 
     except DatabaseError as e:
         logger.error(f"Error de base de datos: {e}")
     except Exception as e:
         logger.exception(f"Ocurrió un error inesperado en la aplicación: {e}")
+    finally:
+        dispose_engine()
 
     logger.info("La aplicación ha finalizado.")
 
@@ -1,17 +1,91 @@
 from .config import settings
 from .exceptions import ConfigError, DatabaseError, ProjectError, SourceReadError
-from .rules import ReglaConsultaCantidadMenor
 from .utils import setup_logging
-from .utils_db import fetch_data_in_chunks, get_db_connection
+
+# isort: split
+# Los módulos siguientes importan `settings` y las excepciones desde el paquete.
+from .cache_extraccion import CacheExtraccion
+from .catalogo import CatalogoProcedimientos, obtener_catalogo
+from .esquema import (
+    COLUMNA_ID_ORIGEN,
+    aplicar_esquema,
+    columnas_requeridas,
+    construir_esquema,
+    normalizar_columnas,
+)
+from .extraccion import extraer_chunks
+from .incremental import EstadoIncremental, SeguimientoMarca, columna_marca
+from .instrumentacion import Instrumentacion, Medidor
+from .metricas import ExportadorPrometheus, RegistroMetricas
+from .paralelo import gil_activo, procesar_en_hilos, procesar_en_procesos
+from .perfilado import Perfilador
+from .pipeline import ejecutar_pipeline, iterar_chunk, procesar_chunk
+from .reanudacion import PuntoControl, Reanudacion
+from .rules import REGLAS_POR_DEFECTO, ReglaConsultaCantidadMenor
+from .salida import EscritorCSV, EscritorParquet, EscritorSalida, crear_escritor
+from .utils_db import (
+    build_keyset_query,
+    build_watermark_query,
+    dispose_engine,
+    fetch_arrow_batches,
+    fetch_data_in_chunks,
+    fetch_data_partitioned,
+    fetch_keyset_pages,
+    get_db_connection,
+    get_engine,
+    number_rows,
+    project_query,
+    validate_columns,
+)
 
 __all__ = [
+    "COLUMNA_ID_ORIGEN",
+    "REGLAS_POR_DEFECTO",
+    "CacheExtraccion",
+    "CatalogoProcedimientos",
     "ConfigError",
     "DatabaseError",
+    "EscritorCSV",
+    "EscritorParquet",
+    "EscritorSalida",
+    "EstadoIncremental",
+    "ExportadorPrometheus",
+    "Instrumentacion",
+    "Medidor",
+    "Perfilador",
     "ProjectError",
+    "PuntoControl",
+    "Reanudacion",
+    "RegistroMetricas",
+    "ReglaConsultaCantidadMenor",
+    "SeguimientoMarca",
     "SourceReadError",
-    "setup_logging",
+    "aplicar_esquema",
+    "build_keyset_query",
+    "build_watermark_query",
+    "columna_marca",
+    "columnas_requeridas",
+    "construir_esquema",
+    "crear_escritor",
+    "dispose_engine",
+    "ejecutar_pipeline",
+    "extraer_chunks",
+    "fetch_arrow_batches",
     "fetch_data_in_chunks",
+    "fetch_data_partitioned",
+    "fetch_keyset_pages",
     "get_db_connection",
-    "ReglaConsultaCantidadMenor",
+    "get_engine",
+    "gil_activo",
+    "iterar_chunk",
+    "normalizar_columnas",
+    "number_rows",
+    "obtener_catalogo",
+    "procesar_chunk",
+    "procesar_en_hilos",
+    "procesar_en_procesos",
+    "project_query",
     "settings",
+    "setup_logging",
+    "validate_columns",
 ]
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import ConfigError
+from desagregacion_dsg_upc.utils import reemplazo_atomico
+
+_MANIFIESTO = "manifiesto.json"
+
+
+class CacheExtraccion:
+    """
+    Caché local en Parquet de los chunks extraídos de la base de datos.
+
+    Cada extracción se guarda en un directorio propio bajo una clave derivada de la
+    consulta normalizada, los parámetros y el esquema, con un archivo Parquet por
+    chunk. El manifiesto se escribe al final, por lo que una extracción interrumpida
+    nunca se lee como completa. Las entradas vencen después de `ttl_horas` y, si el
+    total supera `max_mb`, se eliminan las de acceso más antiguo (LRU).
+
+    Requiere pyarrow (extra 'arrow').
+
+    Args:
+        directorio (str | Path): Directorio raíz de la caché.
+        ttl_horas (float | None): Vigencia de cada entrada. None, sin vencimiento.
+        max_mb (float | None): Tamaño máximo de la caché. None, sin límite.
+    """
+
+    def __init__(
+        self,
+        directorio: str | Path,
+        ttl_horas: float | None = None,
+        max_mb: float | None = None,
+    ):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ConfigError(
+                "La caché de extracción requiere pyarrow: instale el extra 'arrow'."
+            ) from e
+
+        self.directorio = Path(directorio)
+        self.ttl_horas = ttl_horas
+        self.max_mb = max_mb
+
+    @staticmethod
+    def clave(
+        query: str,
+        params: dict[str, Any] | None = None,
+        esquema: dict[str, str] | None = None,
+    ) -> str:
+        """
+        Clave de la extracción: sha256 de la consulta normalizada (espacios
+        colapsados, sin ";" final), los parámetros y el esquema.
+        """
+        normalizada = re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+        contenido = json.dumps(
+            {"query": normalizada, "params": params, "esquema": esquema},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def leer(self, clave: str) -> Iterator[pd.DataFrame] | None:
+        """
+        Chunks guardados para la clave, o None si no hay una entrada vigente.
+        """
+        manifiesto = self._manifiesto(clave)
+        if manifiesto is None:
+            return None
+
+        if self._vencida(manifiesto):
+            logger.info(f"Entrada de caché {clave[:12]} vencida; se descarta.")
+            self.invalidar(clave)
+            return None
+
+        # La fecha de modificación del manifiesto marca el último acceso (LRU).
+        os.utime(self.directorio / clave / _MANIFIESTO)
+        logger.info(
+            f"Extracción leída de la caché {clave[:12]}: "
+            f"{manifiesto['filas']} filas en {manifiesto['chunks']} chunks."
+        )
+        return self._leer_chunks(clave, manifiesto["chunks"])
+
+    def guardar(
+        self, clave: str, chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Entrega los chunks sin modificarlos mientras los guarda en la caché.
+
+        La entrada solo queda disponible si los chunks se consumen por completo; si
+        la extracción o el consumidor fallan, los archivos parciales se eliminan.
+        """
+        destino = self.directorio / clave
+        shutil.rmtree(destino, ignore_errors=True)
+        destino.mkdir(parents=True)
+
+        numero = filas = 0
+        completo = False
+        try:
+            for numero, chunk in enumerate(chunks, start=1):
+                chunk.to_parquet(destino / f"chunk-{numero:06d}.parquet", index=False)
+                filas += len(chunk)
+                yield chunk
+            completo = True
+        finally:
+            if not completo:
+                shutil.rmtree(destino, ignore_errors=True)
+
+        tamano = sum(ruta.stat().st_size for ruta in destino.iterdir())
+        manifiesto = {
+            "creado": time.time(),
+            "chunks": numero,
+            "filas": filas,
+            "bytes": tamano,
+        }
+        with reemplazo_atomico(destino / _MANIFIESTO) as temporal:
+            temporal.write_text(json.dumps(manifiesto))
+        logger.info(
+            f"Extracción guardada en la caché {clave[:12]}: {filas} filas, "
+            f"{tamano / 2**20:.1f} MB."
+        )
+        self._podar()
+
+    def invalidar(self, clave: str | None = None) -> None:
+        """Elimina la entrada de la clave, o toda la caché si no se indica."""
+        if clave is None:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            logger.info(f"Caché de extracción {self.directorio} eliminada.")
+        else:
+            shutil.rmtree(self.directorio / clave, ignore_errors=True)
+
+    def _leer_chunks(self, clave: str, chunks: int) -> Iterator[pd.DataFrame]:
+        for numero in range(1, chunks + 1):
+            yield pd.read_parquet(
+                self.directorio / clave / f"chunk-{numero:06d}.parquet"
+            )
+
+    def _manifiesto(self, clave: str) -> dict[str, Any] | None:
+        try:
+            return json.loads((self.directorio / clave / _MANIFIESTO).read_text())
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            # Manifiesto dañado: la entrada se trata como ausente y se reescribe.
+            return None
+
+    def _vencida(self, manifiesto: dict[str, Any]) -> bool:
+        if self.ttl_horas is None:
+            return False
+        return time.time() - manifiesto["creado"] > self.ttl_horas * 3600
+
+    def _podar(self) -> None:
+        """Elimina entradas vencidas y, por LRU, las que exceden `max_mb`."""
+        entradas = []
+        for directorio in self.directorio.iterdir():
+            manifiesto = self._manifiesto(directorio.name)
+            if manifiesto is None:
+                continue
+            if self._vencida(manifiesto):
+                self.invalidar(directorio.name)
+                continue
+            acceso = (directorio / _MANIFIESTO).stat().st_mtime
+            entradas.append((acceso, manifiesto["bytes"], directorio.name))
+
+        if self.max_mb is None:
+            return
+
+        total = sum(tamano for _, tamano, _ in entradas)
+        limite = self.max_mb * 2**20
+        # La entrada recién guardada tiene el acceso más reciente y se elimina
+        # solo si por sí sola supera el límite.
+        for _, tamano, clave in sorted(entradas):
+            if total <= limite:
+                break
+            self.invalidar(clave)
+            total -= tamano
+            logger.info(f"Entrada de caché {clave[:12]} eliminada por tamaño (LRU).")
@@ -0,0 +1,247 @@
+import threading
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from desagregacion_dsg_upc import ConfigError, DatabaseError
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.rules.coincidencias import (
+    COLUMNA_MASCARA_PALABRAS,
+    comparador,
+)
+from desagregacion_dsg_upc.utils import reemplazo_atomico
+from desagregacion_dsg_upc.utils_db import get_db_connection
+
+
+class CatalogoProcedimientos:
+    """
+    Dimensión de procedimientos: cada par (código OSI, descripción CUPS) con sus
+    banderas de reglas.
+
+    Que una fila sea consulta, psicología, terapia, etc. depende del procedimiento y
+    no de la reclamación, por lo que las banderas (la máscara de palabras clave de
+    `comparador` y el bit de los códigos OSI de terapia) se calculan una vez por par
+    distinto. Clasificar un chunk se reduce a buscar la posición de cada fila en el
+    catálogo y tomar sus banderas. Los pares que aún no están en el catálogo se
+    agregan al vuelo.
+
+    En disco solo se guardan los pares; las banderas se recalculan al cargar, de
+    modo que un cambio en las palabras clave de las reglas no deja el catálogo
+    desactualizado. Puede compartirse entre hilos: los pares nuevos se agregan bajo
+    un lock.
+
+    Args:
+        columna_codigo (str): Columna con el código OSI.
+        columna_descripcion (str): Columna con la descripción CUPS.
+        pares (pd.DataFrame | None): Pares iniciales con esas dos columnas.
+    """
+
+    def __init__(
+        self,
+        columna_codigo: str,
+        columna_descripcion: str,
+        pares: pd.DataFrame | None = None,
+    ):
+        self.columna_codigo = columna_codigo
+        self.columna_descripcion = columna_descripcion
+        self.pares = pd.DataFrame(
+            {
+                columna_codigo: pd.Series(dtype="Int64"),
+                columna_descripcion: pd.Series(dtype=object),
+            }
+        )
+        self.banderas = np.empty(0, dtype=np.uint64)
+        self.nuevos = 0
+        self._palabras = list(comparador.palabras)
+        self._indice = pd.MultiIndex.from_frame(self.pares)
+        self._lock = threading.RLock()
+
+        if pares is not None:
+            self.agregar(pares)
+            self.nuevos = 0
+
+    @classmethod
+    def desde_configuracion(
+        cls, processing: ProcessingConfig, pares: pd.DataFrame | None = None
+    ) -> Self:
+        """Crea el catálogo con las columnas de código y descripción configuradas."""
+        return cls(
+            processing.column_codigo_osi, processing.column_descripcion_cups, pares
+        )
+
+    @classmethod
+    def desde_base_datos(cls, conn: Connection, processing: ProcessingConfig) -> Self:
+        """
+        Construye el catálogo con los pares distintos de `processing.query_catalogo`.
+
+        Esa consulta debe ser barata (ej. sobre la tabla de procedimientos): no se
+        usa `processing.query_input`, cuyo `SELECT DISTINCT` recorrería de nuevo
+        toda la extracción.
+
+        Raises:
+            ConfigError: Si no hay `query_catalogo` configurada.
+            DatabaseError: Si la consulta de pares distintos falla.
+        """
+        if processing.query_catalogo is None:
+            raise ConfigError("No hay query_catalogo para construir el catálogo.")
+
+        codigo = processing.column_codigo_osi
+        descripcion = processing.column_descripcion_cups
+        consulta = processing.query_catalogo.strip().rstrip(";")
+        query = f"SELECT DISTINCT q.{codigo}, q.{descripcion} FROM ({consulta}) q"
+
+        try:
+            resultado = conn.execute(text(query))
+            pares = pd.DataFrame(resultado.fetchall(), columns=[codigo, descripcion])
+        except Exception as e:
+            raise DatabaseError(
+                f"No se pudo construir el catálogo de procedimientos: {e}"
+            ) from e
+
+        catalogo = cls(codigo, descripcion, pares)
+        logger.info(f"Catálogo de procedimientos construido con {len(catalogo)} pares.")
+        return catalogo
+
+    @classmethod
+    def cargar(cls, ruta: str | Path, processing: ProcessingConfig) -> Self:
+        """
+        Carga los pares guardados con `guardar` y recalcula sus banderas.
+
+        Raises:
+            ConfigError: Si el archivo no tiene las columnas configuradas.
+        """
+        codigo = processing.column_codigo_osi
+        descripcion = processing.column_descripcion_cups
+        pares = pd.read_csv(ruta, dtype={codigo: "Int64", descripcion: object})
+
+        faltantes = [c for c in (codigo, descripcion) if c not in pares.columns]
+        if faltantes:
+            raise ConfigError(f"El catálogo {ruta} no tiene las columnas {faltantes}.")
+
+        catalogo = cls(codigo, descripcion, pares[[codigo, descripcion]])
+        logger.info(
+            f"Catálogo de procedimientos cargado de {ruta}: {len(catalogo)} pares."
+        )
+        return catalogo
+
+    def guardar(self, ruta: str | Path) -> None:
+        """Guarda los pares en CSV, reemplazando el archivo de forma atómica."""
+        with reemplazo_atomico(ruta) as temporal:
+            self.pares.to_csv(temporal, index=False)
+        self.nuevos = 0
+
+    def agregar(self, pares: pd.DataFrame) -> int:
+        """
+        Agrega al catálogo los pares que aún no contiene.
+
+        Args:
+            pares (pd.DataFrame): Filas con las columnas de código y descripción.
+
+        Returns:
+            int: Número de pares nuevos.
+        """
+        columnas = [self.columna_codigo, self.columna_descripcion]
+        pares = (
+            pares[columnas]
+            .astype({self.columna_codigo: "Int64", self.columna_descripcion: object})
+            .drop_duplicates()
+        )
+
+        with self._lock:
+            pares = pares[
+                self._indice.get_indexer(pd.MultiIndex.from_frame(pares)) == -1
+            ]
+            if pares.empty:
+                return 0
+
+            self.pares = pd.concat([self.pares, pares], ignore_index=True)
+            self.banderas = np.concatenate([self.banderas, self._banderas(pares)])
+            self._indice = pd.MultiIndex.from_frame(self.pares)
+            self.nuevos += len(pares)
+            return len(pares)
+
+    def clasificar(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Banderas de cada fila del chunk, tomadas del catálogo por su par
+        (código, descripción).
+
+        Args:
+            df (pd.DataFrame): Chunk con las columnas de código y descripción.
+
+        Returns:
+            pd.Series: Columna `mascara_palabras`, lista para las reglas.
+        """
+        with self._lock:
+            if self._palabras != comparador.palabras:
+                # Se registraron palabras clave después de calcular las banderas.
+                self.banderas = self._banderas(self.pares)
+                self._palabras = list(comparador.palabras)
+            indice, banderas = self._indice, self.banderas
+
+        claves = pd.MultiIndex.from_arrays(
+            [df[self.columna_codigo], df[self.columna_descripcion]]
+        )
+        posiciones = indice.get_indexer(claves)
+
+        faltan = posiciones == -1
+        if faltan.any():
+            with self._lock:
+                nuevos = self.agregar(df[faltan])
+                indice, banderas = self._indice, self.banderas
+            logger.debug(f"Catálogo de procedimientos: {nuevos} pares nuevos.")
+            posiciones = indice.get_indexer(claves)
+
+        return pd.Series(
+            banderas[posiciones], index=df.index, name=COLUMNA_MASCARA_PALABRAS
+        )
+
+    def _banderas(self, pares: pd.DataFrame) -> np.ndarray:
+        palabras = comparador.bits_de(pares[self.columna_descripcion])
+        return palabras | comparador.bits_codigo(pares[self.columna_codigo])
+
+    def __getstate__(self) -> dict:
+        # El lock no se puede serializar (ej. al enviar el motor a otro proceso).
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado: dict) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.pares)
+
+
+def obtener_catalogo(processing: ProcessingConfig) -> CatalogoProcedimientos | None:
+    """
+    Devuelve el catálogo de procedimientos configurado en `processing.ruta_catalogo`.
+
+    Si el archivo existe se carga. Si no existe o `processing.refrescar_catalogo`
+    está activo, se reconstruye con los pares distintos de
+    `processing.query_catalogo` y se guarda; sin esa consulta se empieza vacío y
+    los pares se agregan a medida que llegan los chunks.
+
+    Returns:
+        CatalogoProcedimientos | None: El catálogo, o None si no hay ruta configurada.
+    """
+    if processing.ruta_catalogo is None:
+        return None
+
+    ruta = Path(processing.ruta_catalogo)
+    if ruta.exists() and not processing.refrescar_catalogo:
+        return CatalogoProcedimientos.cargar(ruta, processing)
+
+    if processing.query_catalogo is None:
+        logger.info("Catálogo de procedimientos vacío: se completa con los chunks.")
+        return CatalogoProcedimientos.desde_configuracion(processing)
+
+    with get_db_connection() as connection:
+        catalogo = CatalogoProcedimientos.desde_base_datos(connection, processing)
+    catalogo.guardar(ruta)
+    return catalogo
@@ -0,0 +1,99 @@
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+_FIN = object()
+
+
+class _ErrorProductor:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def intercalar_productores[T](
+    productores: list[Callable[[], Iterable[T]]], profundidad: int = 2
+) -> Iterator[T]:
+    """
+    Ejecuta cada productor en su propio hilo y entrega sus elementos a un único consumidor.
+
+    Los elementos se entregan en el orden en que llegan a una cola acotada, por lo que
+    los productores se bloquean cuando el consumidor va más lento. Si un productor
+    falla, la excepción se relanza en el consumidor; si el consumidor se detiene,
+    los productores terminan en su siguiente elemento.
+
+    Args:
+        productores (list[Callable[[], Iterable[T]]]): Funciones que devuelven un iterable.
+        profundidad (int): Máximo de elementos en espera en la cola.
+
+    Yields:
+        T: Elementos de todos los productores.
+    """
+    cola: queue.Queue = queue.Queue(maxsize=max(profundidad, 1))
+    detener = threading.Event()
+
+    def _encolar(elemento) -> bool:
+        while not detener.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _ejecutar(productor: Callable[[], Iterable[T]]) -> None:
+        elementos = None
+        try:
+            elementos = productor()
+            for elemento in elementos:
+                if not _encolar(elemento):
+                    return
+        except BaseException as e:  # noqa: BLE001 - se relanza en el consumidor.
+            _encolar(_ErrorProductor(e))
+        finally:
+            # Si el consumidor se detuvo, se cierra el generador en este mismo hilo
+            # para liberar sus recursos (ej. devolver la conexión al pool).
+            cerrar = getattr(elementos, "close", None)
+            if cerrar is not None:
+                cerrar()
+            _encolar(_FIN)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(len(productores), 1), thread_name_prefix="productor"
+    )
+    try:
+        for productor in productores:
+            executor.submit(_ejecutar, productor)
+
+        activos = len(productores)
+        while activos:
+            elemento = cola.get()
+            if elemento is _FIN:
+                activos -= 1
+            elif isinstance(elemento, _ErrorProductor):
+                raise elemento.error
+            else:
+                yield elemento
+    finally:
+        detener.set()
+        executor.shutdown(wait=True)
+
+
+def precargar[T](
+    productor: Callable[[], Iterable[T]], profundidad: int = 2
+) -> Iterator[T]:
+    """
+    Lee los elementos de un productor por adelantado en un hilo de fondo.
+
+    Mientras el consumidor procesa un elemento, el productor ya está obteniendo los
+    siguientes, hasta `profundidad` elementos en espera. Así el tiempo total tiende
+    a max(producción, consumo) en lugar de su suma.
+
+    Args:
+        productor (Callable[[], Iterable[T]]): Función que devuelve el iterable.
+        profundidad (int): Máximo de elementos leídos por adelantado.
+
+    Yields:
+        T: Elementos del productor, en su orden original.
+    """
+    yield from intercalar_productores([productor], profundidad)
@@ -1,4 +1,4 @@
-from typing import Any, Tuple, Type
+from typing import Any, Literal
 
 import yaml
 from pydantic import BaseModel
@@ -10,7 +10,7 @@ from pydantic_settings import (
 
 
 class YamlSettingsSource(PydanticBaseSettingsSource):
-    def get_field_value(self, field: Any, field_name: str) -> Tuple[Any, str, bool]:
+    def get_field_value(self, field: Any, field_name: str) -> tuple[Any, str, bool]:
         return None, field_name, False
 
     def __call__(self) -> dict[str, Any]:
@@ -24,12 +24,50 @@ class YamlSettingsSource(PydanticBaseSettingsSource):
 class ProcessingConfig(BaseModel):
     query_input: str
     output_file: str
+    output_format: Literal["csv", "parquet"] | None = None
+    output_compression: str | None = None
     columns_dinero: list[str]
     column_fecha: str
     column_desagregacion: str
     column_descripcion_cups: str
     column_valor_liquidado: str
     column_codigo_osi: str
+    columns_passthrough: list[str] | None = None
+    chunk_size: int = 10000
+    precedencia_reglas: list[str] | None = None
+    memoria_expansion_mb: int = 512
+    max_cache_descripciones: int = 100_000
+    codigos_osi_terapia: list[int] = [999301, 1003524, 991800]
+    ruta_catalogo: str | None = None
+    query_catalogo: str | None = None
+    refrescar_catalogo: bool = False
+    trabajadores: int = 1
+    modo_paralelo: Literal["procesos", "hilos"] = "procesos"
+    extraccion_tipada: bool = True
+    dtype_dinero: str = "float64"
+    dtype_descripcion: str = "category"
+    modo_extraccion: Literal["pandas", "arrow"] = "pandas"
+    particiones: int = 1
+    estrategia_particion: Literal["hash", "fecha"] = "hash"
+    columna_particion: str | None = None
+    profundidad_prefetch: int = 0
+    cache_extraccion_dir: str | None = None
+    cache_ttl_horas: float | None = 24.0
+    cache_max_mb: float | None = 10240.0
+    invalidar_cache: bool = False
+    modo_incremental: bool = False
+    columna_marca: str | None = None
+    archivo_estado: str = "estado/incremental.json"
+    modo_reanudable: bool = False
+    columna_paginacion: str | None = None
+    archivo_checkpoint: str = "estado/checkpoint.json"
+    reintentos_extraccion: int = 3
+    espera_reintento_s: float = 1.0
+    instrumentacion: bool = False
+    instrumentacion_memoria: bool = False
+    archivo_metricas: str | None = None
+    archivo_prometheus: str | None = None
+    intervalo_prometheus_s: float = 15.0
 
 
 class Settings(BaseSettings):
@@ -41,6 +79,13 @@ class Settings(BaseSettings):
     db_port: int
     db_service_name: str
 
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_arraysize: int = 5000
+    db_prefetchrows: int = 5000
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -50,12 +95,12 @@ class Settings(BaseSettings):
     @classmethod
     def settings_customise_sources(
         cls,
-        settings_cls: Type[BaseSettings],
+        settings_cls: type[BaseSettings],
         init_settings: PydanticBaseSettingsSource,
         env_settings: PydanticBaseSettingsSource,
         dotenv_settings: PydanticBaseSettingsSource,
         file_secret_settings: PydanticBaseSettingsSource,
-    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+    ) -> tuple[PydanticBaseSettingsSource, ...]:
         return (
             init_settings,
             env_settings,
@@ -0,0 +1,104 @@
+from collections.abc import Iterable
+
+import pandas as pd
+
+from desagregacion_dsg_upc import ConfigError
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+
+# Identificador int64 de la fila de origen, único y creciente en toda la extracción.
+COLUMNA_ID_ORIGEN = "id_fila_origen"
+
+
+def construir_esquema(processing: ProcessingConfig) -> dict[str, str]:
+    """
+    Construye los tipos de datos de extracción a partir de la configuración.
+
+    Args:
+        processing (ProcessingConfig): Configuración de procesamiento.
+
+    Returns:
+        dict[str, str]: Mapeo columna -> dtype de pandas.
+    """
+    esquema = {column: processing.dtype_dinero for column in processing.columns_dinero}
+    esquema[processing.column_desagregacion] = "Int32"
+    esquema[processing.column_codigo_osi] = "Int64"
+    esquema[processing.column_fecha] = "datetime64[ns]"
+    esquema[processing.column_descripcion_cups] = processing.dtype_descripcion
+
+    return esquema
+
+
+def aplicar_esquema(df: pd.DataFrame, esquema: dict[str, str]) -> pd.DataFrame:
+    """
+    Convierte las columnas de un chunk a sus tipos nativos con un único `astype`.
+
+    Args:
+        df (pd.DataFrame): Chunk tal como lo entrega el driver.
+        esquema (dict[str, str]): Mapeo columna -> dtype de pandas.
+
+    Returns:
+        pd.DataFrame: Chunk con las columnas del esquema tipadas.
+
+    Raises:
+        ConfigError: Si alguna columna del esquema no existe en el chunk.
+    """
+    faltantes = [column for column in esquema if column not in df.columns]
+    if faltantes:
+        raise ConfigError(
+            f"Las columnas configuradas {faltantes} no existen en el resultado de la consulta."
+        )
+
+    return df.astype(esquema)
+
+
+def normalizar_columnas(nombres: Iterable[str], columnas: Iterable[str]) -> list[str]:
+    """
+    Lleva los nombres de columna del resultado a como están configurados.
+
+    Oracle no distingue mayúsculas en los identificadores sin comillas, pero cada
+    driver los entrega distinto: el dialecto Oracle de SQLAlchemy los normaliza a
+    minúsculas (`cantidad_procedimiento`) y python-oracledb los deja en mayúsculas.
+    Los nombres que coinciden sin distinguir mayúsculas con una columna configurada
+    toman el nombre configurado; los demás no cambian.
+
+    Args:
+        nombres (Iterable[str]): Columnas tal como las entrega el driver.
+        columnas (Iterable[str]): Columnas configuradas.
+
+    Returns:
+        list[str]: Nombres de columna en el mismo orden.
+    """
+    configuradas = {columna.upper(): columna for columna in columnas}
+    return [configuradas.get(nombre.upper(), nombre) for nombre in nombres]
+
+
+def columnas_requeridas(processing: ProcessingConfig) -> list[str]:
+    """
+    Columnas que el pipeline necesita leer: las que usan las reglas, las de
+    `columns_passthrough` y, si aplican, las columnas de partición, de marca de agua
+    y de paginación.
+
+    Args:
+        processing (ProcessingConfig): Configuración de procesamiento.
+
+    Returns:
+        list[str]: Nombres de columna sin repetidos, en orden de configuración.
+    """
+    columnas = [
+        processing.column_descripcion_cups,
+        processing.column_codigo_osi,
+        processing.column_desagregacion,
+        processing.column_fecha,
+        *processing.columns_dinero,
+        processing.column_valor_liquidado,
+        *(processing.columns_passthrough or []),
+    ]
+    if processing.particiones > 1 and processing.columna_particion:
+        columnas.append(processing.columna_particion)
+    if processing.modo_incremental and processing.columna_marca:
+        columnas.append(processing.columna_marca)
+    if processing.modo_reanudable and processing.columna_paginacion:
+        # La consulta por llave ordena y filtra sobre la consulta proyectada.
+        columnas.append(processing.columna_paginacion)
+
+    return list(dict.fromkeys(columnas))
@@ -0,0 +1,219 @@
+from collections.abc import Generator
+from functools import partial
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy.engine import Connection
+
+from desagregacion_dsg_upc.cache_extraccion import CacheExtraccion
+from desagregacion_dsg_upc.concurrencia import precargar
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.esquema import columnas_requeridas, construir_esquema
+from desagregacion_dsg_upc.incremental import columna_marca
+from desagregacion_dsg_upc.reanudacion import Reanudacion
+from desagregacion_dsg_upc.utils_db import (
+    build_watermark_query,
+    fetch_arrow_batches,
+    fetch_data_in_chunks,
+    fetch_data_partitioned,
+    fetch_keyset_pages,
+    get_db_connection,
+    number_rows,
+    project_query,
+    validate_columns,
+)
+
+
+def extraer_chunks(
+    processing: ProcessingConfig,
+    marca: Any | None = None,
+    reanudacion: Reanudacion | None = None,
+) -> Generator[pd.DataFrame]:
+    """
+    Lee `processing.query_input` en chunks según el modo de extracción configurado.
+
+    Con `profundidad_prefetch` mayor que 0, la lectura se hace en un hilo de fondo
+    que obtiene hasta ese número de chunks por adelantado mientras el consumidor
+    aplica las reglas, de modo que la red y la CPU trabajan a la vez. Con
+    `cache_extraccion_dir`, una extracción ya guardada se lee de los archivos
+    locales sin consultar la base de datos.
+
+    Args:
+        processing (ProcessingConfig): Configuración de procesamiento.
+        marca (Any | None): Marca de agua de una ejecución incremental. Si se
+            indica, solo se leen las filas cuya columna de marca es mayor.
+        reanudacion (Reanudacion | None): Extracción reanudable. Si se indica, la
+            consulta se lee por páginas ordenadas por `columna_paginacion`, desde
+            el último punto de control, reintentando las páginas que fallan.
+
+    Yields:
+        pd.DataFrame: Chunks de datos, tipados si `extraccion_tipada` está activo y
+        con la columna `id_fila_origen` numerada de forma continua entre chunks.
+    """
+    if reanudacion is not None:
+        leer = partial(_leer_paginas, processing, marca, reanudacion)
+        inicio = reanudacion.filas_leidas
+    else:
+        leer = partial(_leer_chunks, processing, marca)
+        inicio = 0
+
+    if processing.profundidad_prefetch > 0 and (
+        processing.particiones <= 1 or reanudacion is not None
+    ):
+        logger.info(
+            f"Lectura anticipada de hasta {processing.profundidad_prefetch} chunks."
+        )
+        chunks = precargar(leer, processing.profundidad_prefetch)
+    else:
+        # Las particiones ya se leen en hilos de fondo.
+        chunks = leer()
+
+    # Al reanudar, la numeración continúa desde las filas ya leídas.
+    yield from number_rows(chunks, start=inicio)
+
+
+def consulta_proyectada(conn: Connection, processing: ProcessingConfig) -> str:
+    """
+    Consulta de entrada limitada a las columnas que el pipeline necesita.
+
+    Si `processing.columns_passthrough` está configurado, la consulta se envuelve
+    para seleccionar solo las columnas de las reglas y las de paso, en lugar de todo
+    el `SELECT *`; antes se valida que existan. Sin esa opción se lee la consulta
+    completa.
+
+    Raises:
+        ConfigError: Si alguna columna configurada no existe en la consulta.
+    """
+    if processing.columns_passthrough is None:
+        return processing.query_input
+
+    columnas = columnas_requeridas(processing)
+    validate_columns(conn, processing.query_input, columnas)
+    logger.info(f"Proyección de la consulta a {len(columnas)} columnas.")
+    return project_query(processing.query_input, columnas)
+
+
+def _leer_chunks(
+    processing: ProcessingConfig, marca: Any | None = None
+) -> Generator[pd.DataFrame]:
+    esquema = construir_esquema(processing) if processing.extraccion_tipada else None
+
+    if processing.cache_extraccion_dir is None:
+        yield from _leer_de_base_datos(processing, esquema, marca)
+        return
+
+    cache = CacheExtraccion(
+        processing.cache_extraccion_dir,
+        ttl_horas=processing.cache_ttl_horas,
+        max_mb=processing.cache_max_mb,
+    )
+    # La clave no depende de la conexión: en un acierto no se consulta la base.
+    columnas = (
+        columnas_requeridas(processing)
+        if processing.columns_passthrough is not None
+        else None
+    )
+    clave = cache.clave(
+        processing.query_input,
+        {
+            "columnas": columnas,
+            "modo_extraccion": processing.modo_extraccion,
+            "chunk_size": processing.chunk_size,
+            "marca": marca,
+        },
+        esquema,
+    )
+    if processing.invalidar_cache:
+        cache.invalidar(clave)
+
+    chunks = cache.leer(clave)
+    if chunks is None:
+        chunks = cache.guardar(clave, _leer_de_base_datos(processing, esquema, marca))
+    yield from chunks
+
+
+def _leer_paginas(
+    processing: ProcessingConfig, marca: Any | None, reanudacion: Reanudacion
+) -> Generator[pd.DataFrame]:
+    if processing.particiones > 1 or processing.cache_extraccion_dir is not None:
+        logger.warning(
+            "El modo reanudable lee por páginas en una sola conexión: se ignoran "
+            "las particiones y la caché de extracción."
+        )
+    esquema = construir_esquema(processing) if processing.extraccion_tipada else None
+
+    with get_db_connection() as connection:
+        consulta, params = _consulta_final(connection, processing, marca)
+
+    paginas = fetch_keyset_pages(
+        consulta,
+        reanudacion.columna,
+        page_size=processing.chunk_size,
+        esquema=esquema,
+        params=params,
+        columns=columnas_requeridas(processing),
+        last_key=reanudacion.ultima_llave,
+        retries=processing.reintentos_extraccion,
+        backoff=processing.espera_reintento_s,
+    )
+    yield from reanudacion.observar(paginas)
+
+
+def _leer_de_base_datos(
+    processing: ProcessingConfig,
+    esquema: dict[str, str] | None,
+    marca: Any | None = None,
+) -> Generator[pd.DataFrame]:
+    # Los drivers no entregan los nombres de columna con las mismas mayúsculas.
+    columnas = columnas_requeridas(processing)
+    if processing.particiones > 1:
+        with get_db_connection() as connection:
+            consulta, params = _consulta_final(connection, processing, marca)
+
+        columna = processing.columna_particion or processing.column_fecha
+        yield from fetch_data_partitioned(
+            consulta,
+            processing.particiones,
+            processing.estrategia_particion,
+            columna,
+            chunk_size=processing.chunk_size,
+            esquema=esquema,
+            queue_depth=processing.profundidad_prefetch or None,
+            params=params,
+            columns=columnas,
+        )
+        return
+
+    with get_db_connection() as connection:
+        logger.success("¡Conexión a la base de datos exitosa!")
+        consulta, params = _consulta_final(connection, processing, marca)
+        if processing.modo_extraccion == "arrow":
+            yield from fetch_arrow_batches(
+                connection,
+                consulta,
+                batch_size=processing.chunk_size,
+                esquema=esquema,
+                params=params,
+                columns=columnas,
+            )
+        else:
+            yield from fetch_data_in_chunks(
+                connection,
+                consulta,
+                chunk_size=processing.chunk_size,
+                esquema=esquema,
+                params=params,
+                columns=columnas,
+            )
+
+
+def _consulta_final(
+    conn: Connection, processing: ProcessingConfig, marca: Any | None
+) -> tuple[str, dict[str, Any]]:
+    consulta = consulta_proyectada(conn, processing)
+    if marca is not None:
+        logger.info(
+            f"Ejecución incremental: filas con {columna_marca(processing)} > {marca}."
+        )
+    return build_watermark_query(consulta, columna_marca(processing), marca)
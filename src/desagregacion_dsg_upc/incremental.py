@@ -0,0 +1,123 @@
+import json
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.utils import reemplazo_atomico
+
+
+def columna_marca(processing: ProcessingConfig) -> str:
+    """Columna monótona de la marca de agua: `columna_marca` o `column_fecha`."""
+    return processing.columna_marca or processing.column_fecha
+
+
+class EstadoIncremental:
+    """
+    Almacén local (JSON) de la marca de agua de cada salida incremental.
+
+    La marca es el mayor valor de la columna monótona ya procesado y escrito en la
+    salida. Se guarda por ruta de salida, con su tipo, para volver a enlazarla en la
+    consulta como fecha o número.
+
+    Args:
+        ruta (str | Path): Archivo JSON del estado.
+    """
+
+    def __init__(self, ruta: str | Path):
+        self.ruta = Path(ruta)
+
+    def leer(self, clave: str) -> Any | None:
+        """Marca de agua guardada para la clave, o None si no hay ninguna."""
+        entrada = cargar_json(self.ruta).get(clave)
+        if entrada is None:
+            return None
+        return valor_desde_json(entrada["tipo"], entrada["valor"])
+
+    def guardar(self, clave: str, columna: str, valor: Any) -> None:
+        """Guarda la marca de la clave; el archivo se reemplaza de forma atómica."""
+        tipo, valor = valor_a_json(valor)
+
+        estado = cargar_json(self.ruta)
+        estado[clave] = {
+            "columna": columna,
+            "tipo": tipo,
+            "valor": valor,
+            "actualizado": datetime.now().isoformat(timespec="seconds"),
+        }
+        guardar_json(self.ruta, estado)
+        logger.info(f"Marca de agua de {clave}: {columna} = {valor}.")
+
+    def reiniciar(self, clave: str) -> None:
+        """Elimina la marca de la clave: la siguiente ejecución procesa todo."""
+        estado = cargar_json(self.ruta)
+        if estado.pop(clave, None) is not None:
+            guardar_json(self.ruta, estado)
+
+
+def valor_a_json(valor: Any) -> tuple[str, Any]:
+    """Par (tipo, valor) serializable de una fecha o un número."""
+    if isinstance(valor, (pd.Timestamp, datetime)):
+        return "fecha", pd.Timestamp(valor).isoformat()
+    return "numero", valor.item() if hasattr(valor, "item") else valor
+
+
+def valor_desde_json(tipo: str, valor: Any) -> Any:
+    """Valor guardado con `valor_a_json`, listo para enlazarlo en una consulta."""
+    if tipo == "fecha":
+        return pd.Timestamp(valor).to_pydatetime()
+    return valor
+
+
+def cargar_json(ruta: Path) -> dict[str, Any]:
+    """Contenido de un archivo de estado, o un diccionario vacío si no existe."""
+    if not ruta.exists():
+        return {}
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def guardar_json(ruta: Path, estado: dict[str, Any]) -> None:
+    """Escribe un archivo de estado reemplazándolo de forma atómica."""
+    with reemplazo_atomico(ruta) as temporal:
+        temporal.write_text(json.dumps(estado, indent=2), encoding="utf-8")
+
+
+class SeguimientoMarca:
+    """
+    Registra el mayor valor de la columna de marca en los chunks que pasan.
+
+    Args:
+        columna (str): Columna monótona (fecha o llave creciente).
+    """
+
+    def __init__(self, columna: str):
+        self.columna = columna
+        self.maximo: Any | None = None
+
+    def observar(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Entrega los chunks sin modificarlos y actualiza `maximo`."""
+        for chunk in chunks:
+            valor = _maximo(chunk[self.columna])
+            if valor is not None and (self.maximo is None or valor > self.maximo):
+                self.maximo = valor
+            yield chunk
+
+
+def _maximo(serie: pd.Series) -> Any | None:
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+        # Extracción sin tipar: la columna llega como texto.
+        try:
+            serie = pd.to_numeric(serie)
+        except ValueError:
+            # Texto no numérico, ej. fechas en ISO 8601.
+            serie = pd.to_datetime(serie)
+        except TypeError:
+            # Objetos no numéricos, ej. `datetime`.
+            serie = pd.to_datetime(serie)
+
+    valor = serie.max()
+    return None if pd.isna(valor) else valor
@@ -0,0 +1,404 @@
+import json
+import sys
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Self
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.metricas import registro as metricas
+from desagregacion_dsg_upc.perfilado import Perfilador
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage el pico de RSS queda en None.
+    resource = None
+
+ETAPAS = ("extraccion", "clasificacion", "expansion", "escritura")
+
+
+def rss_pico_mb() -> float | None:
+    """
+    Pico de memoria residente (RSS) del proceso actual, en MB.
+
+    En Linux se lee `VmHWM` de /proc (se reinicia con execve, a diferencia de
+    `ru_maxrss`, que conserva el del proceso padre).
+    """
+    try:
+        with open("/proc/self/status") as archivo:
+            for linea in archivo:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 2**10
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux.
+    return maximo / 2**20 if sys.platform == "darwin" else maximo / 2**10
+
+
+def _maximo(a: float | None, b: float | None) -> float | None:
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _combinar(destino: dict[str, Any], origen: dict[str, Any]) -> None:
+    """Suma llamadas, tiempo y filas; conserva el máximo de memoria."""
+    for campo in ("llamadas", "segundos", "filas_entrada", "filas_salida"):
+        destino[campo] = destino.get(campo, 0) + origen[campo]
+    for campo in ("bytes_asignados", "rss_pico_mb"):
+        destino[campo] = _maximo(destino.get(campo), origen[campo])
+
+
+def _factor(filas_entrada: int, filas_salida: int) -> float | None:
+    return filas_salida / filas_entrada if filas_entrada else None
+
+
+class Medidor:
+    """
+    Mide el tiempo, las filas y la memoria de las etapas de un chunk.
+
+    Las mediciones se acumulan por etapa y regla hasta que se toman con `tomar`.
+    El medidor viaja con el motor de reglas a los procesos trabajadores y sus
+    mediciones vuelven junto con los resultados de cada chunk.
+
+    Args:
+        memoria (bool): Mide con tracemalloc el pico de bytes asignados durante
+            cada etapa. tracemalloc hace varias veces más lenta la asignación de
+            memoria; se activa en el proceso la primera vez que se mide.
+        perfilador (Perfilador | None): Perfila además cada bloque medido.
+    """
+
+    def __init__(self, memoria: bool = False, perfilador: Perfilador | None = None):
+        self.memoria = memoria
+        self.perfilador = perfilador
+        self.mediciones: dict[tuple[str, str | None], dict[str, Any]] = {}
+
+    @contextmanager
+    def medir(
+        self, etapa: str, regla: str | None = None, filas_entrada: int = 0
+    ) -> Iterator[dict[str, int]]:
+        """
+        Mide el bloque como una llamada de la etapa (y regla, si se indica).
+
+        Args:
+            etapa (str): Etapa del pipeline (ver `ETAPAS`).
+            regla (str | None): Nombre de la regla medida.
+            filas_entrada (int): Filas que recibe la etapa.
+
+        Yields:
+            dict[str, int]: Medición en curso; el bloque puede actualizar
+            `filas_entrada` y `filas_salida` (por defecto, igual a las de entrada).
+        """
+        medicion = {"filas_entrada": filas_entrada, "filas_salida": filas_entrada}
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        perfil = (
+            nullcontext()
+            if self.perfilador is None
+            else self.perfilador.perfilar(etapa, regla)
+        )
+        inicio = time.perf_counter()
+        try:
+            with perfil:
+                yield medicion
+        finally:
+            segundos = time.perf_counter() - inicio
+            asignados = (
+                tracemalloc.get_traced_memory()[1] - base if self.memoria else None
+            )
+            _combinar(
+                self.mediciones.setdefault((etapa, regla), {}),
+                {
+                    "llamadas": 1,
+                    "segundos": segundos,
+                    "filas_entrada": medicion["filas_entrada"],
+                    "filas_salida": medicion["filas_salida"],
+                    "bytes_asignados": asignados,
+                    "rss_pico_mb": rss_pico_mb(),
+                },
+            )
+
+    def tomar(self) -> list[dict[str, Any]]:
+        """Devuelve las mediciones acumuladas como registros y las reinicia."""
+        registros = [
+            {"etapa": etapa, "regla": regla, **valores}
+            for (etapa, regla), valores in self.mediciones.items()
+        ]
+        self.mediciones = {}
+        return registros
+
+    def agregar(self, registros: Iterable[dict[str, Any]]) -> None:
+        """Acumula registros tomados de otro medidor (ej. un proceso trabajador)."""
+        for registro in registros:
+            clave = (registro["etapa"], registro["regla"])
+            _combinar(self.mediciones.setdefault(clave, {}), registro)
+
+
+class Instrumentacion:
+    """
+    Instrumentación de una ejecución del pipeline.
+
+    Mide cada etapa (extracción, clasificación, expansión y escritura) y cada regla:
+    tiempo, filas de entrada y salida, factor de expansión, pico de bytes asignados
+    (con tracemalloc, si se activa) y pico de RSS. Al cerrar cada chunk se emite un
+    registro JSON por etapa y regla y uno con el total del chunk; al final, uno con
+    el total de la ejecución y un reporte en el log. Las filas, la duración de cada
+    chunk y el pico de RSS se acumulan además en el registro de métricas del
+    proceso (ver `ExportadorPrometheus`).
+
+    La extracción se mide como el tiempo de espera por el siguiente chunk. En modo
+    paralelo los tiempos de clasificación y expansión son la suma de los de los
+    trabajadores, por lo que pueden superar el tiempo total de la ejecución.
+
+    Args:
+        ruta (str | Path | None): Archivo JSON Lines al que se agregan los
+            registros. Sin ruta, los registros se emiten en el log (DEBUG).
+        memoria (bool): Mide los bytes asignados por etapa con tracemalloc.
+        registros (bool): Emite los registros JSON y el reporte. Sin registros solo
+            se actualizan las métricas del proceso.
+        perfilador (Perfilador | None): Perfila cada etapa y regla de los chunks
+            que selecciona; requiere procesar los chunks en serie.
+    """
+
+    def __init__(
+        self,
+        ruta: str | Path | None = None,
+        memoria: bool = False,
+        registros: bool = True,
+        perfilador: Perfilador | None = None,
+    ):
+        self.ruta = None if ruta is None else Path(ruta)
+        self.registros = registros
+        self.perfilador = perfilador
+        self.medidor = Medidor(memoria, perfilador)
+        self.chunks = 0
+        self.filas_leidas = 0
+        self.filas_escritas = 0
+        self.totales: dict[tuple[str, str | None], dict[str, Any]] = {}
+        self._extracciones: deque[list[dict[str, Any]]] = deque()
+        self._inicio = self._ultimo = time.perf_counter()
+
+    @classmethod
+    def desde_configuracion(
+        cls, processing: ProcessingConfig, perfilador: Perfilador | None = None
+    ) -> Self | None:
+        """
+        Instrumentación configurada, o None si están desactivadas la
+        instrumentación, la exportación de métricas a Prometheus y el perfilado.
+        """
+        if (
+            not processing.instrumentacion
+            and processing.archivo_prometheus is None
+            and perfilador is None
+        ):
+            return None
+        return cls(
+            processing.archivo_metricas,
+            processing.instrumentacion_memoria,
+            registros=processing.instrumentacion,
+            perfilador=perfilador,
+        )
+
+    def observar(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Entrega los chunks sin modificarlos y mide la extracción de cada uno."""
+        medidor = Medidor(self.medidor.memoria, self.perfilador)
+        iterador = iter(chunks)
+        while True:
+            with medidor.medir("extraccion") as medicion:
+                chunk = next(iterador, None)
+                if chunk is not None:
+                    medicion["filas_entrada"] = medicion["filas_salida"] = len(chunk)
+            # Se conserva por chunk: en modo paralelo la extracción se adelanta
+            # a los chunks que se están escribiendo.
+            registros = medidor.tomar()
+            if chunk is None:
+                return
+            self._extracciones.append(registros)
+            yield chunk
+
+    def cerrar_chunk(self, numero: int, filas_leidas: int, filas_escritas: int) -> None:
+        """
+        Emite las mediciones del chunk y las acumula en los totales de la ejecución.
+
+        Args:
+            numero (int): Número del chunk (desde 1).
+            filas_leidas (int): Filas de origen del chunk.
+            filas_escritas (int): Filas escritas del chunk.
+        """
+        ahora = time.perf_counter()
+        extraccion = self._extracciones.popleft() if self._extracciones else []
+        registros = [
+            {
+                "tipo": "etapa",
+                "chunk": numero,
+                **registro,
+                "factor_expansion": _factor(
+                    registro["filas_entrada"], registro["filas_salida"]
+                ),
+            }
+            for registro in extraccion + self.medidor.tomar()
+        ]
+        rss = rss_pico_mb()
+        for registro in registros:
+            _combinar(
+                self.totales.setdefault((registro["etapa"], registro["regla"]), {}),
+                registro,
+            )
+            rss = _maximo(rss, registro["rss_pico_mb"])
+            if registro["etapa"] == "expansion" and registro["regla"] is not None:
+                for fase, filas in (
+                    ("origen", registro["filas_entrada"]),
+                    ("desagregadas", registro["filas_salida"]),
+                ):
+                    metricas.incrementar(
+                        "desagregacion_filas_regla_total",
+                        filas,
+                        regla=registro["regla"],
+                        fase=fase,
+                    )
+
+        metricas.incrementar("desagregacion_chunks_total")
+        metricas.incrementar("desagregacion_filas_extraidas_total", filas_leidas)
+        metricas.incrementar("desagregacion_filas_escritas_total", filas_escritas)
+        metricas.observar("desagregacion_chunk_duracion_segundos", ahora - self._ultimo)
+        if rss is not None:
+            metricas.maximo("desagregacion_memoria_rss_pico_bytes", rss * 2**20)
+
+        registros.append(
+            {
+                "tipo": "chunk",
+                "chunk": numero,
+                "segundos": ahora - self._ultimo,
+                "filas_leidas": filas_leidas,
+                "filas_escritas": filas_escritas,
+                "factor_expansion": _factor(filas_leidas, filas_escritas),
+                "rss_pico_mb": rss,
+            }
+        )
+        self._emitir(registros)
+        if self.perfilador is not None:
+            self.perfilador.cerrar_chunk(numero)
+
+        self._ultimo = ahora
+        self.chunks += 1
+        self.filas_leidas += filas_leidas
+        self.filas_escritas += filas_escritas
+
+    def resumen(self) -> dict[str, Any]:
+        """Totales de la ejecución, por etapa y por regla."""
+        etapas = [
+            {
+                "etapa": etapa,
+                "regla": regla,
+                **valores,
+                "factor_expansion": _factor(
+                    valores["filas_entrada"], valores["filas_salida"]
+                ),
+            }
+            for (etapa, regla), valores in sorted(
+                self.totales.items(),
+                key=lambda item: (ETAPAS.index(item[0][0]), item[0][1] or ""),
+            )
+        ]
+        rss = rss_pico_mb()
+        for registro in etapas:
+            rss = _maximo(rss, registro["rss_pico_mb"])
+
+        return {
+            "tipo": "ejecucion",
+            "chunks": self.chunks,
+            "segundos": time.perf_counter() - self._inicio,
+            "filas_leidas": self.filas_leidas,
+            "filas_escritas": self.filas_escritas,
+            "factor_expansion": _factor(self.filas_leidas, self.filas_escritas),
+            "rss_pico_mb": rss,
+            "etapas": etapas,
+        }
+
+    def reporte(self) -> dict[str, Any]:
+        """
+        Emite el registro de la ejecución y registra en el log un reporte por etapa.
+
+        Returns:
+            dict[str, Any]: El resumen de la ejecución (ver `resumen`).
+        """
+        resumen = self.resumen()
+        if self.perfilador is not None:
+            self.perfilador.cerrar()
+        if not self.registros:
+            return resumen
+        self._emitir([resumen])
+
+        factor = resumen["factor_expansion"] or 0.0
+        rss = resumen["rss_pico_mb"]
+        rss = "" if rss is None else f"; RSS pico {rss:.0f} MB"
+        lineas = [
+            (
+                f"Reporte de la ejecución: {resumen['chunks']} chunks, "
+                f"{resumen['filas_leidas']} filas leídas -> "
+                f"{resumen['filas_escritas']} filas escritas (x{factor:.2f}) "
+                f"en {resumen['segundos']:.2f} s{rss}."
+            ),
+            (
+                f"{'etapa':<15}{'regla':<46}{'llamadas':>9}{'segundos':>10}"
+                f"{'entrada':>11}{'salida':>11}{'factor':>8}{'MB asig.':>10}"
+            ),
+        ]
+        for etapa in ETAPAS:
+            registros = [r for r in resumen["etapas"] if r["etapa"] == etapa]
+            if not registros:
+                continue
+            total: dict[str, Any] = {}
+            for registro in registros:
+                _combinar(total, registro)
+            # Las filas de la etapa son las de sus reglas; en la expansión, las
+            # mediciones sin regla (concatenar y ordenar) solo aportan tiempo.
+            lineas.append(self._linea(etapa, "", total))
+            if len(registros) > 1 or registros[0]["regla"] is not None:
+                lineas.extend(
+                    self._linea("", f"  {r['regla'] or '-'}", r) for r in registros
+                )
+        logger.info("\n".join(lineas))
+        return resumen
+
+    @staticmethod
+    def _linea(etapa: str, regla: str, valores: dict[str, Any]) -> str:
+        factor = _factor(valores["filas_entrada"], valores["filas_salida"])
+        asignados = valores["bytes_asignados"]
+        return (
+            f"{etapa:<15}{regla:<46}{valores['llamadas']:>9}"
+            f"{valores['segundos']:>10.3f}{valores['filas_entrada']:>11}"
+            f"{valores['filas_salida']:>11}"
+            f"{'-' if factor is None else f'{factor:.2f}':>8}"
+            f"{'-' if asignados is None else f'{asignados / 2**20:.1f}':>10}"
+        )
+
+    def _emitir(self, registros: list[dict[str, Any]]) -> None:
+        if not self.registros:
+            return
+        momento = datetime.now().isoformat(timespec="milliseconds")
+        lineas = [
+            json.dumps({"momento": momento, **registro}, ensure_ascii=False)
+            for registro in registros
+        ]
+        if self.ruta is None:
+            for linea in lineas:
+                logger.debug(linea)
+            return
+
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.ruta, "a", encoding="utf-8") as archivo:
+            archivo.write("\n".join(lineas) + "\n")
@@ -0,0 +1,277 @@
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Self
+
+from loguru import logger
+
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.utils import reemplazo_atomico
+
+_DURACIONES_LECTURA = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_DURACIONES_CHUNK = (*_DURACIONES_LECTURA[1:], 120.0, 300.0)
+
+# Nombre -> (tipo, ayuda, límites de los buckets del histograma).
+METRICAS: dict[str, tuple[str, str, tuple[float, ...] | None]] = {
+    "desagregacion_filas_extraidas_total": (
+        "counter",
+        "Filas de origen extraídas de la base de datos.",
+        None,
+    ),
+    "desagregacion_filas_regla_total": (
+        "counter",
+        "Filas de origen y desagregadas por regla (fase origen o desagregadas).",
+        None,
+    ),
+    "desagregacion_filas_escritas_total": (
+        "counter",
+        "Filas escritas en la salida.",
+        None,
+    ),
+    "desagregacion_chunks_total": ("counter", "Chunks procesados y escritos.", None),
+    "desagregacion_chunk_duracion_segundos": (
+        "histogram",
+        "Tiempo entre el cierre de un chunk y el del siguiente.",
+        _DURACIONES_CHUNK,
+    ),
+    "desagregacion_lectura_bd_duracion_segundos": (
+        "histogram",
+        "Tiempo de lectura de cada chunk o lote desde la base de datos.",
+        _DURACIONES_LECTURA,
+    ),
+    "desagregacion_errores_bd_total": (
+        "counter",
+        "Errores de base de datos por código (ORA-/DPY-) y operación.",
+        None,
+    ),
+    "desagregacion_memoria_rss_pico_bytes": (
+        "gauge",
+        "Pico de memoria residente del proceso principal o de un trabajador.",
+        None,
+    ),
+    "desagregacion_ejecucion_inicio_timestamp_segundos": (
+        "gauge",
+        "Inicio de la ejecución (epoch).",
+        None,
+    ),
+    "desagregacion_ejecucion_duracion_segundos": (
+        "gauge",
+        "Duración de la ejecución hasta la última actualización.",
+        None,
+    ),
+    "desagregacion_ejecucion_en_curso": (
+        "gauge",
+        "1 mientras la ejecución está en curso.",
+        None,
+    ),
+    "desagregacion_ejecucion_exitosa": (
+        "gauge",
+        "1 si la última ejecución terminó sin errores, 0 si falló.",
+        None,
+    ),
+    "desagregacion_ultima_actualizacion_timestamp_segundos": (
+        "gauge",
+        "Momento de la última escritura del archivo de métricas (epoch).",
+        None,
+    ),
+}
+
+Etiquetas = tuple[tuple[str, str], ...]
+
+
+class _Histograma:
+    def __init__(self, limites: tuple[float, ...]):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+
+
+class RegistroMetricas:
+    """
+    Contadores, gauges e histogramas del proceso, con etiquetas.
+
+    Las operaciones toman un lock y cuestan del orden de un microsegundo, por lo que
+    se pueden registrar desde los hilos de extracción en cada chunk. Solo se admiten
+    las métricas declaradas en `METRICAS`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores: dict[str, dict[Etiquetas, Any]] = {}
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas: str) -> None:
+        """Suma `valor` a un contador."""
+        with self._lock:
+            serie = self._serie(nombre, "counter")
+            clave = tuple(sorted(etiquetas.items()))
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def fijar(self, nombre: str, valor: float, **etiquetas: str) -> None:
+        """Fija el valor de un gauge."""
+        with self._lock:
+            self._serie(nombre, "gauge")[tuple(sorted(etiquetas.items()))] = valor
+
+    def maximo(self, nombre: str, valor: float, **etiquetas: str) -> None:
+        """Fija un gauge al mayor entre su valor actual y `valor`."""
+        with self._lock:
+            serie = self._serie(nombre, "gauge")
+            clave = tuple(sorted(etiquetas.items()))
+            serie[clave] = max(serie.get(clave, valor), valor)
+
+    def observar(self, nombre: str, valor: float, **etiquetas: str) -> None:
+        """Registra una observación en un histograma."""
+        with self._lock:
+            serie = self._serie(nombre, "histogram")
+            clave = tuple(sorted(etiquetas.items()))
+            if clave not in serie:
+                serie[clave] = _Histograma(METRICAS[nombre][2])
+            serie[clave].observar(valor)
+
+    def reiniciar(self) -> None:
+        """Descarta todos los valores registrados."""
+        with self._lock:
+            self._valores = {}
+
+    def valor(self, nombre: str, **etiquetas: str) -> Any:
+        """Valor de un contador o gauge (o el histograma), o None si no existe."""
+        with self._lock:
+            return self._valores.get(nombre, {}).get(tuple(sorted(etiquetas.items())))
+
+    def exponer(self) -> str:
+        """Métricas en el formato de texto de Prometheus."""
+        lineas = []
+        with self._lock:
+            for nombre, (tipo, ayuda, _) in METRICAS.items():
+                serie = self._valores.get(nombre)
+                if not serie:
+                    continue
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                for etiquetas, valor in sorted(serie.items()):
+                    if tipo != "histogram":
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+                        continue
+
+                    acumulado = 0
+                    limites = [*map(repr, valor.limites), "+Inf"]
+                    for limite, cuenta in zip(limites, valor.cuentas):
+                        acumulado += cuenta
+                        lineas.append(
+                            f"{nombre}_bucket"
+                            f"{_etiquetas((*etiquetas, ('le', limite)))} {acumulado}"
+                        )
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {valor.suma}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {acumulado}")
+        return "\n".join(lineas) + "\n" if lineas else ""
+
+    def _serie(self, nombre: str, tipo: str) -> dict[Etiquetas, Any]:
+        if METRICAS[nombre][0] != tipo:
+            raise ValueError(f"La métrica {nombre} no es de tipo {tipo}.")
+        return self._valores.setdefault(nombre, {})
+
+
+def _etiquetas(etiquetas: Etiquetas) -> str:
+    if not etiquetas:
+        return ""
+    pares = (
+        f'{clave}="'
+        + str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        + '"'
+        for clave, valor in etiquetas
+    )
+    return "{" + ",".join(pares) + "}"
+
+
+# Registro del proceso: lo alimentan la extracción (`utils_db`) y la
+# instrumentación del pipeline, y lo escribe `ExportadorPrometheus`.
+registro = RegistroMetricas()
+
+
+class ExportadorPrometheus:
+    """
+    Escribe las métricas del proceso en un archivo `.prom` para el textfile
+    collector de node-exporter.
+
+    Como context manager, escribe el archivo al iniciar, cada `intervalo_s`
+    segundos desde un hilo de fondo y al terminar, con
+    `desagregacion_ejecucion_exitosa` en 1 o 0 según si el bloque terminó con una
+    excepción. Cada escritura reemplaza el archivo de forma atómica (temporal en el
+    mismo directorio y `os.replace`), así que el collector nunca lee un archivo a
+    medio escribir.
+
+    Args:
+        ruta (str | Path): Archivo de salida; debe terminar en `.prom` y estar en el
+            directorio del textfile collector.
+        intervalo_s (float): Segundos entre escrituras durante la ejecución; 0 solo
+            escribe al iniciar y al terminar.
+        metricas (RegistroMetricas): Registro a exportar.
+    """
+
+    def __init__(
+        self,
+        ruta: str | Path,
+        intervalo_s: float = 15.0,
+        metricas: RegistroMetricas = registro,
+    ):
+        self.ruta = Path(ruta)
+        self.intervalo_s = intervalo_s
+        self.metricas = metricas
+        self._inicio = time.time()
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+
+    @classmethod
+    def desde_configuracion(cls, processing: ProcessingConfig) -> Self | None:
+        """Exportador configurado, o None si no se indicó `archivo_prometheus`."""
+        if processing.archivo_prometheus is None:
+            return None
+        return cls(processing.archivo_prometheus, processing.intervalo_prometheus_s)
+
+    def __enter__(self) -> Self:
+        self._inicio = time.time()
+        self.metricas.fijar(
+            "desagregacion_ejecucion_inicio_timestamp_segundos", self._inicio
+        )
+        self.metricas.fijar("desagregacion_ejecucion_en_curso", 1)
+        self.escribir()
+        if self.intervalo_s > 0:
+            self._hilo = threading.Thread(
+                target=self._periodico, name="exportador-prometheus", daemon=True
+            )
+            self._hilo.start()
+        return self
+
+    def __exit__(self, tipo, *exc) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        self.metricas.fijar("desagregacion_ejecucion_en_curso", 0)
+        self.metricas.fijar("desagregacion_ejecucion_exitosa", int(tipo is None))
+        self.escribir()
+
+    def escribir(self) -> None:
+        """Escribe las métricas actuales reemplazando el archivo de forma atómica."""
+        ahora = time.time()
+        self.metricas.fijar(
+            "desagregacion_ejecucion_duracion_segundos", ahora - self._inicio
+        )
+        self.metricas.fijar(
+            "desagregacion_ultima_actualizacion_timestamp_segundos", ahora
+        )
+
+        # El collector solo lee archivos *.prom: el temporal se ignora.
+        with reemplazo_atomico(self.ruta) as temporal:
+            temporal.write_text(self.metricas.exponer(), encoding="utf-8")
+
+    def _periodico(self) -> None:
+        while not self._detener.wait(self.intervalo_s):
+            try:
+                self.escribir()
+            except OSError as e:
+                # Las métricas no deben detener la ejecución (ej. disco lleno).
+                logger.warning(f"No se pudo escribir {self.ruta}: {e}")
@@ -0,0 +1,202 @@
+import copy
+import multiprocessing
+import sys
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import settings
+from desagregacion_dsg_upc.instrumentacion import Medidor
+from desagregacion_dsg_upc.pipeline import iterar_chunk
+from desagregacion_dsg_upc.rules import MotorReglas
+
+try:
+    import pyarrow as pa
+except ImportError:  # Sin el extra 'arrow' los chunks viajan como DataFrames.
+    pa = None
+
+# Motor de reglas de cada proceso trabajador, creado una sola vez al iniciarlo.
+_motor: MotorReglas | None = None
+
+
+def _codificar(df: pd.DataFrame, arrow: bool = True) -> Any:
+    """Serializa un DataFrame como stream Arrow IPC (sin pyarrow, lo deja tal cual)."""
+    if pa is None or not arrow:
+        return df
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    return sink.getvalue()
+
+
+def _decodificar(carga: Any) -> pd.DataFrame:
+    if isinstance(carga, pd.DataFrame):
+        return carga
+    return pa.ipc.open_stream(carga).read_all().to_pandas()
+
+
+def _inicializar_trabajador(processing: Any, motor: MotorReglas) -> None:
+    global _motor
+    # Con spawn/forkserver el trabajador carga la configuración desde cero; se
+    # sustituye por la del proceso principal para que las reglas vean la misma.
+    settings.processing = processing
+    _motor = motor
+
+
+def _procesar_en_trabajador(
+    carga: Any,
+) -> tuple[int, list[Any], dict[str, list[int]], list[dict[str, Any]]]:
+    df = _decodificar(carga)
+    # Los resultados vuelven en el mismo formato en que llegó el chunk.
+    arrow = not isinstance(carga, pd.DataFrame)
+    _motor.estadisticas = {}
+    partes = [_codificar(parte, arrow) for parte in iterar_chunk(df, _motor)]
+    mediciones = [] if _motor.medidor is None else _motor.medidor.tomar()
+    return len(df), partes, _motor.estadisticas, mediciones
+
+
+def procesar_en_procesos(
+    chunks: Iterable[pd.DataFrame], motor: MotorReglas, trabajadores: int
+) -> Iterator[tuple[int, list[pd.DataFrame]]]:
+    """
+    Desagrega los chunks en un pool de procesos y los entrega en su orden original.
+
+    Cada trabajador recibe una sola vez la configuración y el motor de reglas al
+    iniciarse. Los chunks y sus resultados viajan como streams Arrow IPC (si pyarrow
+    está instalado), que se serializan como un único buffer en lugar de un
+    DataFrame pickleado. Como máximo hay `2 * trabajadores` chunks en vuelo, por lo
+    que la memoria sigue acotada por el tamaño del chunk. Las estadísticas y las
+    mediciones de cada chunk se acumulan en `motor`.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks de entrada.
+        motor (MotorReglas): Motor de reglas que se copia a cada trabajador.
+        trabajadores (int): Número de procesos.
+
+    Yields:
+        tuple[int, list[pd.DataFrame]]: Filas leídas y sub-lotes desagregados de
+        cada chunk, en el mismo orden de `chunks`.
+    """
+    # forkserver (el predeterminado en Linux desde Python 3.14) y spawn evitan
+    # heredar por fork los hilos del proceso principal (logger, pool de conexiones,
+    # productores). forkserver no existe en Windows, donde se usa spawn.
+    metodo = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    with ProcessPoolExecutor(
+        max_workers=trabajadores,
+        mp_context=multiprocessing.get_context(metodo),
+        initializer=_inicializar_trabajador,
+        initargs=(settings.processing, motor),
+    ) as executor:
+        cargas = (_codificar(chunk) for chunk in chunks)
+        for filas, partes in _en_orden(
+            executor, _procesar_en_trabajador, cargas, motor, trabajadores
+        ):
+            yield filas, [_decodificar(parte) for parte in partes]
+
+
+def gil_activo() -> bool:
+    """Indica si el intérprete ejecuta con GIL (False en un build free-threaded)."""
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def procesar_en_hilos(
+    chunks: Iterable[pd.DataFrame], motor: MotorReglas, trabajadores: int
+) -> Iterator[tuple[int, Iterable[pd.DataFrame]]]:
+    """
+    Desagrega los chunks en un pool de hilos y los entrega en su orden original.
+
+    En un build free-threaded de Python los hilos ejecutan la identificación y la
+    expansión de varios chunks en paralelo dentro del mismo proceso, sin serializar
+    los DataFrames ni duplicar el motor. Cada hilo trabaja con su propia copia
+    superficial del motor (las reglas no tienen estado) para no compartir las
+    estadísticas, que se acumulan en `motor` desde el hilo consumidor. Como máximo
+    hay `2 * trabajadores` chunks en vuelo.
+
+    Con GIL los hilos no aportan paralelismo, así que los chunks se procesan en
+    serie en el hilo actual.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks de entrada.
+        motor (MotorReglas): Motor de reglas.
+        trabajadores (int): Número de hilos.
+
+    Yields:
+        tuple[int, Iterable[pd.DataFrame]]: Filas leídas y sub-lotes desagregados
+        de cada chunk, en el mismo orden de `chunks`.
+    """
+    if gil_activo():
+        logger.warning(
+            "El intérprete se ejecuta con GIL: los chunks se procesan en serie. "
+            "Use un build free-threaded de Python (python3.14t) o modo_paralelo "
+            "'procesos'."
+        )
+        for chunk in chunks:
+            yield len(chunk), iterar_chunk(chunk, motor)
+        return
+
+    if motor.medidor is not None and motor.medidor.memoria:
+        logger.warning(
+            "tracemalloc mide la memoria de todo el proceso: en modo hilos los bytes "
+            "asignados por etapa incluyen los de los demás hilos."
+        )
+
+    locales = threading.local()
+
+    def procesar(chunk: pd.DataFrame) -> tuple[int, list[pd.DataFrame], dict, list]:
+        copia = getattr(locales, "motor", None)
+        if copia is None:
+            copia = locales.motor = copy.copy(motor)
+            if motor.medidor is not None:
+                copia.medidor = Medidor(motor.medidor.memoria)
+        copia.estadisticas = {}
+        partes = list(iterar_chunk(chunk, copia))
+        mediciones = [] if copia.medidor is None else copia.medidor.tomar()
+        return len(chunk), partes, copia.estadisticas, mediciones
+
+    with ThreadPoolExecutor(
+        max_workers=trabajadores, thread_name_prefix="desagregacion"
+    ) as executor:
+        yield from _en_orden(executor, procesar, chunks, motor, trabajadores)
+
+
+def _en_orden(
+    executor: Executor,
+    funcion: Callable[
+        [Any], tuple[int, list[Any], dict[str, list[int]], list[dict[str, Any]]]
+    ],
+    cargas: Iterable[Any],
+    motor: MotorReglas,
+    trabajadores: int,
+) -> Iterator[tuple[int, list[Any]]]:
+    """Envía las cargas al pool con una ventana acotada y entrega en orden de envío."""
+    en_vuelo: deque[Future] = deque()
+
+    def recibir() -> tuple[int, list[Any]]:
+        filas, partes, estadisticas, mediciones = en_vuelo.popleft().result()
+        motor.acumular_estadisticas(estadisticas)
+        if motor.medidor is not None:
+            motor.medidor.agregar(mediciones)
+        return filas, partes
+
+    try:
+        for carga in cargas:
+            en_vuelo.append(executor.submit(funcion, carga))
+            if len(en_vuelo) >= 2 * trabajadores:
+                yield recibir()
+
+        while en_vuelo:
+            yield recibir()
+    finally:
+        for futuro in en_vuelo:
+            futuro.cancel()
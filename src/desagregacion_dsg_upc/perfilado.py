@@ -0,0 +1,165 @@
+import cProfile
+import random
+import sys
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Literal
+
+from loguru import logger
+
+
+def _pila(frame: FrameType | None) -> str:
+    """Pila de llamadas en formato colapsado ("externa;...;interna")."""
+    marcos = []
+    while frame is not None:
+        codigo = frame.f_code
+        marcos.append(
+            f"{codigo.co_name} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(marcos))
+
+
+class _Muestreador(threading.Thread):
+    """Hilo que registra periódicamente la pila del hilo objetivo, si hay uno."""
+
+    def __init__(self, intervalo_s: float):
+        super().__init__(name="perfilador-muestreo", daemon=True)
+        self.intervalo_s = intervalo_s
+        self.lock = threading.Lock()
+        self.objetivo: tuple[int, Counter[str]] | None = None
+        self._detener = threading.Event()
+
+    def run(self) -> None:
+        while not self._detener.wait(self.intervalo_s):
+            with self.lock:
+                if self.objetivo is None:
+                    continue
+                hilo, pilas = self.objetivo
+                frame = sys._current_frames().get(hilo)
+                if frame is not None:
+                    pilas[_pila(frame)] += 1
+
+    def detener(self) -> None:
+        self._detener.set()
+        self.join()
+
+
+class Perfilador:
+    """
+    Perfila las etapas y reglas de los chunks seleccionados.
+
+    Cada bloque medido por `Medidor` (una etapa o una regla dentro de una etapa)
+    se perfila por separado. Al cerrar el chunk se escribe un archivo por bloque,
+    nombrado por chunk, etapa y regla (ej.
+    `chunk00003_expansion_ReglaDescripcionCuraci.pstats`):
+
+    - "cprofile": estadísticas de cProfile (`.pstats`, para `pstats`, snakeviz o
+      gprof2dot);
+    - "muestreo": pilas colapsadas (`.collapsed`, para flamegraph.pl o
+      speedscope), muestreadas cada `intervalo_s` desde un hilo del proceso. Su
+      sobrecarga es menor que la de cProfile, pero con GIL las muestras solo se
+      toman cuando el hilo perfilado libera el intérprete.
+
+    Solo se perfila el hilo que ejecuta cada bloque, así que el pipeline debe
+    procesar los chunks en serie.
+
+    Args:
+        directorio (str | Path): Directorio de los archivos.
+        modo (str): "cprofile" o "muestreo".
+        chunks (set[int] | None): Números de chunk (desde 1) a perfilar.
+        fraccion (float | None): Probabilidad de perfilar cada chunk. Sin `chunks`
+            ni `fraccion` se perfilan todos.
+        intervalo_s (float): Intervalo entre muestras en modo "muestreo".
+        semilla (int | None): Semilla de la selección por `fraccion`.
+    """
+
+    def __init__(
+        self,
+        directorio: str | Path,
+        modo: Literal["cprofile", "muestreo"] = "cprofile",
+        chunks: set[int] | None = None,
+        fraccion: float | None = None,
+        intervalo_s: float = 0.005,
+        semilla: int | None = None,
+    ):
+        self.directorio = Path(directorio)
+        self.modo = modo
+        self.chunks = chunks
+        self.fraccion = fraccion
+        self.intervalo_s = intervalo_s
+        self.perfilados: list[int] = []
+        self._azar = random.Random(semilla)
+        self._perfiles: dict[tuple[str, str | None], cProfile.Profile | Counter] = {}
+        self._muestreador: _Muestreador | None = None
+        self._chunk = 1
+        self._activo = self._seleccionar(1)
+
+    def _seleccionar(self, numero: int) -> bool:
+        if self.chunks is None and self.fraccion is None:
+            return True
+        if self.chunks is not None and numero in self.chunks:
+            return True
+        return self.fraccion is not None and self._azar.random() < self.fraccion
+
+    @contextmanager
+    def perfilar(self, etapa: str, regla: str | None = None) -> Iterator[None]:
+        """Perfila el bloque como parte de la etapa y regla, si el chunk se eligió."""
+        if not self._activo:
+            yield
+            return
+
+        clave = (etapa, regla)
+        if self.modo == "cprofile":
+            perfil = self._perfiles.setdefault(clave, cProfile.Profile())
+            perfil.enable()
+            try:
+                yield
+            finally:
+                perfil.disable()
+            return
+
+        if self._muestreador is None:
+            self._muestreador = _Muestreador(self.intervalo_s)
+            self._muestreador.start()
+        pilas = self._perfiles.setdefault(clave, Counter())
+        with self._muestreador.lock:
+            self._muestreador.objetivo = (threading.get_ident(), pilas)
+        try:
+            yield
+        finally:
+            with self._muestreador.lock:
+                self._muestreador.objetivo = None
+
+    def cerrar_chunk(self, numero: int) -> None:
+        """Escribe los perfiles del chunk y decide si se perfila el siguiente."""
+        if self._activo and self._perfiles:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            for (etapa, regla), perfil in self._perfiles.items():
+                nombre = f"chunk{numero:05d}_{etapa}" + (f"_{regla}" if regla else "")
+                if isinstance(perfil, cProfile.Profile):
+                    perfil.dump_stats(self.directorio / f"{nombre}.pstats")
+                    continue
+                (self.directorio / f"{nombre}.collapsed").write_text(
+                    "".join(f"{pila} {n}\n" for pila, n in perfil.most_common()),
+                    encoding="utf-8",
+                )
+            self.perfilados.append(numero)
+
+        self._perfiles = {}
+        self._chunk = numero + 1
+        self._activo = self._seleccionar(self._chunk)
+
+    def cerrar(self) -> None:
+        """Detiene el hilo de muestreo y registra los chunks perfilados."""
+        if self._muestreador is not None:
+            self._muestreador.detener()
+            self._muestreador = None
+        logger.info(
+            f"Perfiles ({self.modo}) de {len(self.perfilados)} chunks en "
+            f"{self.directorio}: {self.perfilados}."
+        )
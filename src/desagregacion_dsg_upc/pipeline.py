@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import ConfigError
+
+from .esquema import COLUMNA_ID_ORIGEN
+from .instrumentacion import Instrumentacion
+from .rules import MotorReglas
+from .rules.base import COLUMNAS_AUXILIARES
+from .salida import crear_escritor
+
+if TYPE_CHECKING:
+    from .reanudacion import Reanudacion
+
+
+def _ordenar_y_limpiar(df: pd.DataFrame) -> pd.DataFrame:
+    if COLUMNA_ID_ORIGEN in df.columns:
+        df = df.sort_values(COLUMNA_ID_ORIGEN, kind="stable")
+    else:
+        df = df.sort_index(kind="stable")
+
+    return df.drop(columns=COLUMNAS_AUXILIARES, errors="ignore")
+
+
+def iterar_chunk(df: pd.DataFrame, motor: MotorReglas) -> Iterator[pd.DataFrame]:
+    """
+    Aplica las reglas de desagregación a un chunk, por sub-lotes.
+
+    Cada sub-lote cubre un rango contiguo de filas de origen y respeta el
+    presupuesto de memoria del motor, de modo que puede escribirse antes de
+    expandir el siguiente.
+
+    Args:
+        df (pd.DataFrame): Chunk de datos a procesar.
+        motor (MotorReglas): Motor con las reglas a aplicar.
+
+    Yields:
+        pd.DataFrame: Sub-lotes desagregados, en el orden original de las filas.
+    """
+    for parte in motor.iterar(df):
+        with motor.medir("expansion"):
+            parte = _ordenar_y_limpiar(parte)
+        yield parte
+
+
+def procesar_chunk(df: pd.DataFrame, motor: MotorReglas) -> pd.DataFrame:
+    """
+    Aplica las reglas de desagregación a un único chunk.
+
+    Cada fila se asigna a una sola regla según la precedencia del motor; las filas
+    que no cumplen ninguna regla se conservan sin cambios.
+
+    Args:
+        df (pd.DataFrame): Chunk de datos a procesar.
+        motor (MotorReglas): Motor con las reglas a aplicar.
+
+    Returns:
+        pd.DataFrame: Chunk desagregado, en el orden original de las filas.
+    """
+    return _ordenar_y_limpiar(motor.ejecutar(df))
+
+
+def ejecutar_pipeline(
+    chunks: Iterable[pd.DataFrame],
+    output_file: str,
+    motor: MotorReglas | None = None,
+    output_format: str | None = None,
+    output_compression: str | None = None,
+    trabajadores: int = 1,
+    modo_paralelo: str = "procesos",
+    anexar: bool = False,
+    reanudacion: Reanudacion | None = None,
+    instrumentacion: Instrumentacion | None = None,
+) -> int:
+    """
+    Procesa y escribe cada chunk antes de solicitar el siguiente.
+
+    La memoria utilizada queda acotada por el tamaño del chunk, sin importar el
+    tamaño total de la consulta.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks de entrada (ej. de `fetch_data_in_chunks`).
+        output_file (str): Ruta del archivo de salida. Se reemplaza de forma atómica
+            al terminar; si el pipeline falla, la salida anterior queda intacta.
+        motor (MotorReglas | None): Motor de reglas. Por defecto se construye con
+            la precedencia configurada en `processing.precedencia_reglas`.
+        output_format (str | None): "csv" o "parquet"; por defecto según la extensión.
+        output_compression (str | None): Compresión de la salida.
+        trabajadores (int): Procesos o hilos para desagregar chunks en paralelo. Con
+            más de uno, los chunks se reparten en un pool y se escriben en su orden
+            original.
+        modo_paralelo (str): "procesos" o "hilos" (requiere Python free-threaded;
+            con GIL se procesa en serie).
+        anexar (bool): Agrega las filas al final de la salida existente en lugar de
+            reemplazarla (ej. ejecuciones incrementales).
+        reanudacion (Reanudacion | None): Extracción reanudable de la que provienen
+            los chunks. La salida se escribe en un temporal que se conserva si el
+            pipeline falla, y después de escribir cada chunk se guarda un punto de
+            control desde el cual continuar.
+        instrumentacion (Instrumentacion | None): Mide cada etapa y cada regla,
+            emite sus registros al cerrar cada chunk y un reporte al final.
+
+    Returns:
+        int: Número total de filas escritas.
+    """
+    if motor is None:
+        motor = MotorReglas.desde_configuracion()
+
+    perfilando = instrumentacion is not None and instrumentacion.perfilador is not None
+    if perfilando and trabajadores > 1:
+        logger.warning(
+            "El perfilado solo cubre el hilo principal: los chunks se procesan en serie."
+        )
+        trabajadores = 1
+
+    if instrumentacion is not None:
+        # El medidor viaja con el motor a los trabajadores del modo paralelo.
+        motor.medidor = instrumentacion.medidor
+        chunks = instrumentacion.observar(chunks)
+
+    if trabajadores > 1:
+        # Importación diferida: el módulo paralelo usa `iterar_chunk` de este módulo.
+        from .paralelo import procesar_en_hilos, procesar_en_procesos
+
+        if modo_paralelo == "hilos":
+            resultados = procesar_en_hilos(chunks, motor, trabajadores)
+        elif modo_paralelo == "procesos":
+            resultados = procesar_en_procesos(chunks, motor, trabajadores)
+        else:
+            raise ConfigError(
+                f"Modo paralelo no soportado: {modo_paralelo}. "
+                "Opciones: ['procesos', 'hilos']"
+            )
+    else:
+        resultados = ((len(chunk), iterar_chunk(chunk, motor)) for chunk in chunks)
+
+    filas_entrada = 0
+
+    with crear_escritor(
+        output_file,
+        output_format,
+        output_compression,
+        anexar,
+        reanudable=reanudacion is not None,
+    ) as escritor:
+        if reanudacion is not None:
+            reanudacion.preparar(escritor)
+
+        for numero, (filas_leidas, partes) in enumerate(resultados, start=1):
+            filas_chunk = 0
+            for parte in partes:
+                with motor.medir("escritura", filas_entrada=len(parte)):
+                    escritor.escribir(parte)
+                filas_chunk += len(parte)
+
+            if reanudacion is not None:
+                reanudacion.confirmar(escritor)
+            filas_entrada += filas_leidas
+            logger.info(
+                f"Chunk {numero}: {filas_leidas} filas leídas, "
+                f"{filas_chunk} filas escritas."
+            )
+            if instrumentacion is not None:
+                instrumentacion.cerrar_chunk(numero, filas_leidas, filas_chunk)
+
+    if reanudacion is not None:
+        reanudacion.finalizar()
+
+    motor.registrar_estadisticas()
+    if instrumentacion is not None:
+        instrumentacion.reporte()
+    logger.info(
+        f"Pipeline finalizado: {filas_entrada} filas leídas, "
+        f"{escritor.filas_escritas} filas escritas en {output_file}."
+    )
+    return escritor.filas_escritas
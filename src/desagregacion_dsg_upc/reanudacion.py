@@ -0,0 +1,239 @@
+import hashlib
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Self
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import ConfigError
+from desagregacion_dsg_upc.config.settings import ProcessingConfig
+from desagregacion_dsg_upc.esquema import columnas_requeridas, construir_esquema
+from desagregacion_dsg_upc.incremental import (
+    SeguimientoMarca,
+    cargar_json,
+    guardar_json,
+    valor_a_json,
+    valor_desde_json,
+)
+from desagregacion_dsg_upc.salida import EscritorSalida
+
+
+class PuntoControl:
+    """
+    Punto de control (JSON) de una extracción reanudable.
+
+    Guarda, por ruta de salida, la última llave de paginación escrita y la posición
+    de la salida parcial en ese momento. La firma identifica la extracción (consulta,
+    columnas, esquema, marca de agua): un punto de control con otra firma se
+    descarta, ya que no corresponde a la misma consulta.
+
+    Args:
+        ruta (str | Path): Archivo JSON de los puntos de control.
+        clave (str): Ruta de la salida a la que pertenece.
+        firma (str): Identificador de la extracción.
+    """
+
+    def __init__(self, ruta: str | Path, clave: str, firma: str):
+        self.ruta = Path(ruta)
+        self.clave = clave
+        self.firma = firma
+
+    def leer(self) -> dict[str, Any] | None:
+        """Punto de control vigente de la clave, o None si no hay ninguno."""
+        entrada = cargar_json(self.ruta).get(self.clave)
+        if entrada is None:
+            return None
+
+        if entrada["firma"] != self.firma:
+            logger.warning(
+                f"El punto de control de {self.clave} corresponde a otra extracción; "
+                "se descarta."
+            )
+            self.eliminar()
+            return None
+
+        entrada = dict(entrada)
+        for campo in ("ultima_llave", "marca"):
+            if entrada.get(campo) is not None:
+                entrada[campo] = valor_desde_json(*entrada[campo])
+        return entrada
+
+    def guardar(
+        self,
+        ultima_llave: Any,
+        filas_leidas: int,
+        filas_escritas: int,
+        desplazamiento: int,
+        marca: Any | None = None,
+    ) -> None:
+        """Guarda el punto de control; el archivo se reemplaza de forma atómica."""
+        estado = cargar_json(self.ruta)
+        estado[self.clave] = {
+            "firma": self.firma,
+            "ultima_llave": valor_a_json(ultima_llave),
+            "filas_leidas": filas_leidas,
+            "filas_escritas": filas_escritas,
+            "desplazamiento": desplazamiento,
+            "marca": None if marca is None else valor_a_json(marca),
+            "actualizado": datetime.now().isoformat(timespec="seconds"),
+        }
+        guardar_json(self.ruta, estado)
+
+    def eliminar(self) -> None:
+        """Elimina el punto de control de la clave."""
+        estado = cargar_json(self.ruta)
+        if estado.pop(self.clave, None) is not None:
+            guardar_json(self.ruta, estado)
+
+
+class Reanudacion:
+    """
+    Coordina una extracción paginada por llave con la escritura de la salida.
+
+    Después de escribir cada chunk se confirma la salida parcial y se guarda en el
+    punto de control la última llave del chunk, las filas leídas y escritas y el
+    tamaño de la salida parcial. Si la ejecución se interrumpe, la siguiente trunca
+    la salida parcial a ese tamaño y pide las páginas posteriores a esa llave, por
+    lo que nada se lee dos veces ni se pierde.
+
+    Los chunks se entregan al pipeline en el orden de lectura (también en modo
+    paralelo), así que la llave de cada chunk confirmado se toma en ese orden.
+
+    Args:
+        punto_control (PuntoControl): Almacén del punto de control.
+        columna (str): Columna de paginación (única, sin nulos y ordenable).
+        seguimiento (SeguimientoMarca | None): En ejecuciones incrementales, su
+            máximo se guarda y se restaura con el punto de control.
+    """
+
+    def __init__(
+        self,
+        punto_control: PuntoControl,
+        columna: str,
+        seguimiento: SeguimientoMarca | None = None,
+    ):
+        self.punto_control = punto_control
+        self.columna = columna
+        self.seguimiento = seguimiento
+        self._pendientes: deque[tuple[Any, int]] = deque()
+
+        estado = punto_control.leer() or {}
+        self.ultima_llave: Any = estado.get("ultima_llave")
+        self.filas_leidas: int = estado.get("filas_leidas", 0)
+        self.filas_escritas: int = estado.get("filas_escritas", 0)
+        self.desplazamiento: int | None = estado.get("desplazamiento")
+        if seguimiento is not None and estado.get("marca") is not None:
+            seguimiento.maximo = estado["marca"]
+
+    @classmethod
+    def desde_configuracion(
+        cls,
+        processing: ProcessingConfig,
+        marca: Any | None = None,
+        seguimiento: SeguimientoMarca | None = None,
+    ) -> Self:
+        """
+        Crea la reanudación de `processing.output_file` con la columna y el archivo
+        de punto de control configurados.
+
+        Si la salida parcial no existe o es menor que el punto de control, este se
+        descarta y la extracción empieza desde el principio.
+
+        Raises:
+            ConfigError: Si no se configuró `columna_paginacion`.
+        """
+        if processing.columna_paginacion is None:
+            raise ConfigError(
+                "El modo reanudable requiere 'columna_paginacion': una columna única, "
+                "sin nulos y ordenable (ej. la llave primaria)."
+            )
+
+        columnas = (
+            columnas_requeridas(processing)
+            if processing.columns_passthrough is not None
+            else None
+        )
+        esquema = (
+            construir_esquema(processing) if processing.extraccion_tipada else None
+        )
+        contenido = json.dumps(
+            {
+                "query": processing.query_input.strip().rstrip(";"),
+                "columna": processing.columna_paginacion,
+                "columnas": columnas,
+                "esquema": esquema,
+                "marca": marca,
+                "formato": processing.output_format,
+                "compresion": processing.output_compression,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        punto_control = PuntoControl(
+            processing.archivo_checkpoint,
+            processing.output_file,
+            hashlib.sha256(contenido.encode("utf-8")).hexdigest(),
+        )
+
+        reanudacion = cls(punto_control, processing.columna_paginacion, seguimiento)
+        if reanudacion.desplazamiento is not None:
+            parcial = EscritorSalida.ruta_parcial(processing.output_file)
+            if not parcial.exists() or (
+                parcial.stat().st_size < reanudacion.desplazamiento
+            ):
+                logger.warning(
+                    f"La salida parcial {parcial} no corresponde al punto de "
+                    "control; la extracción empieza desde el principio."
+                )
+                punto_control.eliminar()
+                reanudacion = cls(
+                    punto_control, processing.columna_paginacion, seguimiento
+                )
+        if reanudacion.reanudando:
+            logger.info(
+                f"Reanudando después de {reanudacion.columna} = "
+                f"{reanudacion.ultima_llave} ({reanudacion.filas_leidas} filas leídas)."
+            )
+        return reanudacion
+
+    @property
+    def reanudando(self) -> bool:
+        """Indica si hay un punto de control desde el cual continuar."""
+        return self.desplazamiento is not None
+
+    def observar(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Entrega los chunks sin modificarlos y registra la última llave de cada uno."""
+        for chunk in chunks:
+            self._pendientes.append((chunk[self.columna].iloc[-1], len(chunk)))
+            yield chunk
+
+    def preparar(self, escritor: EscritorSalida) -> None:
+        """Trunca la salida parcial al punto de control, si se está reanudando."""
+        if self.reanudando:
+            escritor.reanudar(self.desplazamiento, self.filas_escritas)
+
+    def confirmar(self, escritor: EscritorSalida) -> None:
+        """Registra como escrito el siguiente chunk pendiente y guarda el punto."""
+        self.ultima_llave, filas = self._pendientes.popleft()
+        self.filas_leidas += filas
+        if not escritor.abierto:
+            # Chunk sin filas de salida: no hay nada que confirmar.
+            return
+
+        self.desplazamiento = escritor.confirmar()
+        self.filas_escritas = escritor.filas_escritas
+        self.punto_control.guardar(
+            self.ultima_llave,
+            self.filas_leidas,
+            self.filas_escritas,
+            self.desplazamiento,
+            None if self.seguimiento is None else self.seguimiento.maximo,
+        )
+
+    def finalizar(self) -> None:
+        """Elimina el punto de control una vez publicada la salida."""
+        self.punto_control.eliminar()
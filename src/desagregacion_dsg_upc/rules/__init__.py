@@ -1,4 +1,26 @@
 from .base import ReglaDesagregacion
 from .consulta_cantidad_menor import ReglaConsultaCantidadMenor
+from .consulta_psicologia_cantidad_mayor_15 import (
+    ReglaConsultaPsicologiaCantidadMayor15,
+)
+from .consulta_psicologia_cantidad_menor_igual_15 import (
+    ReglaConsultaPsicologiaCantidadMenor15,
+)
+from .contiene_curaci import ReglaDescripcionCuraci
+from .contiene_domicili import ReglaDescripcionDomicili
+from .contiene_terapia_codigo_osi import ReglaDescripcionTerapiaFiltroCodigos
+from .motor import COLUMNA_ID_REGLA, MotorReglas
+from .precedencia import REGLAS_POR_DEFECTO
 
-__all__ = ["ReglaDesagregacion", "ReglaConsultaCantidadMenor"]
+__all__ = [
+    "COLUMNA_ID_REGLA",
+    "REGLAS_POR_DEFECTO",
+    "MotorReglas",
+    "ReglaConsultaCantidadMenor",
+    "ReglaConsultaPsicologiaCantidadMayor15",
+    "ReglaConsultaPsicologiaCantidadMenor15",
+    "ReglaDesagregacion",
+    "ReglaDescripcionCuraci",
+    "ReglaDescripcionDomicili",
+    "ReglaDescripcionTerapiaFiltroCodigos",
+]
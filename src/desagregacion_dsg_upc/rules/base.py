@@ -1,11 +1,33 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
 import pandas as pd
 
 from desagregacion_dsg_upc import settings
 
+from .coincidencias import COLUMNA_MASCARA_PALABRAS, comparador
+
+# Columnas de trabajo que agregan las reglas y que no forman parte de la salida.
+COLUMNAS_AUXILIARES = [
+    "intervalo_dias",
+    "divisor_costo",
+    "cantidad",
+    "secuencia",
+    "cantidad_modificada",
+    "divisor_valor_liquidado",
+    COLUMNA_MASCARA_PALABRAS,
+]
+
 
 class ReglaDesagregacion(ABC):
+    # Palabras que la regla busca en la descripción CUPS. Se registran en el
+    # comparador compartido para calcular todas las palabras en una sola pasada.
+    palabras_clave: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        comparador.registrar(cls.palabras_clave)
+
     @abstractmethod
     def identificar(self, df: pd.DataFrame) -> pd.Series:
         pass
@@ -21,41 +43,70 @@ class ReglaDesagregacion(ABC):
         columns_dinero: list[str],
         column_fecha: str,
     ):
-        df_expanded = df.loc[df.index.repeat(df[column_desagregar])].copy()
-
-        df_expanded["secuencia"] = df_expanded.groupby(level=0).cumcount()
-
-        for col in columns_dinero:
-            df_expanded[col] = (df_expanded[col] / df_expanded["divisor_costo"]).round(
-                1
-            )
+        # Posición de origen y número de secuencia de cada fila expandida,
+        # calculados en tiempo lineal sobre arreglos NumPy. No dependen de las
+        # etiquetas del índice, que pueden repetirse entre chunks; el linaje de
+        # cada fila expandida queda en `id_fila_origen`, que se copia con `take`.
+        repeticiones = df[column_desagregar].to_numpy(dtype=np.int64)
+        posiciones = np.repeat(np.arange(len(df)), repeticiones)
+        inicios = np.cumsum(repeticiones) - repeticiones
+        secuencia = np.arange(len(posiciones)) - np.repeat(inicios, repeticiones)
+
+        # Los valores por fila de origen se calculan antes de expandir.
+        divisor = df["divisor_costo"].to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columnas = {
+                col: np.round(
+                    df[col].to_numpy(dtype=np.float64, na_value=np.nan) / divisor, 1
+                )
+                for col in columns_dinero
+            }
+        columnas[settings.processing.column_desagregacion] = df["cantidad"].to_numpy(
+            dtype=np.int64
+        )
 
-        dias_a_sumar = pd.to_timedelta(
-            df_expanded["secuencia"] * df_expanded["intervalo_dias"], unit="D"
+        df_expanded = df.assign(**columnas).take(posiciones)
+        df_expanded["secuencia"] = secuencia
+
+        # Desplazamiento en enteros, en la misma unidad de la columna de fecha.
+        # Solo se convierte el intervalo de las filas que producen resultados:
+        # con cantidad 0 puede ser infinito (ej. 30 / 0) y esas filas se descartan.
+        unidad = f"timedelta64[{df[column_fecha].dt.unit}]"
+        con_filas = repeticiones > 0
+        intervalo = np.zeros(len(df), dtype=np.int64)
+        intervalo[con_filas] = (
+            pd.to_timedelta(df["intervalo_dias"].to_numpy()[con_filas], unit="D")
+            .to_numpy(dtype=unidad)
+            .view(np.int64)
         )
+        dias_a_sumar = (secuencia * intervalo[posiciones]).view(unidad)
 
         df_expanded[column_fecha] = df_expanded[column_fecha] + dias_a_sumar
 
-        df_expanded[settings.processing.column_desagregacion] = df_expanded[
-            "cantidad"
-        ].astype(int)
-
         return df_expanded
 
-    def ejecutar_desagregacion(self, df: pd.DataFrame):
-        mask = self.identificar(df)
-
-        df_subset = pd.DataFrame(df[mask].copy())
+    def _repeticiones(self, df: pd.DataFrame) -> np.ndarray:
+        """Número de filas que produce cada fila de `df` (ya con sus parámetros)."""
+        return df[settings.processing.column_desagregacion].to_numpy(dtype=np.int64)
 
-        if df_subset.empty:
-            return df
-
-        df_params = self._calcular_parametros(df_subset)
-        df_final = self._desagregar(
+    def _expandir_parametros(self, df_params: pd.DataFrame) -> pd.DataFrame:
+        return self._desagregar(
             df_params,
             settings.processing.column_desagregacion,
             settings.processing.columns_dinero,
             settings.processing.column_fecha,
         )
 
-        return df_final
+    def expandir(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Desagrega filas que ya se sabe que corresponden a esta regla."""
+        return self._expandir_parametros(self._calcular_parametros(df))
+
+    def ejecutar_desagregacion(self, df: pd.DataFrame):
+        mask = self.identificar(df)
+
+        df_subset = pd.DataFrame(df[mask])
+
+        if df_subset.empty:
+            return df
+
+        return self.expandir(df_subset)
@@ -0,0 +1,180 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from desagregacion_dsg_upc import settings
+
+COLUMNA_MASCARA_PALABRAS = "mascara_palabras"
+# Bit más alto de la máscara, reservado a los códigos OSI que se desagregan como
+# terapia (`processing.codigos_osi_terapia`); las palabras usan los demás.
+BIT_CODIGO_TERAPIA = np.uint64(1 << 63)
+
+
+def normalizar(texto: str) -> str:
+    """Convierte a mayúsculas y elimina tildes: "Curación" -> "CURACION"."""
+    descompuesto = unicodedata.normalize("NFKD", texto.upper())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class ComparadorDescripciones:
+    """
+    Clasifica las descripciones CUPS con una máscara de bits por palabra clave.
+
+    Cada regla registra sus palabras clave (`ReglaDesagregacion.palabras_clave`) y
+    cada palabra recibe un bit. La columna se factoriza una vez por chunk (para
+    columnas `category` se usan directamente sus códigos) y cada descripción
+    distinta se normaliza (mayúsculas, sin tildes) y se recorre una sola vez para
+    calcular todos sus bits. Los resultados por descripción se guardan en un LRU
+    acotado que se conserva entre chunks. `MotorReglas` calcula la máscara una vez
+    por chunk y la comparte con las reglas en la columna `mascara_palabras`, de modo
+    que sus condiciones quedan como pruebas de bits.
+
+    Es seguro usarlo desde varios hilos: el LRU se protege con un lock.
+
+    Args:
+        max_descripciones (int): Máximo de descripciones en el LRU.
+    """
+
+    def __init__(self, max_descripciones: int = 100_000):
+        self.max_descripciones = max_descripciones
+        self.palabras: list[str] = []
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def registrar(self, palabras: Iterable[str]) -> None:
+        """Asigna un bit a cada palabra nueva. Invalida los resultados guardados."""
+        nuevas = [
+            palabra
+            for palabra in dict.fromkeys(normalizar(p) for p in palabras)
+            if palabra not in self.palabras
+        ]
+        if not nuevas:
+            return
+
+        if len(self.palabras) + len(nuevas) > 63:
+            raise ValueError("La máscara de palabras clave admite hasta 63 palabras.")
+
+        with self._lock:
+            self.palabras.extend(nuevas)
+            self._cache.clear()
+
+    def bit(self, palabra: str) -> int:
+        """Bit asignado a la palabra, registrándola si aún no lo está."""
+        palabra = normalizar(palabra)
+        if palabra not in self.palabras:
+            self.registrar([palabra])
+        return 1 << self.palabras.index(palabra)
+
+    def mascara(self, serie: pd.Series) -> pd.Series:
+        """
+        Calcula la máscara de bits de cada fila de la columna de descripciones.
+
+        Args:
+            serie (pd.Series): Columna de descripciones.
+
+        Returns:
+            pd.Series: Columna entera sin signo (`mascara_palabras`) con un bit por
+            palabra registrada; 0 para descripciones nulas.
+        """
+        return pd.Series(
+            self._calcular(serie), index=serie.index, name=COLUMNA_MASCARA_PALABRAS
+        )
+
+    def clasificar(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Máscara del chunk: los bits de palabra de cada descripción y
+        `BIT_CODIGO_TERAPIA` para los códigos OSI de terapia.
+
+        Args:
+            df (pd.DataFrame): Chunk con las columnas de código y descripción.
+
+        Returns:
+            pd.Series: Columna `mascara_palabras` (uint64), lista para las reglas.
+        """
+        mascara = self.mascara(df[settings.processing.column_descripcion_cups])
+        return mascara | self.bits_codigo(df[settings.processing.column_codigo_osi])
+
+    def contiene(self, df: pd.DataFrame, palabra: str) -> pd.Series:
+        """
+        Máscara booleana de las filas cuya descripción contiene la palabra, sin
+        distinguir mayúsculas ni tildes.
+
+        Si el chunk ya trae la columna `mascara_palabras` (la agrega `MotorReglas`)
+        se usa directamente; si no, se calcula a partir de la columna de
+        descripciones configurada.
+        """
+        bit = self.bit(palabra)
+        if COLUMNA_MASCARA_PALABRAS in df.columns:
+            mascara = df[COLUMNA_MASCARA_PALABRAS]
+        else:
+            mascara = self.mascara(df[settings.processing.column_descripcion_cups])
+        return (mascara & bit) != 0
+
+    def es_codigo_terapia(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Máscara booleana de las filas cuyo código OSI está en
+        `processing.codigos_osi_terapia`.
+
+        Como en `contiene`, si el chunk ya trae `mascara_palabras` se prueba su bit;
+        si no, se busca el código en la lista configurada.
+        """
+        if COLUMNA_MASCARA_PALABRAS in df.columns:
+            return (df[COLUMNA_MASCARA_PALABRAS] & BIT_CODIGO_TERAPIA) != 0
+        return df[settings.processing.column_codigo_osi].isin(
+            settings.processing.codigos_osi_terapia
+        )
+
+    def bits_codigo(self, codigos: pd.Series) -> np.ndarray:
+        """`BIT_CODIGO_TERAPIA` (uint64) para los códigos OSI de terapia, 0 si no."""
+        return np.where(
+            codigos.isin(settings.processing.codigos_osi_terapia),
+            BIT_CODIGO_TERAPIA,
+            np.uint64(0),
+        )
+
+    def bits_de(self, descripciones: Iterable[str]) -> np.ndarray:
+        """Máscara de bits uint64 de cada descripción (0 para nulos)."""
+        serie = pd.Series(list(descripciones), dtype=object)
+        return self._calcular(serie).astype(np.uint64)
+
+    def _calcular(self, serie: pd.Series) -> np.ndarray:
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            unicos = serie.cat.categories
+        else:
+            codigos, unicos = pd.factorize(serie)
+
+        dtype = np.min_scalar_type((1 << max(len(self.palabras), 1)) - 1)
+        por_unico = np.fromiter(
+            (self._bits(str(descripcion)) for descripcion in unicos),
+            dtype=dtype,
+            count=len(unicos),
+        )
+        # El código -1 (nulo) apunta al 0 agregado al final.
+        return np.append(por_unico, dtype.type(0))[codigos]
+
+    def _bits(self, descripcion: str) -> int:
+        with self._lock:
+            resultado = self._cache.get(descripcion)
+            if resultado is not None:
+                self._cache.move_to_end(descripcion)
+                return resultado
+
+        normalizada = normalizar(descripcion)
+        resultado = 0
+        for posicion, palabra in enumerate(self.palabras):
+            if palabra in normalizada:
+                resultado |= 1 << posicion
+
+        with self._lock:
+            self._cache[descripcion] = resultado
+            if len(self._cache) > self.max_descripciones:
+                self._cache.popitem(last=False)
+        return resultado
+
+
+comparador = ComparadorDescripciones(settings.processing.max_cache_descripciones)
@@ -3,6 +3,7 @@ import pandas as pd
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaConsultaCantidadMenor(ReglaDesagregacion):
@@ -11,12 +12,10 @@ class ReglaConsultaCantidadMenor(ReglaDesagregacion):
     Logica Fecha: Se espacian cada (30 / cantidad procedimiento) dias.
     """
 
+    palabras_clave = ("CONSULTA",)
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_consulta = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("CONSULTA", case=False, na=False)
-        )
+        mask_consulta = comparador.contiene(df, "CONSULTA")
 
         mask_cantidad = df[settings.processing.column_desagregacion] <= 6
 
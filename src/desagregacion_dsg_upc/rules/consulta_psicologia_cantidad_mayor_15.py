@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
 
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaConsultaPsicologiaCantidadMayor15(ReglaDesagregacion):
@@ -11,18 +13,12 @@ class ReglaConsultaPsicologiaCantidadMayor15(ReglaDesagregacion):
     Logica Fecha: Se suma 1 dia por cada procedimiento
     """
 
+    palabras_clave = ("CONSULTA", "PSICOLOGIA")
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_consulta = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("CONSULTA", case=False, na=False)
-        )
+        mask_consulta = comparador.contiene(df, "CONSULTA")
 
-        mask_psicologia = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("PSICOLOGIA", case=False, na=False)
-        )
+        mask_psicologia = comparador.contiene(df, "PSICOLOGIA")
 
         mask_cantidad = df[settings.processing.column_desagregacion] > 15
 
@@ -47,6 +43,9 @@ class ReglaConsultaPsicologiaCantidadMayor15(ReglaDesagregacion):
 
         return df
 
+    def _repeticiones(self, df: pd.DataFrame) -> np.ndarray:
+        return df["cantidad_modificada"].to_numpy(dtype=np.int64)
+
     def _desagregar(
         self,
         df: pd.DataFrame,
@@ -3,6 +3,7 @@ import pandas as pd
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaConsultaPsicologiaCantidadMenor15(ReglaDesagregacion):
@@ -11,18 +12,12 @@ class ReglaConsultaPsicologiaCantidadMenor15(ReglaDesagregacion):
     Logica Fecha: Se suma 1 dia por cada procedimiento
     """
 
+    palabras_clave = ("CONSULTA", "PSICOLOGIA")
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_consulta = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("CONSULTA", case=False, na=False)
-        )
-
-        mask_psicologia = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("PSICOLOGIA", case=False, na=False)
-        )
+        mask_consulta = comparador.contiene(df, "CONSULTA")
+
+        mask_psicologia = comparador.contiene(df, "PSICOLOGIA")
 
         mask_cantidad = df[settings.processing.column_desagregacion] <= 15
 
@@ -3,6 +3,7 @@ import pandas as pd
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaDescripcionCuraci(ReglaDesagregacion):
@@ -10,12 +11,10 @@ class ReglaDescripcionCuraci(ReglaDesagregacion):
     Aplica a: Descripción que contengan curaci
     """
 
+    palabras_clave = ("CURACI",)
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_curaci = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("CURACI", case=False, na=False)
-        )
+        mask_curaci = comparador.contiene(df, "CURACI")
 
         return mask_curaci
 
@@ -3,6 +3,7 @@ import pandas as pd
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaDescripcionDomicili(ReglaDesagregacion):
@@ -10,12 +11,10 @@ class ReglaDescripcionDomicili(ReglaDesagregacion):
     Aplica a: Descripción que contengan domicili
     """
 
+    palabras_clave = ("DOMICILI",)
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_domicili = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("DOMICILI", case=False, na=False)
-        )
+        mask_domicili = comparador.contiene(df, "DOMICILI")
 
         return mask_domicili
 
@@ -3,24 +3,21 @@ import pandas as pd
 from desagregacion_dsg_upc import settings
 
 from .base import ReglaDesagregacion
+from .coincidencias import comparador
 
 
 class ReglaDescripcionTerapiaFiltroCodigos(ReglaDesagregacion):
     """
-    Aplica a: Descripción que contengan terapia o que los codigos sean cualquiera de estos
-    (999301, 1003524, 991800)
+    Aplica a: Descripción que contengan terapia o que los codigos sean cualquiera de
+    `processing.codigos_osi_terapia` (por defecto 999301, 1003524, 991800)
     """
 
+    palabras_clave = ("TERAPIA",)
+
     def identificar(self, df: pd.DataFrame) -> pd.Series:
-        mask_terapia = (
-            df[settings.processing.column_descripcion_cups]
-            .astype(str)
-            .str.contains("TERAPIA", case=False, na=False)
-        )
-
-        mask_codigo = df[settings.processing.column_codigo_osi].isin(
-            [999301, 1003524, 991800]
-        )
+        mask_terapia = comparador.contiene(df, "TERAPIA")
+
+        mask_codigo = comparador.es_codigo_terapia(df)
 
         return mask_terapia | mask_codigo
 
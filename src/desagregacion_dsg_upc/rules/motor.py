@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import ConfigError, settings
+from desagregacion_dsg_upc.instrumentacion import Medidor
+
+from .base import COLUMNAS_AUXILIARES, ReglaDesagregacion
+from .coincidencias import COLUMNA_MASCARA_PALABRAS, comparador
+from .precedencia import REGLAS_POR_DEFECTO
+
+if TYPE_CHECKING:
+    from desagregacion_dsg_upc.catalogo import CatalogoProcedimientos
+
+COLUMNA_ID_REGLA = "id_regla"
+SIN_REGLA = 0
+
+
+class MotorReglas:
+    """
+    Asigna cada fila a una única regla y desagrega cada partición por separado.
+
+    Los predicados de todas las reglas se evalúan una sola vez sobre el chunk, con
+    la máscara de palabras clave (`mascara_palabras`) calculada una vez por chunk.
+    Cada fila queda asignada a la primera regla, según el orden de precedencia,
+    que la identifica; el código de esa regla se escribe en la columna `id_regla`
+    (0 si ninguna regla aplica). Las filas sin regla no pasan por la expansión.
+
+    Args:
+        reglas (Sequence[ReglaDesagregacion]): Reglas en orden de precedencia.
+        memoria_maxima (int | None): Presupuesto en bytes para la expansión de un
+            chunk. Sin presupuesto, cada chunk se expande de una sola vez.
+        catalogo (CatalogoProcedimientos | None): Catálogo de procedimientos. Si se
+            indica, las banderas de cada fila se toman del catálogo en lugar de
+            recorrer las descripciones del chunk.
+        medidor (Medidor | None): Si se indica, mide la clasificación y la
+            expansión de cada regla (ver `Instrumentacion`).
+    """
+
+    def __init__(
+        self,
+        reglas: Sequence[ReglaDesagregacion],
+        memoria_maxima: int | None = None,
+        catalogo: CatalogoProcedimientos | None = None,
+        medidor: Medidor | None = None,
+    ):
+        self.reglas = list(reglas)
+        self.catalogo = catalogo
+        self.codigos = np.array(
+            [REGLAS_POR_DEFECTO.index(type(regla)) + 1 for regla in self.reglas],
+            dtype=np.int8,
+        )
+        self.memoria_maxima = memoria_maxima
+        self.estadisticas: dict[str, list[int]] = {}
+        self.medidor = medidor
+
+    @classmethod
+    def desde_configuracion(
+        cls,
+        precedencia: Sequence[str] | None = None,
+        catalogo: CatalogoProcedimientos | None = None,
+    ) -> Self:
+        """
+        Construye el motor a partir de nombres de clase de regla.
+
+        Args:
+            precedencia (Sequence[str] | None): Nombres de las reglas en orden de
+                precedencia. Por defecto se usa `processing.precedencia_reglas` o,
+                si no está configurada, el orden de `REGLAS_POR_DEFECTO`.
+            catalogo (CatalogoProcedimientos | None): Catálogo de procedimientos.
+
+        Raises:
+            ConfigError: Si algún nombre no corresponde a una regla registrada.
+        """
+        if precedencia is None:
+            precedencia = settings.processing.precedencia_reglas
+
+        memoria_maxima = settings.processing.memoria_expansion_mb * 2**20
+
+        if precedencia is None:
+            return cls(
+                [regla() for regla in REGLAS_POR_DEFECTO], memoria_maxima, catalogo
+            )
+
+        disponibles = {regla.__name__: regla for regla in REGLAS_POR_DEFECTO}
+        desconocidas = [nombre for nombre in precedencia if nombre not in disponibles]
+        if desconocidas:
+            raise ConfigError(
+                f"Reglas desconocidas en precedencia_reglas: {desconocidas}. "
+                f"Disponibles: {list(disponibles)}"
+            )
+
+        return cls(
+            [disponibles[nombre]() for nombre in precedencia], memoria_maxima, catalogo
+        )
+
+    def asignar(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Calcula el código de regla de cada fila.
+
+        Returns:
+            np.ndarray: Arreglo int8 con el código de la regla asignada (0 sin regla).
+        """
+        df = self._con_mascara(df)
+        ids = np.full(len(df), SIN_REGLA, dtype=np.int8)
+
+        # Se recorre de menor a mayor precedencia para que la regla prioritaria
+        # sobrescriba a las demás.
+        for codigo, regla in zip(self.codigos[::-1], self.reglas[::-1]):
+            # Los nulos en columnas tipadas (Int32, category) no cumplen la regla.
+            with self.medir("clasificacion", regla, len(df)) as medicion:
+                mask = regla.identificar(df).to_numpy(dtype=bool, na_value=False)
+                medicion["filas_salida"] = int(mask.sum())
+            ids[mask] = codigo
+
+        return ids
+
+    def iterar(self, df: pd.DataFrame) -> Iterator[pd.DataFrame]:
+        """
+        Desagrega un chunk en sub-lotes que respetan el presupuesto de memoria.
+
+        Antes de materializar nada se estima el número de filas de salida (la suma
+        de las repeticiones de cada regla) y los bytes por fila. Si el total supera
+        `memoria_maxima`, el chunk se divide en rangos contiguos de filas de origen
+        cuya expansión queda por debajo del presupuesto.
+
+        Args:
+            df (pd.DataFrame): Chunk de datos a procesar.
+
+        Yields:
+            pd.DataFrame: Filas desagregadas y filas sin regla, con la columna
+            `id_regla`. Si ninguna fila aplica, se entrega el chunk sin copiarlo.
+        """
+        df = self._con_mascara(df)
+        ids = self.asignar(df)
+        df = df.assign(**{COLUMNA_ID_REGLA: ids})
+
+        if not ids.any():
+            yield df
+            return
+
+        # Parámetros y filas de salida por fila de origen, sin expandir todavía.
+        salidas = np.ones(len(df), dtype=np.int64)
+        particiones = []
+        for codigo, regla in zip(self.codigos, self.reglas):
+            posiciones = np.flatnonzero(ids == codigo)
+            if not len(posiciones):
+                continue
+
+            with self.medir("expansion", regla, len(posiciones)) as medicion:
+                df_params = regla._calcular_parametros(df.iloc[posiciones])
+                salidas[posiciones] = regla._repeticiones(df_params)
+                medicion["filas_salida"] = int(salidas[posiciones].sum())
+            particiones.append((regla, posiciones, df_params))
+            self._registrar(regla, len(posiciones), medicion["filas_salida"])
+
+        sub_lotes = self._dividir(df, salidas)
+
+        for inicio, fin in sub_lotes:
+            partes = []
+            for regla, posiciones, df_params in particiones:
+                desde, hasta = np.searchsorted(posiciones, [inicio, fin])
+                if desde < hasta:
+                    # Las filas de la regla se cuentan al calcular sus parámetros.
+                    with self.medir("expansion", regla):
+                        partes.append(
+                            regla._expandir_parametros(df_params.iloc[desde:hasta])
+                        )
+
+            with self.medir("expansion"):
+                df_rango = df.iloc[inicio:fin]
+                partes.append(df_rango[ids[inicio:fin] == SIN_REGLA])
+                sub_lote = pd.concat(partes)
+
+            yield sub_lote
+
+    def ejecutar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Desagrega un chunk aplicando a cada fila únicamente su regla asignada.
+
+        Args:
+            df (pd.DataFrame): Chunk de datos a procesar.
+
+        Returns:
+            pd.DataFrame: Filas desagregadas y filas sin regla, con la columna
+            `id_regla`. Si ninguna fila aplica, se devuelve el chunk sin copiarlo.
+        """
+        partes = list(self.iterar(df))
+        return partes[0] if len(partes) == 1 else pd.concat(partes)
+
+    def _con_mascara(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrega al chunk la columna `mascara_palabras`, si aún no la tiene.
+
+        Con catálogo, las banderas se toman de él; si no, se recorren las
+        descripciones y códigos del chunk. Las reglas leen la columna en lugar de calcularla
+        en cada predicado.
+        """
+        if COLUMNA_MASCARA_PALABRAS in df.columns:
+            return df
+        with self.medir("clasificacion", filas_entrada=len(df)):
+            if self.catalogo is not None:
+                mascara = self.catalogo.clasificar(df)
+            else:
+                mascara = comparador.clasificar(df)
+        return df.assign(**{COLUMNA_MASCARA_PALABRAS: mascara})
+
+    def medir(
+        self,
+        etapa: str,
+        regla: ReglaDesagregacion | None = None,
+        filas_entrada: int = 0,
+    ) -> AbstractContextManager[dict[str, int]]:
+        """Mide un bloque con `medidor` (ver `Medidor.medir`); sin medidor, no mide."""
+        if self.medidor is None:
+            return nullcontext({})
+        nombre = None if regla is None else type(regla).__name__
+        return self.medidor.medir(etapa, nombre, filas_entrada)
+
+    def _dividir(self, df: pd.DataFrame, salidas: np.ndarray) -> list[tuple[int, int]]:
+        """Rangos [inicio, fin) de filas de origen cuya expansión cabe en el presupuesto."""
+        bytes_por_fila = df.memory_usage(index=True).sum() / len(df) + 8 * len(
+            COLUMNAS_AUXILIARES
+        )
+        filas_estimadas = int(salidas.sum())
+        bytes_estimados = filas_estimadas * bytes_por_fila
+
+        if self.memoria_maxima is None or bytes_estimados <= self.memoria_maxima:
+            return [(0, len(df))]
+
+        max_filas = max(int(self.memoria_maxima // bytes_por_fila), 1)
+        acumuladas = np.cumsum(salidas)
+
+        cortes = []
+        inicio = 0
+        while inicio < len(df):
+            previas = acumuladas[inicio - 1] if inicio else 0
+            fin = int(np.searchsorted(acumuladas, previas + max_filas, side="right"))
+            # Una fila que por sí sola supera el presupuesto va en su propio sub-lote.
+            fin = max(fin, inicio + 1)
+            cortes.append((inicio, fin))
+            inicio = fin
+
+        logger.info(
+            f"Expansión estimada de {filas_estimadas} filas "
+            f"(~{bytes_estimados / 2**20:.0f} MB) supera el presupuesto de "
+            f"{self.memoria_maxima / 2**20:.0f} MB: se procesa en {len(cortes)} sub-lotes."
+        )
+        return cortes
+
+    def _registrar(self, regla: ReglaDesagregacion, entrada: int, salida: int) -> None:
+        nombre = type(regla).__name__
+        acumulado = self.estadisticas.setdefault(nombre, [0, 0])
+        acumulado[0] += entrada
+        acumulado[1] += salida
+        logger.debug(
+            f"{nombre}: {entrada} filas -> {salida} filas (x{salida / entrada:.2f})."
+        )
+
+    def acumular_estadisticas(self, estadisticas: dict[str, list[int]]) -> None:
+        """Suma a `self.estadisticas` las de otro motor (ej. un proceso trabajador)."""
+        for nombre, (entrada, salida) in estadisticas.items():
+            acumulado = self.estadisticas.setdefault(nombre, [0, 0])
+            acumulado[0] += entrada
+            acumulado[1] += salida
+
+    def registrar_estadisticas(self) -> None:
+        """Registra en el log las filas de entrada y salida acumuladas por regla."""
+        for nombre, (entrada, salida) in self.estadisticas.items():
+            logger.info(
+                f"{nombre}: {entrada} filas de origen -> {salida} filas desagregadas "
+                f"(factor de expansión {salida / entrada:.2f})."
+            )
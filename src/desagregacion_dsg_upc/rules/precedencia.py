@@ -0,0 +1,21 @@
+from .base import ReglaDesagregacion
+from .consulta_cantidad_menor import ReglaConsultaCantidadMenor
+from .consulta_psicologia_cantidad_mayor_15 import (
+    ReglaConsultaPsicologiaCantidadMayor15,
+)
+from .consulta_psicologia_cantidad_menor_igual_15 import (
+    ReglaConsultaPsicologiaCantidadMenor15,
+)
+from .contiene_curaci import ReglaDescripcionCuraci
+from .contiene_domicili import ReglaDescripcionDomicili
+from .contiene_terapia_codigo_osi import ReglaDescripcionTerapiaFiltroCodigos
+
+# Orden de precedencia: las reglas más específicas van primero.
+REGLAS_POR_DEFECTO: list[type[ReglaDesagregacion]] = [
+    ReglaConsultaPsicologiaCantidadMayor15,
+    ReglaConsultaPsicologiaCantidadMenor15,
+    ReglaConsultaCantidadMenor,
+    ReglaDescripcionTerapiaFiltroCodigos,
+    ReglaDescripcionCuraci,
+    ReglaDescripcionDomicili,
+]
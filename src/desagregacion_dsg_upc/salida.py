@@ -0,0 +1,339 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any, ClassVar, Self
+
+import pandas as pd
+from loguru import logger
+
+from desagregacion_dsg_upc import ConfigError
+from desagregacion_dsg_upc.utils import ruta_temporal
+
+
+class EscritorSalida(ABC):
+    """
+    Escribe chunks de forma incremental en un archivo temporal.
+
+    Al salir del bloque `with` sin errores, el temporal se renombra de forma atómica
+    a la ruta final, por lo que los consumidores nunca ven un archivo a medio escribir.
+    Si ocurre un error, el temporal se elimina y la salida anterior queda intacta.
+
+    Con `anexar`, el temporal parte de una copia de la salida existente y los chunks
+    se agregan al final; si no llega ningún chunk, la salida no se modifica.
+
+    Con `reanudable`, el temporal tiene un nombre fijo (`ruta_parcial`) y se conserva
+    si ocurre un error, para que una ejecución posterior continúe desde el último
+    punto confirmado con `confirmar` (ver `reanudar`).
+    """
+
+    #: Indica si el formato admite `confirmar` y `reanudar`.
+    admite_reanudacion = False
+
+    def __init__(
+        self,
+        ruta: str | Path,
+        compresion: str | None = None,
+        anexar: bool = False,
+        reanudable: bool = False,
+    ):
+        self.ruta = Path(ruta)
+        self.compresion = compresion
+        self.anexar = anexar
+        self.reanudable = reanudable
+        self.ruta_temporal = (
+            self.ruta_parcial(self.ruta) if reanudable else ruta_temporal(self.ruta)
+        )
+        self.filas_escritas = 0
+        self._abierto = False
+
+    @staticmethod
+    def ruta_parcial(ruta: str | Path) -> Path:
+        """Temporal de una escritura reanudable, con nombre fijo entre ejecuciones."""
+        ruta = Path(ruta)
+        return ruta.with_name(f".{ruta.name}.parcial")
+
+    def __enter__(self) -> Self:
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._cerrar()
+
+        if exc_type is not None:
+            if self.reanudable:
+                logger.warning(
+                    f"Escritura de {self.ruta} interrumpida; se conserva "
+                    f"{self.ruta_temporal} para reanudar."
+                )
+                return
+            self.ruta_temporal.unlink(missing_ok=True)
+            logger.warning(
+                f"Escritura de {self.ruta} cancelada; se descarta el temporal."
+            )
+            return
+
+        if not self._abierto:
+            if self._anexando:
+                logger.info(f"Sin filas nuevas: {self.ruta} no se modifica.")
+                return
+            # Ningún chunk: se publica una salida vacía.
+            self._abrir(pd.DataFrame())
+            self._cerrar()
+
+        os.replace(self.ruta_temporal, self.ruta)
+        logger.info(f"{self.filas_escritas} filas publicadas en {self.ruta}.")
+
+    @property
+    def _anexando(self) -> bool:
+        return self.anexar and self.ruta.exists()
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        """Agrega un chunk al final de la salida."""
+        if not self._abierto:
+            self._abrir(df)
+            self._abierto = True
+        self._escribir(df)
+        self.filas_escritas += len(df)
+
+    @property
+    def abierto(self) -> bool:
+        """Indica si el temporal ya se creó (se escribió o se reanudó algún chunk)."""
+        return self._abierto
+
+    def confirmar(self) -> int:
+        """
+        Deja en disco todo lo escrito hasta ahora, como punto de reanudación.
+
+        Returns:
+            int: Tamaño en bytes del temporal, para `reanudar`.
+        """
+        raise ConfigError(f"La salida {type(self).__name__} no admite reanudación.")
+
+    def reanudar(self, desplazamiento: int, filas_escritas: int) -> None:
+        """
+        Continúa una escritura reanudable interrumpida.
+
+        El temporal se trunca al tamaño del último punto confirmado (descarta lo
+        escrito después) y los chunks siguientes se agregan al final.
+
+        Args:
+            desplazamiento (int): Tamaño devuelto por `confirmar`.
+            filas_escritas (int): Filas escritas hasta ese punto.
+        """
+        if not self.admite_reanudacion:
+            raise ConfigError(f"La salida {type(self).__name__} no admite reanudación.")
+
+        with open(self.ruta_temporal, "rb+") as archivo:
+            archivo.truncate(desplazamiento)
+        self.filas_escritas = filas_escritas
+        self._abierto = True
+        logger.info(
+            f"Escritura de {self.ruta} reanudada en {filas_escritas} filas "
+            f"({desplazamiento} bytes)."
+        )
+
+    @abstractmethod
+    def _abrir(self, df: pd.DataFrame) -> None:
+        pass
+
+    @abstractmethod
+    def _escribir(self, df: pd.DataFrame) -> None:
+        pass
+
+    @abstractmethod
+    def _cerrar(self) -> None:
+        pass
+
+
+class EscritorCSV(EscritorSalida):
+    """
+    Salida CSV con encabezado en el primer chunk y el resto agregado al final.
+
+    Compresiones soportadas: gzip, bz2 y xz. Al confirmar, el stream comprimido se
+    cierra y los chunks siguientes se escriben en un stream nuevo al final del
+    archivo, de modo que cada punto de reanudación queda en un límite válido.
+    """
+
+    _APERTURAS: ClassVar[dict[str | None, Callable[..., IO[str]]]] = {
+        None: open,
+        "gzip": gzip.open,
+        "bz2": bz2.open,
+        "xz": lzma.open,
+    }
+    admite_reanudacion = True
+
+    def __init__(
+        self,
+        ruta: str | Path,
+        compresion: str | None = None,
+        anexar: bool = False,
+        reanudable: bool = False,
+    ):
+        if compresion not in self._APERTURAS:
+            raise ConfigError(
+                f"Compresión CSV no soportada: {compresion}. "
+                f"Opciones: {[c for c in self._APERTURAS if c]}"
+            )
+        super().__init__(ruta, compresion, anexar, reanudable)
+        self._archivo: IO[str] | None = None
+
+    def _abrir(self, df: pd.DataFrame) -> None:
+        if self._anexando:
+            # gzip, bz2 y xz admiten varios streams concatenados en un archivo.
+            shutil.copyfile(self.ruta, self.ruta_temporal)
+            self._archivo = self._APERTURAS[self.compresion](
+                self.ruta_temporal, "at", encoding="utf-8", newline=""
+            )
+            return
+
+        self._archivo = self._APERTURAS[self.compresion](
+            self.ruta_temporal, "wt", encoding="utf-8", newline=""
+        )
+        df.head(0).to_csv(self._archivo, index=False)
+
+    def _escribir(self, df: pd.DataFrame) -> None:
+        if self._archivo is None:
+            # Después de `confirmar` o `reanudar`: nuevo stream al final.
+            self._archivo = self._APERTURAS[self.compresion](
+                self.ruta_temporal, "at", encoding="utf-8", newline=""
+            )
+        df.to_csv(self._archivo, header=False, index=False)
+        self._archivo.flush()
+
+    def confirmar(self) -> int:
+        self._cerrar()
+        with open(self.ruta_temporal, "rb") as archivo:
+            os.fsync(archivo.fileno())
+        return self.ruta_temporal.stat().st_size
+
+    def _cerrar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+class EscritorParquet(EscritorSalida):
+    """
+    Salida Parquet donde cada chunk se escribe como un row group.
+
+    El esquema se fija con el primer chunk y los siguientes se convierten a él.
+    Las columnas categóricas se guardan con índices int32: pyarrow elige el entero
+    más chico para las categorías del primer chunk (ej. int8), y un chunk posterior
+    con más categorías no cabría en él.
+    No admite reanudación: el pie del archivo solo se escribe al cerrarlo.
+    Requiere pyarrow (extra 'arrow').
+    """
+
+    def __init__(
+        self,
+        ruta: str | Path,
+        compresion: str | None = None,
+        anexar: bool = False,
+        reanudable: bool = False,
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ConfigError(
+                "La salida Parquet requiere pyarrow: instale el extra 'arrow'."
+            ) from e
+
+        super().__init__(ruta, compresion or "snappy", anexar, reanudable)
+        self._pa = pa
+        self._pq = pq
+        self._writer: Any = None
+
+    def _esquema(self, schema: Any) -> Any:
+        """Esquema con los índices de las columnas categóricas ampliados a int32."""
+        pa = self._pa
+        campos = [
+            campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type))
+            if pa.types.is_dictionary(campo.type)
+            and campo.type.index_type.bit_width < 32
+            else campo
+            for campo in schema
+        ]
+        return pa.schema(campos, metadata=schema.metadata)
+
+    def _abrir(self, df: pd.DataFrame) -> None:
+        if not self._anexando:
+            schema = self._pa.Schema.from_pandas(df, preserve_index=False)
+            self._writer = self._pq.ParquetWriter(
+                self.ruta_temporal, self._esquema(schema), compression=self.compresion
+            )
+            return
+
+        # Parquet no admite agregar al final: se copian los row groups existentes,
+        # uno a la vez, y se continúa con el mismo esquema (salvo los índices de las
+        # categóricas, que un archivo anterior pudo guardar como int8).
+        existente = self._pq.ParquetFile(self.ruta)
+        self._writer = self._pq.ParquetWriter(
+            self.ruta_temporal,
+            self._esquema(existente.schema_arrow),
+            compression=self.compresion,
+        )
+        for indice in range(existente.num_row_groups):
+            tabla = existente.read_row_group(indice)
+            self._writer.write_table(tabla.cast(self._writer.schema))
+
+    def _escribir(self, df: pd.DataFrame) -> None:
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def _cerrar(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+ESCRITORES: dict[str, type[EscritorSalida]] = {
+    "csv": EscritorCSV,
+    "parquet": EscritorParquet,
+}
+
+
+def crear_escritor(
+    ruta: str | Path,
+    formato: str | None = None,
+    compresion: str | None = None,
+    anexar: bool = False,
+    reanudable: bool = False,
+) -> EscritorSalida:
+    """
+    Crea el escritor adecuado para la ruta de salida.
+
+    Args:
+        ruta (str | Path): Ruta final del archivo.
+        formato (str | None): "csv" o "parquet". Por defecto se deduce de la extensión.
+        compresion (str | None): Compresión del archivo (ej. "gzip", "snappy", "zstd").
+        anexar (bool): Agrega los chunks al final de la salida existente.
+        reanudable (bool): Conserva el temporal para reanudar una escritura
+            interrumpida (solo CSV).
+
+    Returns:
+        EscritorSalida: Escritor listo para usarse como context manager.
+
+    Raises:
+        ConfigError: Si el formato o la compresión no están soportados, o si el
+            formato no admite el modo reanudable.
+    """
+    if formato is None:
+        formato = "parquet" if Path(ruta).suffix.lower() == ".parquet" else "csv"
+
+    if formato not in ESCRITORES:
+        raise ConfigError(
+            f"Formato de salida no soportado: {formato}. Opciones: {list(ESCRITORES)}"
+        )
+
+    if reanudable and not ESCRITORES[formato].admite_reanudacion:
+        raise ConfigError(
+            f"La salida {formato} no admite el modo reanudable; use una salida CSV."
+        )
+
+    return ESCRITORES[formato](ruta, compresion, anexar, reanudable)
@@ -1,8 +1,44 @@
+import os
 import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
 
 from loguru import logger
 
 
+def ruta_temporal(ruta: Path) -> Path:
+    """Temporal oculto junto a `ruta` y propio del proceso (`.nombre.pid.tmp`)."""
+    return ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+
+
+@contextmanager
+def reemplazo_atomico(ruta: str | Path) -> Iterator[Path]:
+    """
+    Reemplaza un archivo de forma atómica.
+
+    El bloque escribe en el temporal que se le entrega (en el mismo directorio, que
+    se crea si no existe); al terminar sin errores, `os.replace` lo pone en lugar de
+    `ruta`, así que nunca se lee un archivo a medio escribir. Si el bloque falla, el
+    temporal se elimina y `ruta` no cambia.
+
+    Args:
+        ruta (str | Path): Archivo a reemplazar.
+
+    Yields:
+        Path: Ruta temporal donde escribir el contenido.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta_temporal(ruta)
+    try:
+        yield temporal
+    except BaseException:
+        temporal.unlink(missing_ok=True)
+        raise
+    os.replace(temporal, ruta)
+
+
 def setup_logging(
     log_file_path: str = "logs/app_{time}.log",
     rotation: str = "500 MB",
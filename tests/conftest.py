@@ -9,6 +9,22 @@ class MockProcessingConfig:
         self.column_fecha = "FECHA_INICIO_TRATAMIENTO"
         self.column_valor_liquidado = "VALOR_LIQUIDADO"
         self.column_codigo_osi = "CODIGO_OSI"
+        self.columns_passthrough = None
+        self.particiones = 1
+        self.columna_particion = None
+        self.modo_incremental = False
+        self.columna_marca = None
+        self.modo_reanudable = False
+        self.columna_paginacion = None
+        self.precedencia_reglas = None
+        self.memoria_expansion_mb = 512
+        self.codigos_osi_terapia = [999301, 1003524, 991800]
+        self.ruta_catalogo = None
+        self.query_catalogo = None
+        self.refrescar_catalogo = False
+        self.extraccion_tipada = True
+        self.dtype_dinero = "float64"
+        self.dtype_descripcion = "category"
 
 
 class MockSettings:
@@ -31,6 +47,9 @@ def settings_mock(monkeypatch):
         "desagregacion_dsg_upc.rules.contiene_domicili.settings",
         "desagregacion_dsg_upc.rules.contiene_curaci.settings",
         "desagregacion_dsg_upc.rules.contiene_terapia_codigo_osi.settings",
+        "desagregacion_dsg_upc.rules.motor.settings",
+        "desagregacion_dsg_upc.rules.coincidencias.settings",
+        "desagregacion_dsg_upc.paralelo.settings",
         # "desagregacion_dsg_upc.rules.nueva_regla.settings",
     ]
 
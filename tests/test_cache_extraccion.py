@@ -0,0 +1,137 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import CacheExtraccion, extraccion
+
+
+@pytest.fixture
+def chunks() -> list[pd.DataFrame]:
+    """Chunks tipados como los entrega la extracción."""
+    df = pd.DataFrame(
+        {
+            "DESCRIPCION_CUP": pd.Series(
+                ["CONSULTA", "TERAPIA", None, "CURACION"], dtype="category"
+            ),
+            "CODIGO_OSI": pd.array([1, 999301, None, 4], dtype="Int64"),
+            "VALOR_NETO": [1.5, 2.0, None, 4.0],
+            "FECHA_INICIO_TRATAMIENTO": pd.to_datetime(
+                [datetime(2025, 1, i) for i in range(1, 5)]
+            ),
+        }
+    )
+    return [df.iloc[:2], df.iloc[2:]]
+
+
+@pytest.fixture
+def cache(tmp_path) -> CacheExtraccion:
+    return CacheExtraccion(tmp_path / "cache", ttl_horas=24, max_mb=None)
+
+
+def test_clave_normaliza_la_consulta():
+    """Espacios y ";" final no cambian la clave; parámetros y esquema sí."""
+    clave = CacheExtraccion.clave("SELECT *\n  FROM fuente;", {"a": 1}, {"X": "Int64"})
+
+    assert clave == CacheExtraccion.clave(
+        " SELECT * FROM fuente ", {"a": 1}, {"X": "Int64"}
+    )
+    assert clave != CacheExtraccion.clave(
+        "SELECT * FROM fuente", {"a": 2}, {"X": "Int64"}
+    )
+    assert clave != CacheExtraccion.clave(
+        "SELECT * FROM fuente", {"a": 1}, {"X": "str"}
+    )
+
+
+def test_guardar_y_leer_conserva_chunks_y_tipos(cache, chunks):
+    """Los chunks guardados se leen en el mismo orden y con los mismos dtypes."""
+    assert cache.leer("clave") is None
+
+    entregados = list(cache.guardar("clave", iter(chunks)))
+    leidos = list(cache.leer("clave"))
+
+    assert len(entregados) == len(leidos) == 2
+    for original, leido in zip(chunks, leidos):
+        pd.testing.assert_frame_equal(leido, original.reset_index(drop=True))
+
+
+def test_extraccion_interrumpida_no_queda_en_cache(cache, chunks):
+    """Si la extracción falla a mitad, no se guarda una entrada parcial."""
+
+    def fallar():
+        yield chunks[0]
+        raise RuntimeError("conexión perdida")
+
+    with pytest.raises(RuntimeError):
+        list(cache.guardar("clave", fallar()))
+
+    assert cache.leer("clave") is None
+    assert list(cache.directorio.iterdir()) == []
+
+
+def test_entrada_vencida(tmp_path, chunks):
+    """Una entrada más antigua que el TTL se descarta."""
+    cache = CacheExtraccion(tmp_path / "cache", ttl_horas=0)
+    list(cache.guardar("clave", iter(chunks)))
+
+    assert cache.leer("clave") is None
+    assert not (cache.directorio / "clave").exists()
+
+
+def test_limite_de_tamano_elimina_la_menos_usada(tmp_path, chunks):
+    """Al superar el tamaño máximo se elimina la entrada de acceso más antiguo."""
+    cache = CacheExtraccion(tmp_path / "cache")
+    list(cache.guardar("a", iter(chunks)))
+    list(cache.guardar("b", iter(chunks)))
+    tamano = sum(p.stat().st_size for p in (cache.directorio / "a").iterdir())
+
+    # "a" se usó más recientemente que "b".
+    os.utime(cache.directorio / "b" / "manifiesto.json", (1, 1))
+    cache.max_mb = 2.5 * tamano / 2**20
+    list(cache.guardar("c", iter(chunks)))
+
+    assert sorted(p.name for p in cache.directorio.iterdir()) == ["a", "c"]
+
+
+def test_invalidar(cache, chunks):
+    """Se puede invalidar una entrada o la caché completa."""
+    list(cache.guardar("a", iter(chunks)))
+    list(cache.guardar("b", iter(chunks)))
+
+    cache.invalidar("a")
+    assert cache.leer("a") is None
+    assert cache.leer("b") is not None
+
+    cache.invalidar()
+    assert cache.leer("b") is None
+
+
+def test_extraer_chunks_usa_la_cache(settings_mock, chunks, tmp_path, monkeypatch):
+    """La segunda extracción se lee de la caché sin consultar la base de datos."""
+    lecturas = []
+
+    def leer_de_base_datos(processing, esquema, marca=None):
+        lecturas.append(processing.query_input)
+        yield from chunks
+
+    monkeypatch.setattr(extraccion, "_leer_de_base_datos", leer_de_base_datos)
+    processing = settings_mock.processing
+    processing.query_input = "SELECT * FROM fuente"
+    processing.extraccion_tipada = False
+    processing.profundidad_prefetch = 0
+    processing.modo_extraccion = "pandas"
+    processing.chunk_size = 2
+    processing.cache_extraccion_dir = str(tmp_path / "cache")
+    processing.cache_ttl_horas = 24
+    processing.cache_max_mb = None
+    processing.invalidar_cache = False
+
+    primera = pd.concat(extraccion.extraer_chunks(processing), ignore_index=True)
+    segunda = pd.concat(extraccion.extraer_chunks(processing), ignore_index=True)
+    processing.invalidar_cache = True
+    list(extraccion.extraer_chunks(processing))
+
+    pd.testing.assert_frame_equal(segunda, primera)
+    assert len(lecturas) == 2
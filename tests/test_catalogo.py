@@ -0,0 +1,169 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    CatalogoProcedimientos,
+    obtener_catalogo,
+    procesar_chunk,
+)
+from desagregacion_dsg_upc.rules import MotorReglas
+from desagregacion_dsg_upc.rules.coincidencias import comparador
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """Chunk con procedimientos repetidos y un código de terapia sin la palabra."""
+    data = {
+        "DESCRIPCION_CUP": [
+            "CONSULTA DE PSICOLOGIA CLINICA",
+            "CONSULTA MEDICINA GENERAL",
+            "PROCEDIMIENTO ESPECIAL",
+            "CURACION DE HERIDA",
+            "CONSULTA MEDICINA GENERAL",
+            "SESION ESPECIAL",
+        ],
+        "CODIGO_OSI": [1, 2, 3, 4, 2, 999301],
+        "CANTIDAD_PROCEDIMIENTO": [5, 2, 7, 3, 4, 2],
+        "VALOR_NETO": [5000.0, 2000.0, 7000.0, 3000.0, 4000.0, 2000.0],
+        "VALOR_LIQUIDADO": [5000.0, 2000.0, 7000.0, 3000.0, 4000.0, 2000.0],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 6,
+    }
+    return pd.DataFrame(data)
+
+
+def test_clasificar_equivale_a_la_mascara_por_descripcion(settings_mock, sample_df):
+    """Las banderas tomadas del catálogo son las de la descripción y el código."""
+    catalogo = CatalogoProcedimientos.desde_configuracion(settings_mock.processing)
+
+    banderas = catalogo.clasificar(sample_df)
+
+    esperado = comparador.clasificar(sample_df)
+    assert banderas.name == "mascara_palabras"
+    assert banderas.tolist() == esperado.tolist()
+    # Los pares repetidos se guardan una sola vez.
+    assert len(catalogo) == 5
+    assert catalogo.nuevos == 5
+
+
+def test_clasificar_con_descripciones_category_y_nulos(settings_mock, sample_df):
+    """Las columnas tipadas (category, Int64) y los nulos se resuelven por el mismo par."""
+    df = sample_df.astype({"DESCRIPCION_CUP": "category", "CODIGO_OSI": "Int64"})
+    df.loc[2, "DESCRIPCION_CUP"] = None
+    catalogo = CatalogoProcedimientos.desde_configuracion(
+        settings_mock.processing, sample_df
+    )
+
+    banderas = catalogo.clasificar(df)
+
+    assert banderas[2] == 0
+    assert (
+        banderas.drop(2).tolist() == comparador.clasificar(sample_df).drop(2).tolist()
+    )
+    assert catalogo.nuevos == 1
+
+
+def test_motor_con_catalogo_equivale_al_motor_sin_catalogo(settings_mock, sample_df):
+    """Clasificar por el catálogo no cambia el resultado de la desagregación."""
+    catalogo = CatalogoProcedimientos.desde_configuracion(settings_mock.processing)
+
+    sin_catalogo = procesar_chunk(sample_df, MotorReglas.desde_configuracion())
+    con_catalogo = procesar_chunk(
+        sample_df, MotorReglas.desde_configuracion(catalogo=catalogo)
+    )
+
+    pd.testing.assert_frame_equal(con_catalogo, sin_catalogo)
+    assert "mascara_palabras" not in con_catalogo.columns
+    # El código OSI de terapia se desagrega aunque la descripción no lo diga.
+    assert (con_catalogo["CODIGO_OSI"] == 999301).sum() == 2
+
+
+def test_motor_con_catalogo_clasifica_una_vez_por_chunk(
+    settings_mock, sample_df, monkeypatch
+):
+    """Las reglas usan las banderas del catálogo sin recorrer descripciones."""
+    catalogo = CatalogoProcedimientos.desde_configuracion(
+        settings_mock.processing, sample_df
+    )
+    motor = MotorReglas.desde_configuracion(catalogo=catalogo)
+    llamadas = {"clasificar": 0, "calcular": 0, "isin": 0}
+    clasificar, calcular = catalogo.clasificar, comparador._calcular
+    isin = pd.Series.isin
+
+    def contar_clasificar(df):
+        llamadas["clasificar"] += 1
+        return clasificar(df)
+
+    def contar_calcular(serie):
+        llamadas["calcular"] += 1
+        return calcular(serie)
+
+    def contar_isin(serie, valores):
+        llamadas["isin"] += 1
+        return isin(serie, valores)
+
+    monkeypatch.setattr(catalogo, "clasificar", contar_clasificar)
+    monkeypatch.setattr(comparador, "_calcular", contar_calcular)
+    monkeypatch.setattr(pd.Series, "isin", contar_isin)
+    chunk = sample_df.astype({"DESCRIPCION_CUP": object})
+
+    motor.asignar(chunk)
+    list(motor.iterar(chunk))
+
+    assert llamadas == {"clasificar": 2, "calcular": 0, "isin": 0}
+
+
+def test_codigos_de_terapia_configurables(settings_mock, sample_df):
+    """La lista de códigos OSI de terapia se toma de la configuración."""
+    settings_mock.processing.codigos_osi_terapia = []
+
+    df_procesado = procesar_chunk(sample_df, MotorReglas.desde_configuracion())
+
+    assert (df_procesado["CODIGO_OSI"] == 999301).sum() == 1
+
+
+def test_guardar_y_cargar(settings_mock, sample_df, tmp_path):
+    """El catálogo guardado se recarga con los mismos pares y banderas."""
+    ruta = tmp_path / "cache" / "catalogo.csv"
+    catalogo = CatalogoProcedimientos.desde_configuracion(
+        settings_mock.processing, sample_df
+    )
+
+    catalogo.guardar(ruta)
+    cargado = CatalogoProcedimientos.cargar(ruta, settings_mock.processing)
+
+    assert list(ruta.parent.iterdir()) == [ruta]
+    assert len(cargado) == len(catalogo)
+    assert (
+        cargado.clasificar(sample_df).tolist()
+        == catalogo.clasificar(sample_df).tolist()
+    )
+    assert cargado.nuevos == 0
+
+
+def test_desde_base_datos_usa_los_pares_distintos(settings_mock, sample_df, tmp_path):
+    """El catálogo se construye con un SELECT DISTINCT sobre `query_catalogo`."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    sample_df.to_sql("fuente", engine, index=False)
+    settings_mock.processing.query_catalogo = "SELECT * FROM fuente;"
+
+    with engine.connect() as conn:
+        catalogo = CatalogoProcedimientos.desde_base_datos(
+            conn, settings_mock.processing
+        )
+    engine.dispose()
+
+    assert len(catalogo) == 5
+    assert catalogo.nuevos == 0
+
+
+def test_sin_consulta_de_catalogo_empieza_vacio(settings_mock, tmp_path):
+    """Sin `query_catalogo` no se consulta la base: los pares llegan con los chunks."""
+    settings_mock.processing.ruta_catalogo = str(tmp_path / "catalogo.csv")
+
+    catalogo = obtener_catalogo(settings_mock.processing)
+
+    assert len(catalogo) == 0
+    assert not (tmp_path / "catalogo.csv").exists()
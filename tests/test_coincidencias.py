@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc.rules.coincidencias import ComparadorDescripciones
+
+
+@pytest.fixture
+def descripciones() -> pd.Series:
+    """Descripciones repetidas, con mayúsculas mixtas y nulos."""
+    return pd.Series(
+        [
+            "CONSULTA DE PSICOLOGIA",
+            "Consulta medicina general",
+            None,
+            "CURACION DE HERIDA",
+            "CONSULTA DE PSICOLOGIA",
+            "TERAPIA FISICA",
+        ]
+        * 3
+    )
+
+
+@pytest.mark.parametrize("palabra", ["CONSULTA", "PSICOLOGIA", "CURACI", "TERAPIA"])
+@pytest.mark.parametrize("dtype", [object, "category"])
+def test_equivale_a_str_contains(settings_mock, descripciones, palabra, dtype):
+    """El resultado coincide con `str.contains` sin distinguir mayúsculas."""
+    serie = descripciones.astype(dtype)
+
+    resultado = ComparadorDescripciones().contiene(
+        pd.DataFrame({"DESCRIPCION_CUP": serie}), palabra
+    )
+
+    esperado = serie.astype(str).str.contains(palabra, case=False, na=False)
+    pd.testing.assert_series_equal(resultado, esperado, check_names=False)
+
+
+def test_evalua_cada_descripcion_unica_una_vez(
+    settings_mock, descripciones, monkeypatch
+):
+    """Cada descripción distinta se recorre una vez para todas las palabras."""
+    comparador = ComparadorDescripciones()
+    comparador.registrar(["CONSULTA", "PSICOLOGIA", "TERAPIA"])
+    evaluaciones = []
+    original = comparador._bits
+
+    def contar(descripcion):
+        evaluaciones.append(descripcion)
+        return original(descripcion)
+
+    monkeypatch.setattr(comparador, "_bits", contar)
+
+    mascara = comparador.mascara(descripciones)
+    assert len(evaluaciones) == 4
+
+    # Un chunk nuevo se factoriza de nuevo, pero cada descripción sale del LRU.
+    comparador.mascara(descripciones.copy())
+    assert len(evaluaciones) == 8
+    assert len(comparador._cache) == 4
+    assert mascara.tolist()[:2] == [0b011, 0b001]
+
+
+def test_mascara_un_bit_por_palabra(descripciones):
+    """La máscara es una columna entera pequeña con un bit por palabra."""
+    comparador = ComparadorDescripciones()
+    comparador.registrar(["CONSULTA", "PSICOLOGIA", "CURACI"])
+
+    mascara = comparador.mascara(descripciones)
+
+    assert mascara.name == "mascara_palabras"
+    assert mascara.dtype == "uint8"
+    assert mascara.tolist()[:6] == [0b011, 0b001, 0, 0b100, 0b011, 0]
+
+
+def test_normaliza_mayusculas_y_tildes(settings_mock):
+    """ "CURACIÓN", "Curacion" y "PSICOLOGÍA" coinciden con las palabras sin tilde."""
+    comparador = ComparadorDescripciones()
+    df = pd.DataFrame(
+        {"DESCRIPCION_CUP": ["CURACIÓN SIMPLE", "Curacion", "consulta de psicología"]}
+    )
+
+    assert comparador.contiene(df, "CURACION").tolist() == [True, True, False]
+    assert comparador.contiene(df, "PSICOLOGÍA").tolist() == [False, False, True]
+
+
+def test_usa_la_mascara_del_chunk_si_existe(settings_mock):
+    """Con la columna `mascara_palabras` presente no se recorren las descripciones."""
+    comparador = ComparadorDescripciones()
+    comparador.registrar(["CONSULTA", "CURACI"])
+    df = pd.DataFrame(
+        {"DESCRIPCION_CUP": ["CONSULTA", "CONSULTA"], "mascara_palabras": [0b10, 0b01]}
+    )
+
+    assert comparador.contiene(df, "CURACI").tolist() == [True, False]
+    assert len(comparador._cache) == 0
+
+
+def test_lru_acotado(settings_mock, descripciones):
+    """El LRU no supera el máximo configurado."""
+    comparador = ComparadorDescripciones(max_descripciones=3)
+
+    comparador.contiene(pd.DataFrame({"DESCRIPCION_CUP": descripciones}), "CONSULTA")
+
+    assert len(comparador._cache) == 3
+
+
+def test_mascara_concurrente_desde_varios_hilos(descripciones):
+    """Cada hilo obtiene la máscara de su propio chunk aunque compartan el comparador."""
+    palabras = ["CONSULTA", "PSICOLOGIA", "CURACI", "TERAPIA"]
+    comparador = ComparadorDescripciones(max_descripciones=2)
+    comparador.registrar(palabras)
+    referencia = ComparadorDescripciones()
+    referencia.registrar(palabras)
+    chunks = [descripciones.sample(frac=1, random_state=i) for i in range(16)]
+    esperado = [referencia.mascara(c).tolist() for c in chunks]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultado = list(
+            executor.map(lambda c: comparador.mascara(c).tolist(), chunks * 4)
+        )
+
+    assert resultado == esperado * 4
@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import COLUMNA_ID_ORIGEN, number_rows, procesar_chunk
+from desagregacion_dsg_upc.rules import MotorReglas, ReglaDescripcionCuraci
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """Filas de CURACION con cantidades variadas, incluida una en cero."""
+    data = {
+        "DESCRIPCION_CUP": ["CURACION A", "CURACION B", "CURACION C"],
+        "CODIGO_OSI": [1, 2, 3],
+        "CANTIDAD_PROCEDIMIENTO": [3, 0, 2],
+        "VALOR_NETO": [1000.0, 500.0, None],
+        "FECHA_INICIO_TRATAMIENTO": [
+            datetime(2025, 1, 30),
+            datetime(2025, 2, 1),
+            datetime(2025, 12, 31),
+        ],
+        "OTRA_COLUMNA": ["A", "B", "C"],
+    }
+    return pd.DataFrame(data, index=[10, 20, 30])
+
+
+def test_secuencia_y_fechas_por_fila_de_origen(settings_mock, sample_df):
+    """La secuencia reinicia en cada fila de origen y desplaza la fecha en días."""
+    df_procesado = ReglaDescripcionCuraci().expandir(sample_df)
+
+    assert df_procesado.index.tolist() == [10, 10, 10, 30, 30]
+    assert df_procesado["secuencia"].tolist() == [0, 1, 2, 0, 1]
+    assert df_procesado["FECHA_INICIO_TRATAMIENTO"].tolist() == [
+        pd.Timestamp("2025-01-30"),
+        pd.Timestamp("2025-01-31"),
+        pd.Timestamp("2025-02-01"),
+        pd.Timestamp("2025-12-31"),
+        pd.Timestamp("2026-01-01"),
+    ]
+
+
+def test_dinero_dividido_y_nulos_conservados(settings_mock, sample_df):
+    """El dinero se divide por la cantidad original y los nulos siguen nulos."""
+    df_procesado = ReglaDescripcionCuraci().expandir(sample_df)
+
+    valores = df_procesado["VALOR_NETO"].tolist()
+    assert valores[:3] == [333.3, 333.3, 333.3]
+    assert all(pd.isna(valor) for valor in valores[3:])
+    assert df_procesado["CANTIDAD_PROCEDIMIENTO"].tolist() == [1] * 5
+
+
+@pytest.mark.parametrize("unidad", ["s", "us", "ns"])
+def test_conserva_la_unidad_de_la_fecha(settings_mock, sample_df, unidad):
+    """El tipo de la columna de fecha no cambia al desagregar."""
+    sample_df["FECHA_INICIO_TRATAMIENTO"] = sample_df[
+        "FECHA_INICIO_TRATAMIENTO"
+    ].dt.as_unit(unidad)
+
+    df_procesado = ReglaDescripcionCuraci().expandir(sample_df)
+
+    assert df_procesado["FECHA_INICIO_TRATAMIENTO"].dt.unit == unidad
+    assert df_procesado["FECHA_INICIO_TRATAMIENTO"].iloc[2] == pd.Timestamp(
+        "2025-02-01"
+    )
+
+
+def test_number_rows_continua_entre_chunks(sample_df):
+    """El id de origen es único y creciente aunque el índice se repita."""
+    chunks = list(number_rows([sample_df.reset_index(drop=True)] * 2, start=5))
+
+    assert chunks[0][COLUMNA_ID_ORIGEN].tolist() == [5, 6, 7]
+    assert chunks[1][COLUMNA_ID_ORIGEN].tolist() == [8, 9, 10]
+    assert chunks[1][COLUMNA_ID_ORIGEN].dtype == "int64"
+
+
+def test_expansion_con_indices_repetidos_entre_chunks(settings_mock, sample_df):
+    """Filas de chunks distintos con la misma etiqueta se secuencian por separado."""
+    chunks = list(number_rows([sample_df.reset_index(drop=True)] * 2))
+    df = pd.concat(chunks)
+    assert df.index.tolist() == [0, 1, 2, 0, 1, 2]
+
+    df_procesado = procesar_chunk(df, MotorReglas.desde_configuracion())
+
+    assert df_procesado[COLUMNA_ID_ORIGEN].tolist() == [0, 0, 0, 2, 2, 3, 3, 3, 5, 5]
+    fechas_id_3 = df_procesado.loc[
+        df_procesado[COLUMNA_ID_ORIGEN] == 3, "FECHA_INICIO_TRATAMIENTO"
+    ]
+    assert fechas_id_3.tolist() == [
+        pd.Timestamp("2025-01-30"),
+        pd.Timestamp("2025-01-31"),
+        pd.Timestamp("2025-02-01"),
+    ]
+
+
+def test_consulta_con_cantidad_cero_se_descarta(settings_mock):
+    """Con cantidad 0 el intervalo (30 / 0) es infinito; la fila solo se descarta."""
+    df = pd.DataFrame(
+        {
+            "DESCRIPCION_CUP": ["CONSULTA MEDICINA GENERAL"] * 2,
+            "CODIGO_OSI": [1, 2],
+            "CANTIDAD_PROCEDIMIENTO": [0, 2],
+            "VALOR_NETO": [1000.0, 1000.0],
+            "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 2,
+        }
+    )
+    chunk = next(number_rows([df]))
+
+    df_procesado = procesar_chunk(chunk, MotorReglas.desde_configuracion())
+
+    assert df_procesado[COLUMNA_ID_ORIGEN].tolist() == [1, 1]
+    assert df_procesado["FECHA_INICIO_TRATAMIENTO"].tolist() == [
+        pd.Timestamp("2025-01-01"),
+        pd.Timestamp("2025-01-16"),
+    ]
@@ -0,0 +1,33 @@
+import pytest
+
+from desagregacion_dsg_upc import dispose_engine, get_engine, settings
+
+
+@pytest.fixture(autouse=True)
+def engine_limpio():
+    """Cada test parte sin engine compartido."""
+    dispose_engine()
+    yield
+    dispose_engine()
+
+
+def test_get_engine_reutiliza_el_mismo_engine():
+    """El engine se crea una sola vez por proceso."""
+    assert get_engine() is get_engine()
+
+
+def test_get_engine_aplica_configuracion_del_pool():
+    """El pool y el tamaño de lectura salen de la configuración."""
+    engine = get_engine()
+
+    assert engine.pool.size() == settings.db_pool_size
+    assert engine.dialect.arraysize == settings.db_arraysize
+
+
+def test_dispose_engine_descarta_el_engine():
+    """Tras `dispose_engine` se crea un engine nuevo."""
+    engine = get_engine()
+
+    dispose_engine()
+
+    assert get_engine() is not engine
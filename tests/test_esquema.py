@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    ConfigError,
+    aplicar_esquema,
+    columnas_requeridas,
+    construir_esquema,
+    fetch_data_in_chunks,
+)
+from desagregacion_dsg_upc.rules import MotorReglas
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """Chunk tal como llega con dtype="str": todas las columnas son texto."""
+    data = {
+        "DESCRIPCION_CUP": ["CONSULTA MEDICINA GENERAL", "TERAPIA FISICA", None],
+        "CODIGO_OSI": ["12345", "999301", None],
+        "CANTIDAD_PROCEDIMIENTO": ["2", "3", None],
+        "VALOR_NETO": ["2000.5", "3000", None],
+        "FECHA_INICIO_TRATAMIENTO": ["2025-01-01", "2025-02-01", None],
+        "OTRA_COLUMNA": ["A", "B", "C"],
+    }
+    return pd.DataFrame(data, dtype=object)
+
+
+def test_construir_esquema(settings_mock):
+    """El esquema asigna un tipo nativo a cada columna configurada."""
+    esquema = construir_esquema(settings_mock.processing)
+
+    assert esquema == {
+        "VALOR_NETO": "float64",
+        "CANTIDAD_PROCEDIMIENTO": "Int32",
+        "CODIGO_OSI": "Int64",
+        "FECHA_INICIO_TRATAMIENTO": "datetime64[ns]",
+        "DESCRIPCION_CUP": "category",
+    }
+
+
+def test_aplicar_esquema_tipa_columnas(settings_mock, sample_df):
+    """Las columnas del esquema se convierten y las demás quedan intactas."""
+    df = aplicar_esquema(sample_df, construir_esquema(settings_mock.processing))
+
+    assert df["CANTIDAD_PROCEDIMIENTO"].dtype == "Int32"
+    assert df["CODIGO_OSI"].dtype == "Int64"
+    assert df["VALOR_NETO"].dtype == "float64"
+    assert df["FECHA_INICIO_TRATAMIENTO"].dtype == "datetime64[ns]"
+    assert isinstance(df["DESCRIPCION_CUP"].dtype, pd.CategoricalDtype)
+    assert df["OTRA_COLUMNA"].dtype == object
+    assert df["CANTIDAD_PROCEDIMIENTO"].isna().tolist() == [False, False, True]
+
+
+def test_aplicar_esquema_columna_faltante(settings_mock, sample_df):
+    """Una columna configurada que no existe es un error de configuración."""
+    with pytest.raises(ConfigError):
+        aplicar_esquema(
+            sample_df.drop(columns="CODIGO_OSI"),
+            construir_esquema(settings_mock.processing),
+        )
+
+
+def test_reglas_sobre_datos_tipados(settings_mock, sample_df):
+    """Las reglas comparan cantidades y códigos OSI numéricos; los nulos no aplican."""
+    df = aplicar_esquema(sample_df, construir_esquema(settings_mock.processing))
+
+    df_procesado = MotorReglas.desde_configuracion().ejecutar(df)
+
+    assert len(df_procesado) == 2 + 3 + 1
+    df_b = df_procesado[df_procesado["OTRA_COLUMNA"] == "B"]
+    assert df_b["FECHA_INICIO_TRATAMIENTO"].tolist() == [
+        pd.Timestamp("2025-02-01") + pd.Timedelta(days=i) for i in range(3)
+    ]
+    assert all(df_b["VALOR_NETO"] == 1000.0)
+
+
+def test_fetch_data_in_chunks_tipado(settings_mock):
+    """La extracción tipada entrega cada chunk ya convertido al esquema."""
+    engine = create_engine("sqlite://")
+    pd.DataFrame(
+        {
+            "DESCRIPCION_CUP": ["CONSULTA", "CURACION", "TERAPIA"],
+            "CODIGO_OSI": [1, 2, 999301],
+            "CANTIDAD_PROCEDIMIENTO": [1, 2, 3],
+            "VALOR_NETO": [10.0, 20.0, 30.0],
+            "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 3,
+        }
+    ).to_sql("fuente", engine, index=False)
+
+    with engine.connect() as conn:
+        chunks = list(
+            fetch_data_in_chunks(
+                conn,
+                "SELECT * FROM fuente",
+                chunk_size=2,
+                esquema=construir_esquema(settings_mock.processing),
+            )
+        )
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert all(chunk["CANTIDAD_PROCEDIMIENTO"].dtype == "Int32" for chunk in chunks)
+    assert all(
+        chunk["FECHA_INICIO_TRATAMIENTO"].dtype == "datetime64[ns]" for chunk in chunks
+    )
+
+
+def test_fetch_data_in_chunks_nombres_en_minusculas(settings_mock):
+    """Los nombres en minúsculas (dialecto Oracle de SQLAlchemy) se normalizan."""
+    engine = create_engine("sqlite://")
+    pd.DataFrame(
+        {
+            "descripcion_cup": ["CONSULTA"],
+            "codigo_osi": [1],
+            "cantidad_procedimiento": [2],
+            "valor_neto": [10.0],
+            "fecha_inicio_tratamiento": [datetime(2025, 1, 1)],
+            "otra_columna": ["A"],
+        }
+    ).to_sql("fuente", engine, index=False)
+
+    with engine.connect() as conn:
+        (chunk,) = fetch_data_in_chunks(
+            conn,
+            "SELECT * FROM fuente",
+            esquema=construir_esquema(settings_mock.processing),
+            columns=columnas_requeridas(settings_mock.processing),
+        )
+
+    assert chunk.columns.tolist() == [
+        "DESCRIPCION_CUP",
+        "CODIGO_OSI",
+        "CANTIDAD_PROCEDIMIENTO",
+        "VALOR_NETO",
+        "FECHA_INICIO_TRATAMIENTO",
+        "otra_columna",
+    ]
+    assert chunk["CANTIDAD_PROCEDIMIENTO"].dtype == "Int32"
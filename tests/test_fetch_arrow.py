@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import (
+    ConfigError,
+    columnas_requeridas,
+    construir_esquema,
+    fetch_arrow_batches,
+)
+
+pa = pytest.importorskip("pyarrow")
+
+
+class FakeOracleConnection:
+    """Conexión python-oracledb mínima que entrega lotes columnares."""
+
+    def __init__(self, table):
+        self.table = table
+        self.size = None
+
+    def fetch_df_batches(self, statement, parameters=None, size=100):
+        self.size = size
+        self.parameters = parameters
+        yield from self.table.to_batches(max_chunksize=size)
+
+
+class FakeConnection:
+    """Imita `sqlalchemy.Connection.connection.driver_connection`."""
+
+    def __init__(self, driver_connection):
+        self.connection = type("Pool", (), {"driver_connection": driver_connection})
+
+
+@pytest.fixture
+def sample_table():
+    """Tabla Arrow con la forma que entrega Oracle."""
+    return pa.table(
+        {
+            "DESCRIPCION_CUP": ["CONSULTA", "CURACION", "TERAPIA"],
+            "CODIGO_OSI": [1, 2, 999301],
+            "CANTIDAD_PROCEDIMIENTO": [1, 2, 3],
+            "VALOR_NETO": [10.0, 20.0, 30.0],
+            "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 3,
+        }
+    )
+
+
+def test_fetch_arrow_batches_pandas(settings_mock, sample_table):
+    """Cada lote llega como DataFrame respaldado por Arrow."""
+    driver = FakeOracleConnection(sample_table)
+
+    chunks = list(fetch_arrow_batches(FakeConnection(driver), "SELECT 1", batch_size=2))
+
+    assert driver.size == 2
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert isinstance(chunks[0]["CANTIDAD_PROCEDIMIENTO"].dtype, pd.ArrowDtype)
+
+
+def test_fetch_arrow_batches_record_batches(settings_mock, sample_table):
+    """Con as_pandas=False se entregan RecordBatch sin convertir."""
+    chunks = list(
+        fetch_arrow_batches(
+            FakeConnection(FakeOracleConnection(sample_table)),
+            "SELECT 1",
+            as_pandas=False,
+        )
+    )
+
+    assert all(isinstance(chunk, pa.RecordBatch) for chunk in chunks)
+    assert sum(chunk.num_rows for chunk in chunks) == 3
+
+
+def test_fetch_arrow_batches_con_esquema(settings_mock, sample_table):
+    """El esquema configurado también se aplica a los lotes Arrow."""
+    chunks = list(
+        fetch_arrow_batches(
+            FakeConnection(FakeOracleConnection(sample_table)),
+            "SELECT 1",
+            esquema=construir_esquema(settings_mock.processing),
+        )
+    )
+
+    assert chunks[0]["CANTIDAD_PROCEDIMIENTO"].dtype == "Int32"
+    assert isinstance(chunks[0]["DESCRIPCION_CUP"].dtype, pd.CategoricalDtype)
+
+
+def test_fetch_arrow_batches_nombres_configurados(settings_mock, sample_table):
+    """Los nombres se llevan a los configurados igual que en la lectura con pandas."""
+    minusculas = sample_table.rename_columns(
+        [nombre.lower() for nombre in sample_table.column_names]
+    )
+
+    (chunk,) = fetch_arrow_batches(
+        FakeConnection(FakeOracleConnection(minusculas)),
+        "SELECT 1",
+        as_pandas=False,
+        columns=columnas_requeridas(settings_mock.processing),
+    )
+
+    assert chunk.schema.names == sample_table.column_names
+
+
+def test_fetch_arrow_batches_sin_soporte_del_driver(settings_mock):
+    """Un driver sin `fetch_df_batches` es un error de configuración."""
+    with pytest.raises(ConfigError):
+        next(fetch_arrow_batches(FakeConnection(object()), "SELECT 1"))
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import DatabaseError, fetch_data_partitioned
+
+
+@pytest.fixture
+def sqlite_factory(tmp_path):
+    """Base SQLite local con una conexión nueva por cada partición."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    pd.DataFrame(
+        {
+            "ID": list(range(1, 101)) + [None],
+            "FECHA_INICIO_TRATAMIENTO": [
+                datetime(2025, 1, 1) + timedelta(days=i) for i in range(100)
+            ]
+            + [None],
+            "VALOR_NETO": [float(i) for i in range(101)],
+        }
+    ).to_sql("fuente", engine, index=False)
+
+    @contextmanager
+    def factory():
+        with engine.connect() as conn:
+            yield conn
+
+    yield factory
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "strategy, column", [("hash", "ID"), ("fecha", "FECHA_INICIO_TRATAMIENTO")]
+)
+def test_particiones_devuelven_cada_fila_una_vez(sqlite_factory, strategy, column):
+    """La unión de las particiones es exactamente el resultado de la consulta."""
+    chunks = list(
+        fetch_data_partitioned(
+            "SELECT * FROM fuente;\n",
+            partitions=4,
+            strategy=strategy,
+            column=column,
+            chunk_size=10,
+            connection_factory=sqlite_factory,
+        )
+    )
+
+    df = pd.concat(chunks)
+    assert len(df) == 101
+    assert sorted(df["VALOR_NETO"].astype(float)) == [float(i) for i in range(101)]
+    assert max(len(chunk) for chunk in chunks) <= 10
+
+
+def test_error_en_particion_se_propaga(sqlite_factory):
+    """Un fallo en cualquier partición llega al consumidor como DatabaseError."""
+    with pytest.raises(DatabaseError):
+        list(
+            fetch_data_partitioned(
+                "SELECT * FROM fuente",
+                partitions=3,
+                strategy="hash",
+                column="COLUMNA_INEXISTENTE",
+                connection_factory=sqlite_factory,
+            )
+        )
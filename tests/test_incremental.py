@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    EstadoIncremental,
+    SeguimientoMarca,
+    build_watermark_query,
+    crear_escritor,
+    ejecutar_pipeline,
+    fetch_data_in_chunks,
+    number_rows,
+)
+
+
+def _fuente(dias: range) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ID_RECLAMACION": list(dias),
+            "DESCRIPCION_CUP": ["CONSULTA MEDICINA GENERAL"] * len(dias),
+            "CODIGO_OSI": [1] * len(dias),
+            "CANTIDAD_PROCEDIMIENTO": [2] * len(dias),
+            "VALOR_NETO": [2000.0] * len(dias),
+            "VALOR_LIQUIDADO": [2000.0] * len(dias),
+            "FECHA_INICIO_TRATAMIENTO": [
+                datetime(2025, 1, 1) + timedelta(days=d) for d in dias
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def estado(tmp_path) -> EstadoIncremental:
+    return EstadoIncremental(tmp_path / "estado" / "incremental.json")
+
+
+def test_estado_guarda_fechas_y_numeros(estado):
+    """La marca se recupera con su tipo para enlazarla en la consulta."""
+    assert estado.leer("salida.csv") is None
+
+    estado.guardar("salida.csv", "FECHA", pd.Timestamp("2025-03-01 10:30"))
+    estado.guardar("otra.csv", "ID", pd.Series([41, 42]).max())
+
+    assert estado.leer("salida.csv") == datetime(2025, 3, 1, 10, 30)
+    assert estado.leer("otra.csv") == 42
+
+    estado.reiniciar("salida.csv")
+    assert estado.leer("salida.csv") is None
+    assert estado.leer("otra.csv") == 42
+
+
+@pytest.mark.parametrize("tipado", [True, False])
+def test_seguimiento_del_maximo(tipado):
+    """El máximo se calcula sobre todos los chunks, también si llegan como texto."""
+    chunks = [_fuente(range(3)), _fuente(range(5, 7)), _fuente(range(2))]
+    if not tipado:
+        chunks = [chunk.astype(str) for chunk in chunks]
+    seguimiento = SeguimientoMarca("FECHA_INICIO_TRATAMIENTO")
+
+    assert len(list(seguimiento.observar(chunks))) == 3
+    assert seguimiento.maximo == pd.Timestamp(2025, 1, 7)
+
+
+def test_consulta_con_marca_solo_lee_filas_nuevas(tmp_path):
+    """Con marca, la consulta devuelve solo las filas posteriores."""
+    # SQLite guarda las fechas como texto; la marca de la prueba es una llave.
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    _fuente(range(10)).to_sql("fuente", engine, index=False)
+
+    with engine.connect() as conn:
+        sql, params = build_watermark_query("SELECT * FROM fuente;", "ID", None)
+        assert sql == "SELECT * FROM fuente" and params == {}
+
+        sql, params = build_watermark_query(
+            "SELECT * FROM fuente;", "ID_RECLAMACION", 6
+        )
+        (chunk,) = fetch_data_in_chunks(conn, sql, params=params)
+    engine.dispose()
+
+    assert len(chunk) == 3
+
+
+@pytest.mark.parametrize("nombre", ["salida.csv", "salida.csv.gz", "salida.parquet"])
+def test_anexar_agrega_al_final(tmp_path, nombre):
+    """Con `anexar` las filas nuevas quedan después de las existentes."""
+    ruta = tmp_path / nombre
+    compresion = "gzip" if nombre.endswith(".gz") else None
+    leer = pd.read_parquet if nombre.endswith(".parquet") else pd.read_csv
+
+    with crear_escritor(ruta, compresion=compresion) as escritor:
+        escritor.escribir(pd.DataFrame({"A": [1, 2], "B": ["x", "y"]}))
+    with crear_escritor(ruta, compresion=compresion, anexar=True) as escritor:
+        escritor.escribir(pd.DataFrame({"A": [3], "B": ["z"]}))
+
+    df = leer(ruta)
+    assert df["A"].tolist() == [1, 2, 3]
+    assert df["B"].tolist() == ["x", "y", "z"]
+
+
+def test_anexar_sin_filas_no_modifica_la_salida(tmp_path):
+    """Una ejecución incremental sin filas nuevas conserva la salida tal cual."""
+    ruta = tmp_path / "salida.csv"
+    ruta.write_text("A\n1\n")
+
+    with crear_escritor(ruta, anexar=True):
+        pass
+
+    assert ruta.read_text() == "A\n1\n"
+    assert list(tmp_path.iterdir()) == [ruta]
+
+
+def test_ejecuciones_incrementales(settings_mock, estado, tmp_path):
+    """Dos ejecuciones incrementales equivalen a una ejecución completa."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    salida = tmp_path / "salida.csv"
+    completa = tmp_path / "completa.csv"
+
+    def ejecutar(ruta):
+        marca = estado.leer(str(ruta))
+        seguimiento = SeguimientoMarca("ID_RECLAMACION")
+        sql, params = build_watermark_query(
+            "SELECT * FROM fuente", "ID_RECLAMACION", marca
+        )
+        with engine.connect() as conn:
+            chunks = fetch_data_in_chunks(
+                conn,
+                sql,
+                chunk_size=4,
+                esquema={"FECHA_INICIO_TRATAMIENTO": "datetime64[ns]"},
+                params=params,
+            )
+            ejecutar_pipeline(
+                seguimiento.observar(number_rows(chunks)),
+                str(ruta),
+                anexar=marca is not None,
+            )
+        if seguimiento.maximo is not None:
+            estado.guardar(str(ruta), seguimiento.columna, seguimiento.maximo)
+
+    _fuente(range(6)).to_sql("fuente", engine, index=False)
+    ejecutar(salida)
+    _fuente(range(6, 10)).to_sql("fuente", engine, index=False, if_exists="append")
+    ejecutar(salida)
+    ejecutar(salida)  # Sin filas nuevas.
+    ejecutar(completa)
+    engine.dispose()
+
+    df_salida = pd.read_csv(salida)
+    assert len(df_salida) == 20
+    assert df_salida.drop(columns="id_fila_origen").equals(
+        pd.read_csv(completa).drop(columns="id_fila_origen")
+    )
+    assert estado.leer(str(salida)) == 9
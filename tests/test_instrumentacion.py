@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import (
+    Instrumentacion,
+    Medidor,
+    ejecutar_pipeline,
+    number_rows,
+)
+from desagregacion_dsg_upc.rules import MotorReglas
+
+CHUNKS = 3
+
+
+@pytest.fixture
+def chunks() -> list[pd.DataFrame]:
+    """Chunks con filas de psicología (x5), consulta (x2), sin regla y curación (x3)."""
+    data = {
+        "DESCRIPCION_CUP": [
+            "CONSULTA DE PSICOLOGIA CLINICA",
+            "CONSULTA MEDICINA GENERAL",
+            "PROCEDIMIENTO ESPECIAL",
+            "CURACION DE HERIDA",
+        ],
+        "CODIGO_OSI": [1, 2, 3, 4],
+        "CANTIDAD_PROCEDIMIENTO": [5, 2, 7, 3],
+        "VALOR_NETO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "VALOR_LIQUIDADO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 4,
+    }
+    return list(number_rows(pd.DataFrame(data) for _ in range(CHUNKS)))
+
+
+def leer_registros(ruta) -> list[dict]:
+    return [json.loads(linea) for linea in ruta.read_text().splitlines()]
+
+
+def test_medidor_acumula_por_etapa_y_regla():
+    """Las llamadas de una misma etapa y regla se suman hasta tomarlas."""
+    medidor = Medidor()
+    for filas in (10, 20):
+        with medidor.medir("expansion", "ReglaA", filas) as medicion:
+            medicion["filas_salida"] = 3 * filas
+    with medidor.medir("escritura", filas_entrada=60):
+        pass
+
+    registros = {(r["etapa"], r["regla"]): r for r in medidor.tomar()}
+
+    expansion = registros[("expansion", "ReglaA")]
+    assert expansion["llamadas"] == 2
+    assert (expansion["filas_entrada"], expansion["filas_salida"]) == (30, 90)
+    assert expansion["bytes_asignados"] is None
+    assert registros[("escritura", None)]["filas_salida"] == 60
+    assert medidor.tomar() == []
+
+
+def test_medidor_mide_bytes_asignados():
+    """Con memoria, cuenta el pico de bytes asignados durante la etapa."""
+    medidor = Medidor(memoria=True)
+    with medidor.medir("expansion"):
+        datos = bytearray(4 * 2**20)
+
+    (registro,) = medidor.tomar()
+    assert registro["bytes_asignados"] >= len(datos)
+
+
+def test_registros_por_chunk_y_reporte(settings_mock, chunks, tmp_path):
+    """Cada chunk emite sus etapas y su total; el reporte suma la ejecución."""
+    metricas = tmp_path / "logs" / "metricas.jsonl"
+    instrumentacion = Instrumentacion(metricas)
+    motor = MotorReglas.desde_configuracion()
+
+    total = ejecutar_pipeline(
+        chunks,
+        str(tmp_path / "salida.csv"),
+        motor=motor,
+        instrumentacion=instrumentacion,
+    )
+
+    registros = leer_registros(metricas)
+    por_chunk = [r for r in registros if r["tipo"] == "chunk"]
+    assert [r["chunk"] for r in por_chunk] == [1, 2, 3]
+    assert all(r["filas_leidas"] == 4 and r["filas_escritas"] == 11 for r in por_chunk)
+
+    etapas = [r for r in registros if r["tipo"] == "etapa" and r["chunk"] == 1]
+    assert {r["etapa"] for r in etapas} == {
+        "extraccion",
+        "clasificacion",
+        "expansion",
+        "escritura",
+    }
+    curacion = next(
+        r
+        for r in etapas
+        if r["etapa"] == "expansion" and r["regla"] == "ReglaDescripcionCuraci"
+    )
+    assert curacion["factor_expansion"] == 3.0
+
+    (resumen,) = [r for r in registros if r["tipo"] == "ejecucion"]
+    assert resumen["chunks"] == CHUNKS
+    assert resumen["filas_escritas"] == total == CHUNKS * 11
+    # Las filas de expansión por regla son las de las estadísticas del motor.
+    expansion = {
+        r["regla"]: [r["filas_entrada"], r["filas_salida"]]
+        for r in resumen["etapas"]
+        if r["etapa"] == "expansion" and r["regla"] is not None
+    }
+    assert expansion == motor.estadisticas
+
+
+def test_mediciones_de_los_trabajadores(settings_mock, chunks, tmp_path):
+    """En modo procesos las mediciones de las reglas vuelven de los trabajadores."""
+    instrumentacion = Instrumentacion()
+    motor = MotorReglas.desde_configuracion()
+
+    ejecutar_pipeline(
+        chunks,
+        str(tmp_path / "salida.csv"),
+        motor=motor,
+        trabajadores=2,
+        instrumentacion=instrumentacion,
+    )
+
+    resumen = instrumentacion.resumen()
+    clasificacion = [r for r in resumen["etapas"] if r["etapa"] == "clasificacion"]
+    # Una medición por regla y una por la máscara de palabras de cada chunk.
+    assert len(clasificacion) == len(motor.reglas) + 1
+    assert all(r["llamadas"] == CHUNKS for r in clasificacion)
+    escritura = next(r for r in resumen["etapas"] if r["etapa"] == "escritura")
+    assert escritura["filas_salida"] == CHUNKS * 11
@@ -0,0 +1,167 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    DatabaseError,
+    ExportadorPrometheus,
+    Instrumentacion,
+    RegistroMetricas,
+    ejecutar_pipeline,
+    fetch_data_in_chunks,
+    metricas,
+    number_rows,
+)
+from desagregacion_dsg_upc.utils_db import oracle_error_code
+
+
+@pytest.fixture
+def registro():
+    """Registro de métricas del proceso, vacío al inicio de cada prueba."""
+    metricas.registro.reiniciar()
+    yield metricas.registro
+    metricas.registro.reiniciar()
+
+
+def test_formato_de_texto_de_prometheus():
+    """Contadores con etiquetas escapadas e histogramas con buckets acumulados."""
+    registro = RegistroMetricas()
+    registro.incrementar(
+        "desagregacion_errores_bd_total", codigo="ORA-03113", operacion="lectura"
+    )
+    registro.incrementar("desagregacion_filas_regla_total", 5, regla='A"B', fase="x")
+    for segundos in (0.02, 0.3, 100.0):
+        registro.observar("desagregacion_lectura_bd_duracion_segundos", segundos)
+
+    lineas = registro.exponer().splitlines()
+
+    assert "# TYPE desagregacion_errores_bd_total counter" in lineas
+    assert (
+        'desagregacion_errores_bd_total{codigo="ORA-03113",operacion="lectura"} 1'
+        in lineas
+    )
+    assert 'desagregacion_filas_regla_total{fase="x",regla="A\\"B"} 5' in lineas
+    nombre = "desagregacion_lectura_bd_duracion_segundos"
+    assert f'{nombre}_bucket{{le="0.01"}} 0' in lineas
+    assert f'{nombre}_bucket{{le="0.05"}} 1' in lineas
+    assert f'{nombre}_bucket{{le="0.5"}} 2' in lineas
+    assert f'{nombre}_bucket{{le="60.0"}} 2' in lineas
+    assert f'{nombre}_bucket{{le="+Inf"}} 3' in lineas
+    assert f"{nombre}_count 3" in lineas
+
+
+def test_tipo_de_metrica_incorrecto():
+    with pytest.raises(ValueError):
+        RegistroMetricas().incrementar("desagregacion_ejecucion_en_curso")
+
+
+def test_exportador_escribe_al_iniciar_y_al_terminar(tmp_path):
+    """El archivo se reemplaza sin dejar temporales y registra si la ejecución falló."""
+    registro = RegistroMetricas()
+    ruta = tmp_path / "textfile" / "desagregacion.prom"
+
+    with ExportadorPrometheus(ruta, intervalo_s=0, metricas=registro):
+        assert "desagregacion_ejecucion_en_curso 1" in ruta.read_text()
+        registro.incrementar("desagregacion_chunks_total", 3)
+
+    contenido = ruta.read_text()
+    assert "desagregacion_chunks_total 3" in contenido
+    assert "desagregacion_ejecucion_exitosa 1" in contenido
+    assert list(ruta.parent.iterdir()) == [ruta]
+
+    with (
+        pytest.raises(DatabaseError),
+        ExportadorPrometheus(ruta, intervalo_s=0, metricas=registro),
+    ):
+        raise DatabaseError("ORA-00257: archiver error")
+    assert "desagregacion_ejecucion_exitosa 0" in ruta.read_text()
+
+
+def test_exportador_periodico(tmp_path):
+    """Durante la ejecución el archivo se actualiza cada intervalo."""
+    registro = RegistroMetricas()
+    ruta = tmp_path / "desagregacion.prom"
+
+    with ExportadorPrometheus(ruta, intervalo_s=0.01, metricas=registro):
+        registro.incrementar("desagregacion_chunks_total")
+        time.sleep(0.2)
+        assert "desagregacion_chunks_total 1" in ruta.read_text()
+
+
+def test_codigo_de_error_de_oracle():
+    """El código se busca en toda la cadena de excepciones."""
+    try:
+        try:
+            raise RuntimeError(
+                "DPY-4011: the database or network closed the connection"
+            )
+        except RuntimeError as e:
+            raise DatabaseError("Failed to fetch data in chunks") from e
+    except DatabaseError as e:
+        assert oracle_error_code(e) == "DPY-4011"
+
+    assert oracle_error_code(DatabaseError("ORA-03113: end-of-file")) == "ORA-03113"
+    assert oracle_error_code(DatabaseError("sin código")) == "desconocido"
+
+
+def test_lecturas_y_errores_de_base_de_datos(registro, tmp_path):
+    """Cada chunk leído se mide; los errores se cuentan por código y operación."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    pd.DataFrame({"ID": range(25)}).to_sql("fuente", engine, index=False)
+
+    with engine.connect() as conn:
+        assert len(list(fetch_data_in_chunks(conn, "SELECT * FROM fuente", 10))) == 3
+        with pytest.raises(DatabaseError):
+            list(fetch_data_in_chunks(conn, "SELECT * FROM no_existe", 10))
+    engine.dispose()
+
+    lecturas = registro.valor("desagregacion_lectura_bd_duracion_segundos")
+    assert sum(lecturas.cuentas) == 3
+    assert (
+        registro.valor(
+            "desagregacion_errores_bd_total",
+            codigo="desconocido",
+            operacion="lectura",
+        )
+        == 1
+    )
+
+
+def test_instrumentacion_alimenta_las_metricas(settings_mock, registro, tmp_path):
+    """Sin registros JSON, la instrumentación solo actualiza las métricas."""
+    data = {
+        "DESCRIPCION_CUP": ["CURACION DE HERIDA", "PROCEDIMIENTO ESPECIAL"],
+        "CODIGO_OSI": [1, 2],
+        "CANTIDAD_PROCEDIMIENTO": [3, 7],
+        "VALOR_NETO": [3000.0, 7000.0],
+        "VALOR_LIQUIDADO": [3000.0, 7000.0],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 2,
+    }
+    chunks = number_rows(pd.DataFrame(data) for _ in range(2))
+    metricas_json = tmp_path / "metricas.jsonl"
+
+    ejecutar_pipeline(
+        chunks,
+        str(tmp_path / "salida.csv"),
+        instrumentacion=Instrumentacion(metricas_json, registros=False),
+    )
+
+    assert not metricas_json.exists()
+    assert registro.valor("desagregacion_chunks_total") == 2
+    assert registro.valor("desagregacion_filas_extraidas_total") == 4
+    assert registro.valor("desagregacion_filas_escritas_total") == 8
+    curacion = {"regla": "ReglaDescripcionCuraci"}
+    assert (
+        registro.valor("desagregacion_filas_regla_total", **curacion, fase="origen")
+        == 2
+    )
+    assert (
+        registro.valor(
+            "desagregacion_filas_regla_total", **curacion, fase="desagregadas"
+        )
+        == 6
+    )
+    assert registro.valor("desagregacion_memoria_rss_pico_bytes") > 0
@@ -0,0 +1,173 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import ConfigError
+from desagregacion_dsg_upc.rules import (
+    REGLAS_POR_DEFECTO,
+    MotorReglas,
+    ReglaConsultaCantidadMenor,
+    ReglaConsultaPsicologiaCantidadMenor15,
+)
+from desagregacion_dsg_upc.rules.base import COLUMNAS_AUXILIARES
+from desagregacion_dsg_upc.rules.coincidencias import comparador
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """DataFrame de ejemplo con una fila que cumple dos reglas."""
+    data = {
+        "DESCRIPCION_CUP": [
+            "CONSULTA DE PSICOLOGIA CLINICA",  # Cumple Psicología <= 15 y Consulta <= 6
+            "CONSULTA MEDICINA GENERAL",  # Cumple Consulta <= 6
+            "PROCEDIMIENTO ESPECIAL",  # No cumple ninguna regla
+        ],
+        "CODIGO_OSI": [1, 2, 3],
+        "CANTIDAD_PROCEDIMIENTO": [5, 2, 7],
+        "VALOR_NETO": [5000.0, 2000.0, 7000.0],
+        "FECHA_INICIO_TRATAMIENTO": [
+            datetime(2025, 1, 1),
+            datetime(2025, 2, 1),
+            datetime(2025, 3, 1),
+        ],
+        "OTRA_COLUMNA": ["A", "B", "C"],
+    }
+    return pd.DataFrame(data)
+
+
+def _codigo(regla: type) -> int:
+    return REGLAS_POR_DEFECTO.index(regla) + 1
+
+
+def test_asignar_respeta_precedencia_por_defecto(settings_mock, sample_df):
+    """La fila que cumple dos reglas queda asignada a la más específica."""
+    motor = MotorReglas.desde_configuracion()
+
+    ids = motor.asignar(sample_df)
+
+    assert ids.tolist() == [
+        _codigo(ReglaConsultaPsicologiaCantidadMenor15),
+        _codigo(ReglaConsultaCantidadMenor),
+        0,
+    ]
+
+
+def test_mascara_de_palabras_una_vez_por_chunk(settings_mock, sample_df, monkeypatch):
+    """Todas las reglas comparten la máscara del chunk, también con dtype object."""
+    motor = MotorReglas.desde_configuracion()
+    calculos = []
+    original = comparador._calcular
+
+    def contar(serie):
+        calculos.append(len(serie))
+        return original(serie)
+
+    monkeypatch.setattr(comparador, "_calcular", contar)
+    chunk = sample_df.astype({"DESCRIPCION_CUP": object})
+
+    motor.asignar(chunk)
+    assert len(calculos) == 1
+
+    list(motor.iterar(chunk))
+    assert len(calculos) == 2
+
+
+def test_ejecutar_expande_cada_fila_una_sola_vez(settings_mock, sample_df):
+    """La fila con dos reglas se expande solo con la regla asignada."""
+    motor = MotorReglas.desde_configuracion()
+
+    df_procesado = motor.ejecutar(sample_df)
+
+    assert len(df_procesado) == 5 + 2 + 1
+
+    df_a = df_procesado[df_procesado["OTRA_COLUMNA"] == "A"]
+    expected_dates_a = [
+        pd.Timestamp("2025-01-01") + pd.Timedelta(days=i) for i in range(5)
+    ]
+    assert df_a["FECHA_INICIO_TRATAMIENTO"].tolist() == expected_dates_a
+
+    df_c = df_procesado[df_procesado["OTRA_COLUMNA"] == "C"]
+    assert df_c["id_regla"].tolist() == [0]
+    assert df_c["CANTIDAD_PROCEDIMIENTO"].tolist() == [7]
+
+
+def test_precedencia_configurable(settings_mock, sample_df):
+    """Con otra precedencia la fila compartida usa la regla de consulta general."""
+    motor = MotorReglas.desde_configuracion(
+        ["ReglaConsultaCantidadMenor", "ReglaConsultaPsicologiaCantidadMenor15"]
+    )
+
+    df_procesado = motor.ejecutar(sample_df)
+
+    df_a = df_procesado[df_procesado["OTRA_COLUMNA"] == "A"]
+    # Consulta <= 6: intervalo de round(30 / 5) = 6 días.
+    expected_dates_a = [
+        pd.Timestamp("2025-01-01") + pd.Timedelta(days=6 * i) for i in range(5)
+    ]
+    assert df_a["FECHA_INICIO_TRATAMIENTO"].tolist() == expected_dates_a
+    assert set(df_a["id_regla"]) == {_codigo(ReglaConsultaCantidadMenor)}
+
+
+def test_precedencia_desde_settings(settings_mock, sample_df):
+    """Si no se indica precedencia se usa `processing.precedencia_reglas`."""
+    settings_mock.processing.precedencia_reglas = ["ReglaDescripcionCuraci"]
+
+    motor = MotorReglas.desde_configuracion()
+
+    assert [type(regla).__name__ for regla in motor.reglas] == [
+        "ReglaDescripcionCuraci"
+    ]
+
+
+def test_precedencia_con_regla_desconocida(settings_mock):
+    """Un nombre de regla inexistente es un error de configuración."""
+    with pytest.raises(ConfigError):
+        MotorReglas.desde_configuracion(["ReglaQueNoExiste"])
+
+
+def test_ejecutar_sin_coincidencias_no_desagrega(settings_mock, sample_df):
+    """Si ninguna fila aplica, el chunk se devuelve con `id_regla` en 0."""
+    df_sin_regla = sample_df.iloc[[2]]
+
+    df_procesado = MotorReglas.desde_configuracion().ejecutar(df_sin_regla)
+
+    assert len(df_procesado) == 1
+    assert df_procesado["id_regla"].tolist() == [0]
+
+
+def test_iterar_divide_en_sub_lotes_segun_presupuesto(settings_mock, sample_df):
+    """Con un presupuesto pequeño la expansión se entrega en varios sub-lotes."""
+    sin_presupuesto = MotorReglas.desde_configuracion()
+    sin_presupuesto.memoria_maxima = None
+    df_esperado = sin_presupuesto.ejecutar(sample_df)
+
+    motor = MotorReglas.desde_configuracion()
+    bytes_por_fila = sample_df.memory_usage(index=True).sum() / len(sample_df)
+    # Presupuesto para 3 filas expandidas: la fila A (5 filas) lo supera y va
+    # sola; las filas B (2) y C (1) caben juntas en el segundo sub-lote. Cada fila
+    # lleva además la máscara de palabras (uint64) y el id de regla (int8).
+    motor.memoria_maxima = int(
+        3 * (bytes_por_fila + 8 * len(COLUMNAS_AUXILIARES) + 8 + 1) + 1
+    )
+
+    partes = list(motor.iterar(sample_df))
+
+    assert [len(parte) for parte in partes] == [5, 3]
+    pd.testing.assert_frame_equal(
+        pd.concat(partes).sort_index(kind="stable"),
+        df_esperado.sort_index(kind="stable"),
+    )
+
+
+def test_estadisticas_por_regla(settings_mock, sample_df):
+    """El motor acumula filas de origen y filas desagregadas por regla."""
+    motor = MotorReglas.desde_configuracion()
+
+    motor.ejecutar(sample_df)
+    motor.ejecutar(sample_df)
+
+    assert motor.estadisticas == {
+        "ReglaConsultaPsicologiaCantidadMenor15": [2, 10],
+        "ReglaConsultaCantidadMenor": [2, 4],
+    }
@@ -0,0 +1,116 @@
+import multiprocessing
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import ConfigError, ejecutar_pipeline, number_rows, paralelo
+from desagregacion_dsg_upc.rules import MotorReglas
+
+
+@pytest.fixture
+def chunks() -> list[pd.DataFrame]:
+    """Varios chunks numerados con filas para distintas reglas."""
+    data = {
+        "DESCRIPCION_CUP": [
+            "CONSULTA DE PSICOLOGIA CLINICA",
+            "CONSULTA MEDICINA GENERAL",
+            "PROCEDIMIENTO ESPECIAL",
+            "CURACION DE HERIDA",
+        ],
+        "CODIGO_OSI": [1, 2, 3, 4],
+        "CANTIDAD_PROCEDIMIENTO": [5, 2, 7, 3],
+        "VALOR_NETO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "VALOR_LIQUIDADO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 4,
+    }
+    return list(number_rows(pd.DataFrame(data) for _ in range(7)))
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_salida_igual_a_la_ejecucion_en_serie(
+    settings_mock, chunks, tmp_path, monkeypatch, arrow
+):
+    """Con varios procesos la salida y su orden son los mismos que en serie."""
+    if not arrow:
+        monkeypatch.setattr(paralelo, "pa", None)
+
+    serie = tmp_path / "serie.csv"
+    en_paralelo = tmp_path / "paralelo.csv"
+
+    ejecutar_pipeline(chunks, str(serie))
+    motor = MotorReglas.desde_configuracion()
+    total = ejecutar_pipeline(chunks, str(en_paralelo), motor=motor, trabajadores=2)
+
+    assert total == 7 * 11
+    assert en_paralelo.read_text() == serie.read_text()
+    # Las estadísticas de los trabajadores se acumulan en el motor principal.
+    assert motor.estadisticas["ReglaDescripcionCuraci"] == [7, 21]
+
+
+def test_entrega_los_chunks_en_orden(settings_mock, chunks):
+    """Cada resultado corresponde al chunk enviado en la misma posición."""
+    resultados = list(
+        paralelo.procesar_en_procesos(chunks, MotorReglas.desde_configuracion(), 3)
+    )
+
+    assert [filas for filas, _ in resultados] == [4] * 7
+    primeros_ids = [partes[0]["id_fila_origen"].iloc[0] for _, partes in resultados]
+    assert primeros_ids == [4 * i for i in range(7)]
+
+
+def test_sin_forkserver_usa_spawn(settings_mock, chunks, monkeypatch):
+    """Donde no existe forkserver (Windows) los trabajadores se inician con spawn."""
+    metodos = []
+    get_context = multiprocessing.get_context
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    monkeypatch.setattr(
+        multiprocessing,
+        "get_context",
+        lambda metodo: metodos.append(metodo) or get_context(metodo),
+    )
+
+    resultados = list(
+        paralelo.procesar_en_procesos(chunks[:2], MotorReglas.desde_configuracion(), 2)
+    )
+
+    assert metodos == ["spawn"]
+    assert [filas for filas, _ in resultados] == [4, 4]
+
+
+def test_hilos_sin_gil_igual_a_la_ejecucion_en_serie(
+    settings_mock, chunks, tmp_path, monkeypatch
+):
+    """En modo hilos la salida es la misma que en serie y en el mismo orden."""
+    monkeypatch.setattr(paralelo, "gil_activo", lambda: False)
+    serie = tmp_path / "serie.csv"
+    en_hilos = tmp_path / "hilos.csv"
+
+    ejecutar_pipeline(chunks, str(serie))
+    motor = MotorReglas.desde_configuracion()
+    ejecutar_pipeline(
+        chunks, str(en_hilos), motor=motor, trabajadores=4, modo_paralelo="hilos"
+    )
+
+    assert en_hilos.read_text() == serie.read_text()
+    assert motor.estadisticas["ReglaDescripcionCuraci"] == [7, 21]
+
+
+def test_hilos_con_gil_procesa_en_serie(settings_mock, chunks, monkeypatch):
+    """Con GIL no se crea el pool: cada chunk se procesa en el hilo actual."""
+    monkeypatch.setattr(paralelo, "gil_activo", lambda: True)
+    monkeypatch.setattr(paralelo, "ThreadPoolExecutor", None)
+
+    resultados = list(
+        paralelo.procesar_en_hilos(chunks, MotorReglas.desde_configuracion(), 4)
+    )
+
+    assert [sum(len(p) for p in partes) for _, partes in resultados] == [11] * 7
+
+
+def test_modo_paralelo_desconocido(settings_mock, chunks, tmp_path):
+    """Un modo no soportado es un error de configuración."""
+    with pytest.raises(ConfigError):
+        ejecutar_pipeline(
+            chunks, str(tmp_path / "salida.csv"), trabajadores=2, modo_paralelo="gpu"
+        )
@@ -0,0 +1,91 @@
+import pstats
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import (
+    Instrumentacion,
+    Perfilador,
+    ejecutar_pipeline,
+    number_rows,
+)
+
+
+@pytest.fixture
+def chunks() -> list[pd.DataFrame]:
+    data = {
+        "DESCRIPCION_CUP": ["CURACION DE HERIDA", "CONSULTA MEDICINA GENERAL"],
+        "CODIGO_OSI": [1, 2],
+        "CANTIDAD_PROCEDIMIENTO": [3, 2],
+        "VALOR_NETO": [3000.0, 2000.0],
+        "VALOR_LIQUIDADO": [3000.0, 2000.0],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)] * 2,
+    }
+    return list(number_rows(pd.DataFrame(data) for _ in range(3)))
+
+
+def test_perfiles_por_chunk_etapa_y_regla(settings_mock, chunks, tmp_path):
+    """Solo se perfilan los chunks elegidos, con un archivo por etapa y regla."""
+    directorio = tmp_path / "perfiles"
+    perfilador = Perfilador(directorio, chunks={2})
+
+    # El perfilado procesa en serie aunque se pidan varios trabajadores.
+    ejecutar_pipeline(
+        chunks,
+        str(tmp_path / "salida.csv"),
+        trabajadores=2,
+        instrumentacion=Instrumentacion(registros=False, perfilador=perfilador),
+    )
+
+    nombres = {ruta.name for ruta in directorio.iterdir()}
+    assert perfilador.perfilados == [2]
+    assert all(nombre.startswith("chunk00002_") for nombre in nombres)
+    assert {
+        "chunk00002_extraccion.pstats",
+        "chunk00002_clasificacion_ReglaDescripcionCuraci.pstats",
+        "chunk00002_expansion_ReglaDescripcionCuraci.pstats",
+        "chunk00002_escritura.pstats",
+    } <= nombres
+
+    estadisticas = pstats.Stats(
+        str(directorio / "chunk00002_expansion_ReglaDescripcionCuraci.pstats")
+    )
+    funciones = {funcion for _, _, funcion in estadisticas.stats}
+    assert "_expandir_parametros" in funciones
+
+
+def test_muestreo_escribe_pilas_colapsadas(tmp_path):
+    """Cada línea es una pila "externa;...;interna" y su número de muestras."""
+    perfilador = Perfilador(tmp_path, "muestreo", intervalo_s=0.001)
+
+    def ocupado():
+        fin = time.perf_counter() + 0.2
+        while time.perf_counter() < fin:
+            sum(range(1000))
+
+    with perfilador.perfilar("expansion", "ReglaX"):
+        ocupado()
+    perfilador.cerrar_chunk(1)
+    perfilador.cerrar()
+
+    lineas = (tmp_path / "chunk00001_expansion_ReglaX.collapsed").read_text()
+    pilas = [linea.rsplit(" ", 1) for linea in lineas.splitlines()]
+    assert pilas and all(int(muestras) > 0 for _, muestras in pilas)
+    assert any("ocupado (test_perfilado.py" in pila for pila, _ in pilas)
+
+
+def test_fraccion_de_chunks_reproducible(tmp_path):
+    """Con la misma semilla se eligen los mismos chunks."""
+
+    def elegidos():
+        perfilador = Perfilador(tmp_path, fraccion=0.3, semilla=7)
+        for numero in range(1, 41):
+            with perfilador.perfilar("escritura"):
+                pass
+            perfilador.cerrar_chunk(numero)
+        return perfilador.perfilados
+
+    assert 0 < len(elegidos()) < 40
+    assert elegidos() == elegidos()
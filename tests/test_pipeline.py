@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import ejecutar_pipeline, procesar_chunk
+from desagregacion_dsg_upc.rules import MotorReglas
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """DataFrame de ejemplo con filas para varias reglas y filas sin regla."""
+    data = {
+        "DESCRIPCION_CUP": [
+            "CONSULTA DE PSICOLOGIA CLINICA",  # Psicología <= 15: 5 filas
+            "CONSULTA MEDICINA GENERAL",  # Consulta <= 6: 2 filas
+            "PROCEDIMIENTO ESPECIAL",  # Sin regla: 1 fila
+            "CURACION DE HERIDA",  # Curaci: 3 filas
+        ],
+        "CODIGO_OSI": [1, 2, 3, 4],
+        "CANTIDAD_PROCEDIMIENTO": [5, 2, 7, 3],
+        "VALOR_NETO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "VALOR_LIQUIDADO": [5000.0, 2000.0, 7000.0, 3000.0],
+        "FECHA_INICIO_TRATAMIENTO": [
+            datetime(2025, 1, 1),
+            datetime(2025, 2, 1),
+            datetime(2025, 3, 1),
+            datetime(2025, 4, 1),
+        ],
+        "OTRA_COLUMNA": ["A", "B", "C", "D"],
+    }
+    return pd.DataFrame(data)
+
+
+def test_procesar_chunk_asigna_una_regla_por_fila(settings_mock, sample_df):
+    """Cada fila se expande una sola vez, aunque cumpla varias reglas."""
+    df_procesado = procesar_chunk(sample_df, MotorReglas.desde_configuracion())
+
+    assert len(df_procesado) == 5 + 2 + 1 + 3
+    assert (
+        df_procesado["OTRA_COLUMNA"].tolist()
+        == ["A"] * 5 + ["B"] * 2 + ["C"] + ["D"] * 3
+    )
+    assert "divisor_costo" not in df_procesado.columns
+
+    df_sin_regla = df_procesado[df_procesado["OTRA_COLUMNA"] == "C"]
+    assert df_sin_regla["CANTIDAD_PROCEDIMIENTO"].tolist() == [7]
+
+
+def test_ejecutar_pipeline_escribe_cada_chunk_antes_del_siguiente(
+    settings_mock, sample_df, tmp_path
+):
+    """El pipeline escribe un chunk antes de pedir el siguiente al generador."""
+    output_file = tmp_path / "salida" / "desagregado.csv"
+    lineas_por_chunk = []
+
+    def generar_chunks():
+        for _ in range(2):
+            yield sample_df
+            # La salida se escribe en un temporal hasta que el pipeline termina.
+            assert not output_file.exists()
+            (temporal,) = output_file.parent.glob(".desagregado.csv.*.tmp")
+            lineas_por_chunk.append(len(temporal.read_text().splitlines()))
+
+    total = ejecutar_pipeline(generar_chunks(), str(output_file))
+
+    assert total == 22
+    # Encabezado + 11 filas tras el primer chunk, 11 filas más tras el segundo.
+    assert lineas_por_chunk == [12, 23]
+
+    df_salida = pd.read_csv(output_file)
+    assert len(df_salida) == 22
+    assert list(df_salida.columns) == list(sample_df.columns) + ["id_regla"]
+    assert list(output_file.parent.iterdir()) == [output_file]
+
+
+def test_ejecutar_pipeline_con_error_conserva_la_salida_anterior(
+    settings_mock, sample_df, tmp_path
+):
+    """Si la extracción falla, no se publica una salida parcial."""
+    output_file = tmp_path / "desagregado.csv"
+    output_file.write_text("salida anterior\n")
+
+    def generar_chunks():
+        yield sample_df
+        raise RuntimeError("conexión perdida")
+
+    with pytest.raises(RuntimeError):
+        ejecutar_pipeline(generar_chunks(), str(output_file))
+
+    assert output_file.read_text() == "salida anterior\n"
+    assert list(tmp_path.iterdir()) == [output_file]
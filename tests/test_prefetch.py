@@ -0,0 +1,91 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import extraccion
+from desagregacion_dsg_upc.concurrencia import precargar
+
+
+def test_lee_por_adelantado_hasta_la_profundidad():
+    """El productor avanza mientras el consumidor trabaja, sin pasar de la cola."""
+    producidos = []
+
+    def productor():
+        for i in range(10):
+            producidos.append(i)
+            yield i
+
+    elementos = precargar(productor, profundidad=3)
+    assert next(elementos) == 0
+    time.sleep(0.2)
+
+    # Uno entregado, tres en la cola y uno esperando lugar en ella.
+    assert len(producidos) == 5
+    assert list(elementos) == list(range(1, 10))
+
+
+def test_el_tiempo_total_se_acerca_al_maximo():
+    """Con lectura anticipada la espera de E/S se solapa con el procesamiento."""
+
+    def productor():
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    inicio = time.perf_counter()
+    for _ in precargar(productor, profundidad=2):
+        time.sleep(0.05)
+    transcurrido = time.perf_counter() - inicio
+
+    # En serie serían 0.5 s; solapados, ~0.3 s.
+    assert transcurrido < 0.45
+
+
+def test_propaga_el_error_del_productor():
+    """Un error en la lectura se relanza en el consumidor."""
+
+    def productor():
+        yield 1
+        raise RuntimeError("conexión perdida")
+
+    with pytest.raises(RuntimeError, match="conexión perdida"):
+        list(precargar(productor))
+
+
+def test_cierra_el_productor_si_el_consumidor_se_detiene():
+    """Al abandonar la lectura, el generador se cierra y libera sus recursos."""
+    cerrado = threading.Event()
+
+    def productor():
+        try:
+            yield from range(100)
+        finally:
+            cerrado.set()
+
+    elementos = precargar(productor, profundidad=1)
+    assert next(elementos) == 0
+    elementos.close()
+
+    assert cerrado.wait(timeout=2)
+
+
+def test_extraer_chunks_con_prefetch(monkeypatch):
+    """La extracción con lectura anticipada entrega los chunks en orden y numerados."""
+    hilos = []
+
+    def leer_chunks(processing, marca=None):
+        for i in range(4):
+            hilos.append(threading.current_thread().name)
+            yield pd.DataFrame({"VALOR_NETO": [float(i)] * 3})
+
+    monkeypatch.setattr(extraccion, "_leer_chunks", leer_chunks)
+    processing = SimpleNamespace(profundidad_prefetch=2, particiones=1)
+
+    chunks = list(extraccion.extraer_chunks(processing))
+
+    assert [c["VALOR_NETO"].iloc[0] for c in chunks] == [0.0, 1.0, 2.0, 3.0]
+    assert pd.concat(chunks)["id_fila_origen"].tolist() == list(range(12))
+    assert all(nombre != threading.main_thread().name for nombre in hilos)
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    ConfigError,
+    columnas_requeridas,
+    fetch_data_in_chunks,
+)
+from desagregacion_dsg_upc.extraccion import consulta_proyectada
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    """Tabla ancha en SQLite con columnas que las reglas no usan."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    pd.DataFrame(
+        {
+            "DESCRIPCION_CUP": ["CONSULTA MEDICINA GENERAL"],
+            "CODIGO_OSI": [1],
+            "CANTIDAD_PROCEDIMIENTO": [2],
+            "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1)],
+            "VALOR_NETO": [2000.0],
+            "VALOR_LIQUIDADO": [2000.0],
+            "NUMERO_FACTURA": ["F-1"],
+            "OBSERVACIONES": ["texto largo que no se necesita"],
+        }
+    ).to_sql("fuente", engine, index=False)
+
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+def test_columnas_requeridas(settings_mock):
+    """Columnas de las reglas y de paso, sin repetidos."""
+    processing = settings_mock.processing
+    processing.columns_passthrough = ["NUMERO_FACTURA", "CODIGO_OSI"]
+
+    assert columnas_requeridas(processing) == [
+        "DESCRIPCION_CUP",
+        "CODIGO_OSI",
+        "CANTIDAD_PROCEDIMIENTO",
+        "FECHA_INICIO_TRATAMIENTO",
+        "VALOR_NETO",
+        "VALOR_LIQUIDADO",
+        "NUMERO_FACTURA",
+    ]
+
+
+def test_sin_columnas_de_paso_se_lee_la_consulta_completa(settings_mock, conexion):
+    """Sin `columns_passthrough` la consulta no se modifica."""
+    settings_mock.processing.query_input = "SELECT * FROM fuente"
+
+    consulta = consulta_proyectada(conexion, settings_mock.processing)
+
+    assert consulta == "SELECT * FROM fuente"
+
+
+def test_la_consulta_proyectada_solo_lee_las_columnas_necesarias(
+    settings_mock, conexion
+):
+    """La consulta envuelta devuelve las columnas requeridas y nada más."""
+    processing = settings_mock.processing
+    processing.query_input = "SELECT * FROM fuente;\n"
+    processing.columns_passthrough = ["numero_factura"]
+
+    consulta = consulta_proyectada(conexion, processing)
+    (chunk,) = fetch_data_in_chunks(conexion, consulta)
+
+    assert "OBSERVACIONES" not in chunk.columns
+    assert len(chunk.columns) == 7
+
+
+def test_columna_configurada_inexistente(settings_mock, conexion):
+    """Una columna que no devuelve la consulta falla antes de leer datos."""
+    processing = settings_mock.processing
+    processing.query_input = "SELECT * FROM fuente"
+    processing.columns_passthrough = ["NUMERO_FACTURA", "NO_EXISTE"]
+
+    with pytest.raises(ConfigError, match="NO_EXISTE"):
+        consulta_proyectada(conexion, processing)
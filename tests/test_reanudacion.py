@@ -0,0 +1,222 @@
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from desagregacion_dsg_upc import (
+    ConfigError,
+    DatabaseError,
+    EscritorSalida,
+    PuntoControl,
+    Reanudacion,
+    build_keyset_query,
+    crear_escritor,
+    ejecutar_pipeline,
+    fetch_keyset_pages,
+    number_rows,
+    utils_db,
+)
+from desagregacion_dsg_upc.extraccion import consulta_proyectada
+
+FILAS = 23
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Tabla en SQLite con una llave única, insertada en desorden."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fuente.db'}")
+    ids = list(range(FILAS))[::-1]
+    pd.DataFrame(
+        {
+            "ID_REGISTRO": ids,
+            "DESCRIPCION_CUP": ["CONSULTA MEDICINA GENERAL"] * FILAS,
+            "CODIGO_OSI": [1] * FILAS,
+            "CANTIDAD_PROCEDIMIENTO": [i % 3 + 1 for i in ids],
+            "VALOR_NETO": [1000.0 * (i + 1) for i in ids],
+            "VALOR_LIQUIDADO": [1000.0 * (i + 1) for i in ids],
+            "FECHA_INICIO_TRATAMIENTO": ["2025-01-01"] * FILAS,
+        }
+    ).to_sql("fuente", engine, index=False)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def conexiones(engine):
+    @contextmanager
+    def fabrica():
+        with engine.connect() as conn:
+            yield conn
+
+    return fabrica
+
+
+@pytest.fixture
+def fallas(monkeypatch):
+    """Hace fallar las lecturas de página indicadas (numeradas desde 1)."""
+    lecturas = {"numero": 0, "fallan": set()}
+    original = utils_db.fetch_data_in_chunks
+
+    def fetch(*args, **kwargs):
+        lecturas["numero"] += 1
+        if lecturas["numero"] in lecturas["fallan"]:
+            raise DatabaseError("ORA-03113: end-of-file on communication channel")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(utils_db, "fetch_data_in_chunks", fetch)
+    return lecturas["fallan"]
+
+
+def test_consulta_por_llave_segun_dialecto():
+    """Oracle usa FETCH FIRST; el resto de motores, LIMIT."""
+    sql, params = build_keyset_query("SELECT * FROM t;", "ID", None, 100, "oracle")
+    assert sql == "SELECT * FROM (SELECT * FROM t) q ORDER BY q.ID " + (
+        "FETCH FIRST :filas ROWS ONLY"
+    )
+    assert params == {"filas": 100}
+
+    sql, params = build_keyset_query("SELECT * FROM t", "ID", 7, 100, "sqlite")
+    assert sql.endswith("WHERE q.ID > :ultima_llave ORDER BY q.ID LIMIT :filas")
+    assert params == {"filas": 100, "ultima_llave": 7}
+
+
+def test_paginas_ordenadas_y_completas(conexiones):
+    """Cada página es un chunk y juntas devuelven cada fila una vez, en orden."""
+    paginas = list(
+        fetch_keyset_pages(
+            "SELECT * FROM fuente", "ID_REGISTRO", 10, connection_factory=conexiones
+        )
+    )
+
+    assert [len(p) for p in paginas] == [10, 10, 3]
+    ids = pd.concat(paginas)["ID_REGISTRO"].astype(int).tolist()
+    assert ids == list(range(FILAS))
+
+
+def test_paginas_de_la_consulta_proyectada(settings_mock, conexiones):
+    """La proyección conserva la columna de paginación aunque no sea de paso."""
+    processing = settings_mock.processing
+    processing.query_input = "SELECT * FROM fuente"
+    processing.columns_passthrough = ["CODIGO_OSI"]
+    processing.modo_reanudable = True
+    processing.columna_paginacion = "ID_REGISTRO"
+
+    with conexiones() as conn:
+        consulta = consulta_proyectada(conn, processing)
+    paginas = list(
+        fetch_keyset_pages(consulta, "ID_REGISTRO", 10, connection_factory=conexiones)
+    )
+
+    assert [len(p) for p in paginas] == [10, 10, 3]
+    assert "ID_REGISTRO" in paginas[0].columns
+
+
+def test_pagina_fallida_se_reintenta_desde_la_ultima_llave(conexiones, fallas):
+    """Una página que falla se vuelve a pedir sin repetir ni perder filas."""
+    fallas.update({2, 3})
+
+    paginas = fetch_keyset_pages(
+        "SELECT * FROM fuente",
+        "ID_REGISTRO",
+        10,
+        esquema={"ID_REGISTRO": "Int64"},
+        retries=2,
+        backoff=0,
+        connection_factory=conexiones,
+    )
+
+    ids = pd.concat(list(paginas))["ID_REGISTRO"].tolist()
+    assert ids == list(range(FILAS))
+
+
+def test_reintentos_agotados(conexiones, fallas):
+    """Si la página sigue fallando después de los reintentos, se propaga el error."""
+    fallas.update({2, 3, 4})
+
+    paginas = fetch_keyset_pages(
+        "SELECT * FROM fuente",
+        "ID_REGISTRO",
+        10,
+        retries=2,
+        backoff=0,
+        connection_factory=conexiones,
+    )
+
+    with pytest.raises(DatabaseError):
+        list(paginas)
+
+
+def test_parquet_no_admite_reanudacion(tmp_path):
+    """Parquet escribe su pie al cerrar: no hay un punto intermedio válido."""
+    with pytest.raises(ConfigError):
+        crear_escritor(tmp_path / "salida.parquet", reanudable=True)
+
+
+@pytest.mark.parametrize("compresion", [None, "gzip"])
+def test_ejecucion_interrumpida_se_reanuda(
+    settings_mock, conexiones, fallas, tmp_path, compresion
+):
+    """Reanudar después de una falla da la misma salida que una ejecución sin fallas."""
+    salida = tmp_path / "salida.csv"
+    completa = tmp_path / "completa.csv"
+    checkpoint = tmp_path / "estado" / "checkpoint.json"
+
+    def ejecutar(ruta):
+        reanudacion = Reanudacion(
+            PuntoControl(checkpoint, str(ruta), "firma"), "ID_REGISTRO"
+        )
+        paginas = fetch_keyset_pages(
+            "SELECT * FROM fuente",
+            "ID_REGISTRO",
+            5,
+            esquema={
+                "ID_REGISTRO": "Int64",
+                "FECHA_INICIO_TRATAMIENTO": "datetime64[ns]",
+            },
+            last_key=reanudacion.ultima_llave,
+            retries=0,
+            connection_factory=conexiones,
+        )
+        chunks = number_rows(
+            reanudacion.observar(paginas), start=reanudacion.filas_leidas
+        )
+        ejecutar_pipeline(
+            chunks, str(ruta), output_compression=compresion, reanudacion=reanudacion
+        )
+
+    fallas.add(4)
+    with pytest.raises(DatabaseError):
+        ejecutar(salida)
+
+    parcial = EscritorSalida.ruta_parcial(salida)
+    assert not salida.exists() and parcial.exists()
+    estado = PuntoControl(checkpoint, str(salida), "firma").leer()
+    assert estado["ultima_llave"] == 14 and estado["filas_leidas"] == 15
+
+    # Una falla durante la escritura deja bytes después del punto de control.
+    with open(parcial, "ab") as archivo:
+        archivo.write(b"fila incompleta")
+
+    ejecutar(salida)
+    ejecutar(completa)
+
+    assert not parcial.exists()
+    assert PuntoControl(checkpoint, str(salida), "firma").leer() is None
+    pd.testing.assert_frame_equal(
+        pd.read_csv(salida, compression=compresion),
+        pd.read_csv(completa, compression=compresion),
+    )
+
+
+def test_punto_control_de_otra_extraccion_se_descarta(tmp_path):
+    """Una firma distinta (otra consulta) no reanuda la extracción."""
+    checkpoint = tmp_path / "checkpoint.json"
+    PuntoControl(checkpoint, "salida.csv", "anterior").guardar(10, 11, 30, 512)
+
+    reanudacion = Reanudacion(
+        PuntoControl(checkpoint, "salida.csv", "nueva"), "ID_REGISTRO"
+    )
+
+    assert not reanudacion.reanudando
+    assert reanudacion.ultima_llave is None and reanudacion.filas_leidas == 0
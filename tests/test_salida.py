@@ -0,0 +1,107 @@
+import gzip
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from desagregacion_dsg_upc import ConfigError, EscritorCSV, crear_escritor
+
+
+@pytest.fixture
+def sample_df() -> pd.DataFrame:
+    """Chunk desagregado de ejemplo."""
+    data = {
+        "DESCRIPCION_CUP": pd.Categorical(["CONSULTA", "CURACION"]),
+        "CANTIDAD_PROCEDIMIENTO": pd.array([1, 1], dtype="Int32"),
+        "VALOR_NETO": [1000.0, 500.5],
+        "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 1), datetime(2025, 1, 2)],
+    }
+    return pd.DataFrame(data)
+
+
+def test_crear_escritor_segun_extension(tmp_path):
+    """El formato se deduce de la extensión cuando no se indica."""
+    assert type(crear_escritor(tmp_path / "salida.csv")).__name__ == "EscritorCSV"
+    with pytest.raises(ConfigError):
+        crear_escritor(tmp_path / "salida.csv", formato="xlsx")
+    with pytest.raises(ConfigError):
+        crear_escritor(tmp_path / "salida.csv", compresion="rar")
+
+
+def test_escritor_csv_comprimido_agrega_chunks(tmp_path, sample_df):
+    """Cada chunk se agrega al CSV y el encabezado se escribe una sola vez."""
+    ruta = tmp_path / "salida.csv.gz"
+
+    with EscritorCSV(ruta, compresion="gzip") as escritor:
+        escritor.escribir(sample_df)
+        escritor.escribir(sample_df)
+
+    with gzip.open(ruta, "rt") as archivo:
+        df = pd.read_csv(archivo)
+
+    assert escritor.filas_escritas == 4
+    assert len(df) == 4
+    assert list(df.columns) == list(sample_df.columns)
+
+
+def test_escritor_sin_chunks_publica_salida_vacia(tmp_path):
+    """Una extracción vacía deja un archivo vacío y no un archivo ausente."""
+    ruta = tmp_path / "salida.csv"
+
+    with crear_escritor(ruta):
+        pass
+
+    assert ruta.exists()
+
+
+def test_escritor_parquet_un_row_group_por_chunk(tmp_path, sample_df):
+    """Cada chunk queda como un row group con el esquema del primero."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    ruta = tmp_path / "salida.parquet"
+
+    otro_chunk = sample_df.assign(
+        DESCRIPCION_CUP=pd.Categorical(["TERAPIA", "DOMICILIO"])
+    )
+    with crear_escritor(ruta, compresion="zstd") as escritor:
+        escritor.escribir(sample_df)
+        escritor.escribir(otro_chunk)
+
+    archivo = pq.ParquetFile(ruta)
+    assert archivo.metadata.num_row_groups == 2
+    assert archivo.metadata.row_group(0).column(0).compression == "ZSTD"
+
+    df = pd.read_parquet(ruta)
+    assert df["DESCRIPCION_CUP"].astype(str).tolist() == [
+        "CONSULTA",
+        "CURACION",
+        "TERAPIA",
+        "DOMICILIO",
+    ]
+
+
+@pytest.mark.parametrize("anexar", [False, True])
+def test_escritor_parquet_chunk_con_mas_categorias(tmp_path, sample_df, anexar):
+    """Un chunk posterior con más categorías que las que admite el primero."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    ruta = tmp_path / "salida.parquet"
+    muchas = [f"CUPS {i}" for i in range(300)]
+    otro_chunk = pd.DataFrame(
+        {
+            "DESCRIPCION_CUP": pd.Categorical(muchas),
+            "CANTIDAD_PROCEDIMIENTO": pd.array([1] * 300, dtype="Int32"),
+            "VALOR_NETO": [1.0] * 300,
+            "FECHA_INICIO_TRATAMIENTO": [datetime(2025, 1, 3)] * 300,
+        }
+    )
+
+    if anexar:
+        # Salida de una ejecución anterior, con índices int8 en su esquema.
+        sample_df.to_parquet(ruta, index=False)
+        assert "int8" in str(pq.ParquetFile(ruta).schema_arrow)
+    with crear_escritor(ruta, anexar=anexar) as escritor:
+        if not anexar:
+            escritor.escribir(sample_df)
+        escritor.escribir(otro_chunk)
+
+    descripciones = pd.read_parquet(ruta)["DESCRIPCION_CUP"].astype(str).tolist()
+    assert descripciones == ["CONSULTA", "CURACION", *muchas]